@@ -1,37 +1,117 @@
+import asyncio
 import concurrent.futures
+import logging
 import requests
+import httpx
 import json
-from typing import Callable, Optional, Any, List
+from typing import AsyncIterator, Callable, Iterator, Optional, Any, List
 from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
 from requests.auth import AuthBase
+from urllib3.util.retry import Retry
+from utils import Environment
+from adapters.http_cache import HTTPCache
+
+logger = logging.getLogger("application.adapter")
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
 
 
 class APIClient:
+    """
+    JSON client for an external API, over a pooled `requests.Session` that keeps connections alive,
+    retries idempotent calls on connection errors and on 429/5xx with exponential backoff, and applies
+    a connect and read timeout to every call. With a `cache`, `GET` responses are cached and revalidated
+    as described in `HTTPCache`.
+    """
 
     class Callback(BaseModel):
         uri: str
         func: Optional[Callable] = None
         args: Optional[Any] = {}
 
-    def __init__(self, base_url: str, auth: AuthBase = None):
+    _pool_size: int = int(Environment.get("API_CLIENT_POOL_SIZE", 10))
+    _connect_timeout: float = float(Environment.get("API_CLIENT_CONNECT_TIMEOUT", 3))
+    _read_timeout: float = float(Environment.get("API_CLIENT_READ_TIMEOUT", 30))
+    _retries: int = int(Environment.get("API_CLIENT_RETRIES", 3))
+    _backoff: float = float(Environment.get("API_CLIENT_BACKOFF", 0.5))
+    _concurrency: int = int(Environment.get("API_CLIENT_CONCURRENCY", 5))
+
+    def __init__(
+        self,
+        base_url: str,
+        auth: AuthBase = None,
+        pool_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        backoff: Optional[float] = None,
+        cache: Optional[HTTPCache] = None,
+    ):
         self.base_url = base_url
         self.auth = auth
         self.headers = {
             "Accept": "application/json",
             "Content-Type": "application/json"
         }
+        self.timeout = (self._connect_timeout, timeout or self._read_timeout)
+        self.retries = self._retries if retries is None else retries
+        self.backoff = self._backoff if backoff is None else backoff
+        self.cache = cache
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_size or self._pool_size,
+            pool_maxsize=pool_size or self._pool_size,
+            max_retries=Retry(
+                total=self.retries,
+                backoff_factor=self.backoff,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=IDEMPOTENT_METHODS,
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info: Any):
+        self.close()
+
+    def close(self):
+        self.session.close()
 
     def request(self, method: str, endpoint: str, **kwargs) -> Any:
         url = f"{self.base_url}{endpoint}"
-        res = requests.request(
-            method, 
+        kwargs.setdefault("timeout", self.timeout)
+
+        if self.cache is None or method.upper() != "GET":
+            res = self.session.request(method, url, headers=self.headers, auth=self.auth, **kwargs)
+            res.raise_for_status()
+
+            return res.json()
+
+        key = self.cache.key(url, kwargs.get("params"))
+        entry = self.cache.get(key)
+
+        if entry is not None and self.cache.is_fresh(entry):
+            return self.cache.hit(entry)
+
+        res = self.session.request(
+            method,
             url,
-            headers=self.headers,
+            headers={**self.headers, **self.cache.validators(entry)},
             auth=self.auth,
             **kwargs
         )
 
+        if res.status_code == 304 and entry is not None:
+            return self.cache.revalidated(key, entry, res.headers)
+
         res.raise_for_status()
+        self.cache.store(key, res.headers, res.text)
 
         return res.json()
 
@@ -55,26 +135,202 @@ class APIClient:
 
         return result
 
-    def request_all(self, method: str, endpoints: List[str|Callback], **kwargs):
-        results = []
-        endpoints = [self.Callback(uri=uri) if isinstance(uri, str) else uri for uri in endpoints]
+    def request_all(self, method: str, endpoints: List[str|Callback], concurrency: Optional[int] = None, **kwargs) -> List[Any]:
+        return list(self.iter_all(method, endpoints, concurrency=concurrency, **kwargs))
+
+    def iter_all(self, method: str, endpoints: List[str|Callback], concurrency: Optional[int] = None, **kwargs) -> Iterator[Any]:
+        """
+        Calls every endpoint with at most `concurrency` calls in flight, yielding each non-empty result
+        as soon as it arrives. Failed calls are logged and skipped.
+        """
+        calls = iter([self.Callback(uri=uri) if isinstance(uri, str) else uri for uri in endpoints])
+        concurrency = concurrency or self._concurrency
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            future_to_uri = {}
+
+            # Only `concurrency` calls are submitted at a time, so a long endpoint list is not queued up front.
+            for call in calls:
+                future_to_uri[executor.submit(self.request, method=method, endpoint=call.uri, **kwargs)] = call
+
+                if len(future_to_uri) >= concurrency:
+                    break
+
+            while future_to_uri:
+                done, _ = concurrent.futures.wait(future_to_uri, return_when=concurrent.futures.FIRST_COMPLETED)
+
+                for future in done:
+                    call = future_to_uri.pop(future)
+                    following = next(calls, None)
+
+                    if following is not None:
+                        future_to_uri[executor.submit(self.request, method=method, endpoint=following.uri, **kwargs)] = following
+
+                    try:
+                        data = future.result()
+
+                        if call.func is not None:
+                            call.func(data, **call.args)
+
+                        if data is not None:
+                            yield data
+
+                    except Exception as exc:
+                        logger.warning(f"{call.uri} gerou uma exceção: {exc}")
+
+
+class AsyncAPIClient:
+    """
+    Asyncio sibling of `APIClient` with the same interface, over a pooled `httpx.AsyncClient`.
+    Idempotent calls are retried on connection errors and on 429/5xx, honouring `Retry-After`.
+    """
+
+    Callback = APIClient.Callback
+
+    def __init__(
+        self,
+        base_url: str,
+        auth: Optional[httpx.Auth] = None,
+        pool_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        backoff: Optional[float] = None,
+        cache: Optional[HTTPCache] = None,
+    ):
+        self.base_url = base_url
+        self.auth = auth
+        self.headers = {
+            "Accept": "application/json",
+            "Content-Type": "application/json"
+        }
+        self.retries = APIClient._retries if retries is None else retries
+        self.backoff = APIClient._backoff if backoff is None else backoff
+        self.cache = cache
+        pool_size = pool_size or APIClient._pool_size
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            auth=auth,
+            timeout=httpx.Timeout(timeout or APIClient._read_timeout, connect=APIClient._connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info: Any):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def request(self, method: str, endpoint: str, **kwargs) -> Any:
+        url = f"{self.base_url}{endpoint}"
+        cached = self.cache is not None and method.upper() == "GET"
+        key = self.cache.key(url, kwargs.get("params")) if cached else None
+        entry = self.cache.get(key) if cached else None
+
+        if entry is not None and self.cache.is_fresh(entry):
+            return self.cache.hit(entry)
+
+        if entry is not None:
+            kwargs["headers"] = {**kwargs.get("headers", {}), **self.cache.validators(entry)}
+
+        attempts = self.retries + 1 if method.upper() in IDEMPOTENT_METHODS else 1
+
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+
+            try:
+                res = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if last:
+                    raise
+
+                await asyncio.sleep(self._delay(attempt))
+                continue
+
+            if res.status_code in RETRY_STATUSES and not last:
+                await asyncio.sleep(self._delay(attempt, res.headers.get("Retry-After")))
+                continue
+
+            if res.status_code == 304 and entry is not None:
+                return self.cache.revalidated(key, entry, res.headers)
+
+            res.raise_for_status()
+
+            if cached:
+                self.cache.store(key, res.headers, res.text)
+
+            return res.json()
+
+    async def get(self, endpoint: str, **kwargs) -> Any:
+        return await self.request("GET", endpoint=endpoint, **kwargs)
+
+    async def put(self, endpoint: str, data: Any, **kwargs) -> Any:
+        return await self.request("PUT", endpoint=endpoint, content=json.dumps(data), **kwargs)
+
+    async def post(self, endpoint: str, data: Any, **kwargs) -> Any:
+        return await self.request("POST", endpoint=endpoint, content=json.dumps(data), **kwargs)
+
+    async def delete(self, endpoint: str, **kwargs) -> Any:
+        return await self.request("DELETE", endpoint=endpoint, **kwargs)
+
+    async def request_all(self, method: str, endpoints: List[str|APIClient.Callback], concurrency: Optional[int] = None, **kwargs) -> List[Any]:
+        return [data async for data in self.iter_all(method, endpoints, concurrency=concurrency, **kwargs)]
+
+    async def iter_all(self, method: str, endpoints: List[str|APIClient.Callback], concurrency: Optional[int] = None, **kwargs) -> AsyncIterator[Any]:
+        """
+        Calls every endpoint with at most `concurrency` calls in flight, yielding each non-empty result
+        as soon as it arrives. Callbacks may be coroutine functions. Failed calls are logged and skipped.
+        """
+        calls = iter([self.Callback(uri=uri) if isinstance(uri, str) else uri for uri in endpoints])
+        concurrency = concurrency or APIClient._concurrency
+        tasks = {}
+
+        def submit(call: APIClient.Callback):
+            tasks[asyncio.ensure_future(self.request(method, endpoint=call.uri, **kwargs))] = call
+
+        for call in calls:
+            submit(call)
+
+            if len(tasks) >= concurrency:
+                break
+
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    call = tasks.pop(task)
+                    following = next(calls, None)
+
+                    if following is not None:
+                        submit(following)
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_uri = {executor.submit(self.request, method=method, endpoint=endpoint.uri, **kwargs): endpoint for endpoint in endpoints}
+                    try:
+                        data = task.result()
 
-            for future in concurrent.futures.as_completed(future_to_uri):
-                call = future_to_uri[future]
+                        if call.func is not None:
+                            outcome = call.func(data, **call.args)
 
-                try:
-                    data = future.result()
+                            if asyncio.iscoroutine(outcome):
+                                await outcome
 
-                    if call.func is not None:
-                        call.func(data, **call.args)
+                        if data is not None:
+                            yield data
 
-                    if data is not None:
-                        results.append(data)
+                    except Exception as exc:
+                        logger.warning(f"{call.uri} gerou uma exceção: {exc}")
+        finally:
+            # A consumer that stops early must not leave calls running.
+            for task in tasks:
+                task.cancel()
 
-                except Exception as exc:
-                    print(f"{call.uri} gerou uma exceção: {exc}")
+    def _delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after is not None:
+            try:
+                return max(float(retry_after), 0)
+            except ValueError:
+                pass
 
-        return results
+        return self.backoff * (2 ** attempt)
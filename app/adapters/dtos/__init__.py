@@ -1,2 +1,3 @@
 from .code import CodeDTO
-from .response import ResponseDTO
\ No newline at end of file
+from .response import ResponseDTO
+from .analysis import AnalysisDTO, BatchItemDTO
\ No newline at end of file
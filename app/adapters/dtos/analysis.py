@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class AnalysisDTO(BaseModel):
+    id: Optional[str] = None
+    suggestions: str
+    cache: str = "MISS"
+    cache_tier: Optional[str] = None
+    near_duplicate: bool = False
+    similarity: Optional[float] = None
+    coalesced: bool = False
+    reused_regions: Optional[List[str]] = None
+    analyzed_regions: Optional[List[str]] = None
+    model: Optional[str] = None
+    hedged: bool = False
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+
+
+class BatchItemDTO(BaseModel):
+    index: int
+    result: Optional[AnalysisDTO] = None
+    error: Optional[str] = None
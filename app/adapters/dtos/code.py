@@ -1,4 +1,9 @@
+import uuid
 from pydantic import BaseModel
+from typing import Literal, Optional
 
 class CodeDTO(BaseModel):
     code: str
+    bypass_cache: bool = False
+    previous_analysis_id: Optional[uuid.UUID] = None
+    priority: Literal["low", "normal", "high"] = "normal"
@@ -0,0 +1,314 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+from utils import Environment, Telemetry, TTLCache
+
+logger = logging.getLogger("application.adapter")
+
+
+class HTTPCache:
+    """
+    Private HTTP cache for the `GET` responses of `APIClient` and `AsyncAPIClient`: a size-bounded LRU whose
+    entries stay fresh for the `Cache-Control: max-age` (or `Expires`) of the response, or for `ttl` seconds
+    when it sends neither. Stale entries with an `ETag` or `Last-Modified` are revalidated with a conditional
+    request, so an unchanged resource costs a `304` instead of the whole body.
+
+    With `directory`, entries are also written there, one JSON file each, and survive restarts.
+    A cache must not be shared by clients calling the same API with different credentials.
+    """
+
+    # The response headers deciding freshness, stored with the entry: a `304` that omits them keeps these.
+    FRESHNESS_HEADERS = ("Cache-Control", "Expires", "Vary")
+
+    def __init__(self, name: str = "api", maxsize: int = 512, ttl: float = 60, directory: Optional[str] = None):
+        """
+        Initializes the cache.
+
+        Args:
+            name (str): Label of the cache in the metrics.
+            maxsize (int): Maximum number of entries kept in memory, and about as many on disk.
+            ttl (float): Freshness of responses without `Cache-Control: max-age` or `Expires`, in seconds.
+            directory (Optional[str]): Where to persist the entries. None keeps them in memory only.
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.directory = directory
+        self._entries = TTLCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._revalidations = 0
+        self._writes = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, name: str = "api") -> "HTTPCache":
+        """
+        A cache configured by `API_CLIENT_CACHE_SIZE`, `API_CLIENT_CACHE_TTL` and `API_CLIENT_CACHE_DIR`,
+        persisted under a `name` subdirectory when the latter is set.
+        """
+        directory = Environment.get("API_CLIENT_CACHE_DIR", "")
+
+        return cls(
+            name=name,
+            maxsize=int(Environment.get("API_CLIENT_CACHE_SIZE", 512)),
+            ttl=float(Environment.get("API_CLIENT_CACHE_TTL", 60)),
+            directory=os.path.join(directory, name) if directory else None,
+        )
+
+    @staticmethod
+    def key(url: str, params: Any = None) -> str:
+        return f"{url} {json.dumps(params, sort_keys=True, default=str)}" if params else url
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        The entry stored for `key`, fresh or not, looked up in memory and then on disk.
+        """
+        entry = self._entries.get(key)
+
+        if entry is None and self.directory:
+            entry = self._read(key)
+
+            if entry is not None:
+                self._entries.set(key, entry, self._retention(entry))
+
+        return entry
+
+    @staticmethod
+    def is_fresh(entry: Dict[str, Any]) -> bool:
+        return entry["fresh_until"] > time.time()
+
+    @staticmethod
+    def validators(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        The conditional headers revalidating `entry`.
+        """
+        if entry is None:
+            return {}
+
+        headers = {}
+
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        return headers
+
+    def hit(self, entry: Dict[str, Any]) -> Any:
+        """
+        Count a fresh entry served from the cache and return its decoded body.
+        """
+        self._count("hit")
+
+        return json.loads(entry["body"])
+
+    def revalidated(self, key: str, entry: Dict[str, Any], headers: Mapping[str, str]) -> Any:
+        """
+        Renew an entry after a `304 Not Modified`, with the freshness and validators it carries, and return
+        the stored body. Freshness headers the `304` leaves out are taken from the stored response, so a
+        `no-cache` entry stays stale instead of getting the default `ttl`.
+        """
+        self._count("revalidated")
+        stored = entry.get("headers") or {}
+        merged = {name: headers.get(name) or stored.get(name) for name in self.FRESHNESS_HEADERS}
+        merged.update({name: headers.get(name) for name in ("Age", "Date")})
+        merged = {name: value for name, value in merged.items() if value}
+        freshness = self.freshness(merged)
+
+        if freshness is None:
+            self.discard(key)
+        else:
+            entry = dict(
+                entry,
+                etag=headers.get("ETag") or entry.get("etag"),
+                last_modified=headers.get("Last-Modified") or entry.get("last_modified"),
+                headers={name: merged[name] for name in self.FRESHNESS_HEADERS if name in merged},
+                fresh_until=time.time() + freshness,
+            )
+            self._save(key, entry)
+
+        return json.loads(entry["body"])
+
+    def store(self, key: str, headers: Mapping[str, str], body: str):
+        """
+        Count a full response fetched from the API and keep it if its headers allow.
+        """
+        self._count("miss")
+        freshness = self.freshness(headers)
+
+        if freshness is None:
+            self.discard(key)
+            return
+
+        entry = {
+            "body": body,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "headers": {name: headers[name] for name in self.FRESHNESS_HEADERS if headers.get(name)},
+            "fresh_until": time.time() + freshness,
+        }
+
+        # Without validators a stale entry is useless, so it is only kept while fresh.
+        if freshness > 0 or self.validators(entry):
+            self._save(key, entry)
+        else:
+            self.discard(key)
+
+    def freshness(self, headers: Mapping[str, str]) -> Optional[float]:
+        """
+        For how many seconds a response may be served without asking the API, or None if it must not be stored.
+        """
+        directives = {}
+
+        for directive in headers.get("Cache-Control", "").split(","):
+            name, _, value = directive.strip().partition("=")
+
+            if name:
+                directives[name.lower()] = value.strip('"')
+
+        if "no-store" in directives or headers.get("Vary", "").strip() == "*":
+            return None
+
+        if "no-cache" in directives:
+            return 0
+
+        if "max-age" in directives:
+            try:
+                return max(int(directives["max-age"]) - int(headers.get("Age", 0)), 0)
+            except ValueError:
+                return 0
+
+        if headers.get("Expires"):
+            try:
+                expires = parsedate_to_datetime(headers["Expires"])
+                date = parsedate_to_datetime(headers["Date"]) if headers.get("Date") else None
+                now = date.timestamp() if date is not None else time.time()
+
+                return max(expires.timestamp() - now, 0)
+            except (TypeError, ValueError):
+                # An invalid date means the response is already stale.
+                return 0
+
+        return self.ttl
+
+    def discard(self, key: str):
+        self._entries.pop(key)
+
+        if self.directory:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        self._entries.clear()
+
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.directory, name))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "revalidations": self._revalidations,
+            }
+
+    def _count(self, outcome: str):
+        with self._lock:
+            if outcome == "hit":
+                self._hits += 1
+            elif outcome == "revalidated":
+                self._revalidations += 1
+            else:
+                self._misses += 1
+
+        Telemetry.API_CLIENT_CACHE.labels(cache=self.name, outcome=outcome).inc()
+
+    def _retention(self, entry: Dict[str, Any]) -> Optional[float]:
+        # Entries with validators outlive their freshness, so they can be revalidated; the LRU bounds them.
+        if self.validators(entry):
+            return None
+
+        return max(entry["fresh_until"] - time.time(), 0)
+
+    def _save(self, key: str, entry: Dict[str, Any]):
+        self._entries.set(key, entry, self._retention(entry))
+
+        if self.directory:
+            self._write(key, entry)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{hashlib.sha256(key.encode()).hexdigest()}.json")
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+
+        try:
+            with open(path, encoding="utf-8") as file:
+                entry = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Entrada inválida no cache HTTP {path}: {e}")
+            return None
+
+        if entry.get("key") != key or (not self.is_fresh(entry) and not self.validators(entry)):
+            return None
+
+        # The modification time orders the files for eviction, so reading one marks it as recently used.
+        os.utime(path)
+
+        return entry
+
+    def _write(self, key: str, entry: Dict[str, Any]):
+        try:
+            descriptor, partial = tempfile.mkstemp(dir=self.directory, suffix=".partial")
+
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                json.dump(dict(entry, key=key), file)
+
+            os.replace(partial, self._path(key))
+        except OSError as e:
+            logger.warning(f"Falha ao gravar o cache HTTP em {self.directory}: {e}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % max(self.maxsize // 10, 1) == 0
+
+        if prune:
+            self._prune()
+
+    def _prune(self):
+        """
+        Remove the least recently used files beyond `maxsize`.
+        """
+        files = []
+
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    files.append((os.path.getmtime(os.path.join(self.directory, name)), name))
+                except FileNotFoundError:
+                    pass
+
+        for _, name in sorted(files)[:max(len(files) - self.maxsize, 0)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
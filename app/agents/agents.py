@@ -5,18 +5,38 @@ from entities.llm_provider import LLMProvider
 
 
 class Agents:
-    def __init__(self, llm_provider: LLMProvider = Depends()):
-        self.llm = llm_provider.model
-
-    def get_code_improvement_agent(self) -> Agent:
-        return Agent(
-            role="Code Improvement Specialist",
-            goal="Analyze the existing code and suggest improvements based on SOLID principles and key design patterns.",
-            backstory=(""""
+    CODE_IMPROVEMENT_ROLE = "Code Improvement Specialist"
+    CODE_IMPROVEMENT_GOAL = "Analyze the existing code and suggest improvements based on SOLID principles and key design patterns."
+    CODE_IMPROVEMENT_BACKSTORY = (""""
             This agent specializes in identifying violations of best development practices and proposing solutions 
             that follow SOLID principles (Single Responsibility, Open/Closed, Liskov Substitution, Interface Segregation, Dependency Inversion). 
             It is also capable of recommending and applying design patterns such as Factory, Singleton, Strategy, and Observer, 
             enhancing the maintainability and extensibility of the system.
-            """),
-            llm=self.llm
+            """)
+
+    def __init__(self, llm_provider: LLMProvider = Depends()):
+        self.llm_provider = llm_provider
+        self.llm = llm_provider.model
+        self._code_improvement_agent = None
+
+    def get_code_improvement_agent(self) -> Agent:
+        if self._code_improvement_agent is None:
+            self._code_improvement_agent = Agent(
+                role=self.CODE_IMPROVEMENT_ROLE,
+                goal=self.CODE_IMPROVEMENT_GOAL,
+                backstory=self.CODE_IMPROVEMENT_BACKSTORY,
+                llm=self.llm,
+                # Retries are owned by the provider's LLMGovernor.
+                max_retry_limit=0
+            )
+
+        return self._code_improvement_agent
+
+    def get_code_improvement_system_prompt(self) -> str:
+        """
+        The same persona as `get_code_improvement_agent`, for direct (streamed) LLM calls outside a Crew.
+        """
+        return (
+            f"You are {self.CODE_IMPROVEMENT_ROLE}. {self.CODE_IMPROVEMENT_BACKSTORY.strip()}\n"
+            f"Your personal goal is: {self.CODE_IMPROVEMENT_GOAL}"
         )
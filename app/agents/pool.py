@@ -0,0 +1,107 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from agents.agents import Agents
+from entities.llm_provider import LLMProvider
+from utils import Environment
+
+
+class AgentPool:
+    """
+    A process-wide pool of prebuilt agents sharing one LLM client, created once and lent out per request.
+
+    crewai agents keep per-run state, so an instance is only ever used by one request at a time;
+    the pool grows lazily up to `size` and callers block when every agent is busy.
+    """
+
+    def __init__(self, size: int, model: Optional[str] = None, params: Optional[Dict[str, Any]] = None):
+        self.size = size
+        self.model = model
+        self.params = params
+        self._llm_provider: Optional[LLMProvider] = None
+        self._reduce_llm_provider: Optional[LLMProvider] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._idle: "queue.LifoQueue[Agents]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @property
+    def llm_provider(self) -> LLMProvider:
+        if self._llm_provider is None:
+            with self._lock:
+                if self._llm_provider is None:
+                    self._llm_provider = LLMProvider(model=self.model, params=self.params)
+
+        return self._llm_provider
+
+    @property
+    def reduce_llm_provider(self) -> LLMProvider:
+        """
+        The client used to merge chunked analyses; `LLM_REDUCE_MODEL` may point it to a cheaper model.
+        """
+        if self._reduce_llm_provider is None:
+            with self._lock:
+                if self._reduce_llm_provider is None:
+                    self._reduce_llm_provider = LLMProvider(
+                        model=Environment.get("LLM_REDUCE_MODEL"),
+                        max_tokens=int(Environment.get("LLM_REDUCE_MAX_TOKENS", 1024)),
+                    )
+
+        return self._reduce_llm_provider
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """
+        Threads for calls run in the background (hedged calls), one per agent: a call never waits for a
+        thread while an agent is free, and pools never take threads from each other.
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="agent-pool")
+
+        return self._executor
+
+    def warmup(self, ping: bool = False):
+        """
+        Builds every agent up front and optionally opens the keep-alive connection to the provider.
+        """
+        with self._lock:
+            missing = self.size - self._created
+            self._created = self.size
+
+        for _ in range(missing):
+            self._idle.put(self._build())
+
+        if ping:
+            self.llm_provider.ping()
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None) -> Iterator[Agents]:
+        """
+        Lends an agent set for the duration of the `with` block.
+        """
+        try:
+            agents = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+
+                if can_create:
+                    self._created += 1
+
+            agents = self._build() if can_create else self._idle.get(timeout=timeout)
+
+        try:
+            yield agents
+        finally:
+            self._idle.put(agents)
+
+    def _build(self) -> Agents:
+        agents = Agents(self.llm_provider)
+        agents.get_code_improvement_agent()
+
+        return agents
@@ -0,0 +1,129 @@
+import json
+import threading
+from collections import deque
+from pydantic import BaseModel
+from typing import Any, Deque, Dict, List, Literal, Optional, Tuple
+
+from agents.pool import AgentPool
+from analysis import StaticReport
+from utils import Environment
+
+Priority = Literal["low", "normal", "high"]
+PRIORITIES: Tuple[str, ...] = ("low", "normal", "high")
+
+
+class ModelRoute(BaseModel):
+    """
+    One row of the routing table: the first route whose limits all hold for a request is used.
+    """
+    name: str
+    model: str
+    params: Dict[str, Any] = {}
+    max_lines: Optional[int] = None
+    max_complexity: Optional[int] = None
+    priorities: Optional[List[Priority]] = None
+    hedge_model: Optional[str] = None
+
+    def matches(self, lines: int, complexity: int, priority: str) -> bool:
+        return (
+            (self.max_lines is None or lines <= self.max_lines)
+            and (self.max_complexity is None or complexity <= self.max_complexity)
+            and (self.priorities is None or priority in self.priorities)
+        )
+
+
+class ModelRouter:
+    """
+    Picks the model and parameters for a request from its size, estimated complexity and priority,
+    and keeps one agent pool per (model, parameters) pair plus the latency history used for hedging.
+    """
+
+    def __init__(
+        self,
+        default_pool: AgentPool,
+        routes: List[ModelRoute],
+        hedge_model: Optional[str] = None,
+        hedge_quantile: float = 0.9,
+        hedge_min_samples: int = 20,
+    ):
+        self.default_pool = default_pool
+        self.routes = routes
+        self.hedge_model = hedge_model
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self._default: Optional[ModelRoute] = None
+        self._pools: Dict[Tuple[str, str], AgentPool] = {}
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, default_pool: AgentPool) -> "ModelRouter":
+        """
+        Builds the router from `LLM_ROUTES`, a JSON list of `ModelRoute` objects.
+        """
+        return cls(
+            default_pool,
+            routes=[ModelRoute(**route) for route in json.loads(Environment.get("LLM_ROUTES", "[]"))],
+            hedge_model=Environment.get("LLM_HEDGE_MODEL"),
+            hedge_quantile=float(Environment.get("LLM_HEDGE_QUANTILE", 0.9)),
+            hedge_min_samples=int(Environment.get("LLM_HEDGE_MIN_SAMPLES", 20)),
+        )
+
+    @property
+    def default(self) -> ModelRoute:
+        """
+        The route used when no table entry matches: `LLM_MODEL`, hedged to `LLM_HEDGE_MODEL` if set.
+        """
+        if self._default is None:
+            self._default = ModelRoute(
+                name="default",
+                model=self.default_pool.llm_provider.model_name,
+                hedge_model=self.hedge_model,
+            )
+
+        return self._default
+
+    @staticmethod
+    def _key(model: str, params: Dict[str, Any]) -> Tuple[str, str]:
+        return model, json.dumps(params, sort_keys=True)
+
+    def select(self, code: str, report: Optional[StaticReport] = None, priority: str = "normal") -> ModelRoute:
+        lines = report.lines if report else sum(1 for line in code.split("\n") if line.strip())
+        complexity = report.max_complexity if report and report.parsed else 0
+
+        return next((route for route in self.routes if route.matches(lines, complexity, priority)), self.default)
+
+    def pool(self, model: str, params: Optional[Dict[str, Any]] = None) -> AgentPool:
+        """
+        The agent pool serving a model with the given parameters, created on first use.
+        """
+        if model == self.default.model and not params:
+            return self.default_pool
+
+        key = self._key(model, params or {})
+
+        with self._lock:
+            if key not in self._pools:
+                self._pools[key] = AgentPool(size=self.default_pool.size, model=model, params=params)
+
+            return self._pools[key]
+
+    def observe(self, route: ModelRoute, seconds: float):
+        with self._lock:
+            self._latencies.setdefault(route.name, deque(maxlen=500)).append(seconds)
+
+    def hedge_delay(self, route: ModelRoute) -> Optional[float]:
+        """
+        How long to wait for the route's model before also asking its hedge model: the observed
+        latency quantile (`LLM_HEDGE_QUANTILE`), once enough calls were seen. None disables hedging.
+        """
+        if not route.hedge_model:
+            return None
+
+        with self._lock:
+            samples = sorted(self._latencies.get(route.name, ()))
+
+        if len(samples) < self.hedge_min_samples:
+            return None
+
+        return samples[min(len(samples) - 1, int(self.hedge_quantile * len(samples)))]
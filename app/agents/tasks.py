@@ -1,25 +1,117 @@
+import textwrap
 from crewai import Task
+from typing import Dict, List, Optional
 from agents.agents import Agents
+from analysis import CodeChunk
 from utils import Environment
 
 
 class Tasks:
+    # Bump whenever the prompt changes so cached analyses are not reused across prompt versions.
+    PROMPT_VERSION = "3"
+    CODE_IMPROVEMENT_EXPECTED_OUTPUT = "A detailed analysis of the code, identifying areas for improvement in best practices, organization, and efficiency, along with actionable suggestions for enhancement. The output must be in Brazilian Portuguese."
+
+    CODE_IMPROVEMENT_TEMPLATE = textwrap.dedent("""
+        Review the following code snippet and identify possible improvements in terms of structure,
+        readability, reusability, and adherence to development standards, Clean Architecture, and SOLID principles.
+        Highlight suboptimal practices and suggest refactorings to enhance code clarity and efficiency.
+
+        Please ensure that the analysis and suggestions are provided in **{language}**.
+        {metrics}
+        Code to review:
+    """).strip()
+
+    CHUNK_REVIEW_TEMPLATE = textwrap.dedent("""
+        You are reviewing only part of a larger Python file ({names}, lines {start_line}-{end_line}).
+        Identify possible improvements in terms of structure, readability, reusability, and adherence to
+        development standards, Clean Architecture, and SOLID principles, and suggest refactorings.
+        Every finding must reference the line numbers shown at the start of each line.
+
+        Please ensure that the analysis and suggestions are provided in **{language}**.
+        {metrics}
+        Shared context from the same file (for reference only, do not review):
+        {context}
+
+        Code to review:
+    """).strip()
+
+    METRICS_TEMPLATE = "\nStatic metrics computed locally for this code (trust them instead of recomputing):\n{metrics}\n"
+
     def __init__(self, agents: Agents):
         self.agents = agents
         self.language = Environment.get("LANGUAGE_RESPONSE","Brazilian Portuguese")
 
-    def get_code_improvement_task(self, code: str) -> Task:
+    @classmethod
+    def get_metrics_section(cls, metrics: Optional[str]) -> str:
+        return cls.METRICS_TEMPLATE.format(metrics=metrics) if metrics else ""
+
+    def get_code_improvement_description(self, code: str, metrics: Optional[str] = None) -> str:
+        # The code is appended rather than interpolated so the template is never re-indented around it.
+        header = self.CODE_IMPROVEMENT_TEMPLATE.format(
+            language=self.language,
+            metrics=self.get_metrics_section(metrics),
+        )
+
+        return f"{header}\n{code}"
+
+    def get_code_improvement_task(self, code: str, metrics: Optional[str] = None) -> Task:
         return Task(
-            description=f"""
-                  Review the following code snippet and identify possible improvements in terms of structure, 
-                  readability, reusability, and adherence to development standards, Clean Architecture, and SOLID principles. 
-                  Highlight suboptimal practices and suggest refactorings to enhance code clarity and efficiency.
+            description=self.get_code_improvement_description(code, metrics),
+            agent=self.agents.get_code_improvement_agent(),
+            expected_output=self.CODE_IMPROVEMENT_EXPECTED_OUTPUT
+        )
 
-                  Please ensure that the analysis and suggestions are provided in **{self.language}**.
+    def get_code_improvement_messages(self, code: str, metrics: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Chat messages equivalent to `get_code_improvement_task`, for streamed LLM calls.
+        """
+        return [
+            {"role": "system", "content": self.agents.get_code_improvement_system_prompt()},
+            {
+                "role": "user",
+                "content": (
+                    f"{self.get_code_improvement_description(code, metrics)}\n\n"
+                    f"This is the expected criteria for your final answer: {self.CODE_IMPROVEMENT_EXPECTED_OUTPUT}"
+                ),
+            },
+        ]
+
+    def get_chunk_review_description(self, chunk: CodeChunk, metrics: Optional[str] = None) -> str:
+        header = self.CHUNK_REVIEW_TEMPLATE.format(
+            names=", ".join(chunk.names),
+            start_line=chunk.start_line,
+            end_line=chunk.end_line,
+            language=self.language,
+            metrics=self.get_metrics_section(metrics),
+            context=chunk.context,
+        )
 
-                  Code to review:
-                  {code}
-              """,
+        return f"{header}\n{chunk.source}"
+
+    def get_chunk_review_task(self, chunk: CodeChunk, metrics: Optional[str] = None) -> Task:
+        """
+        Reviews one part of a larger file; findings must cite the original line numbers.
+        """
+        return Task(
+            description=self.get_chunk_review_description(chunk, metrics),
             agent=self.agents.get_code_improvement_agent(),
-            expected_output="A detailed analysis of the code, identifying areas for improvement in best practices, organization, and efficiency, along with actionable suggestions for enhancement. The output must be in Brazilian Portuguese."
+            expected_output="A concise list of findings for this part of the file, each with its line references and an actionable suggestion."
         )
+
+    def get_reduce_messages(self, findings: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Messages that merge per-chunk findings into a single report.
+        """
+        sections = "\n\n".join(f"### {finding['region']}\n{finding['findings']}" for finding in findings)
+
+        return [
+            {"role": "system", "content": self.agents.get_code_improvement_system_prompt()},
+            {
+                "role": "user",
+                "content": (
+                    "The findings below were produced by reviewing a file part by part. Merge them into one "
+                    "coherent report: remove duplicates, group related issues, keep every line reference and "
+                    f"point out cross-cutting problems. Answer in **{self.language}**.\n\n{sections}"
+                ),
+            },
+        ]
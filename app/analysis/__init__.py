@@ -0,0 +1,6 @@
+from .normalizer import CodeNormalizer as CodeNormalizer
+from .fingerprint import CodeFingerprint as CodeFingerprint
+from .chunking import CodeChunk as CodeChunk, CodeChunker as CodeChunker
+from .metrics import StaticAnalyzer as StaticAnalyzer, StaticFinding as StaticFinding, StaticReport as StaticReport
+from .compaction import PromptCompactor as PromptCompactor
+from .tokens import TokenEstimator as TokenEstimator
@@ -0,0 +1,155 @@
+import ast
+from pydantic import BaseModel
+from typing import List, Optional, Tuple
+#
+from .normalizer import CodeNormalizer
+
+
+class CodeChunk(BaseModel):
+    names: List[str]
+    start_line: int
+    end_line: int
+    context: str
+    source: str
+    digest: Optional[str] = None
+
+
+class CodeChunker:
+    """
+    Splits a module into chunks of top-level classes and functions that can be reviewed independently.
+    """
+
+    @staticmethod
+    def number(lines: List[str], start_line: int) -> str:
+        """
+        Prefix each line with its line number in the original file, so findings can reference it.
+        Blank lines are omitted; the numbering still follows the original file.
+        """
+        return "\n".join(
+            f"{start_line + offset}| {line}"
+            for offset, line in enumerate(lines)
+            if line.strip()
+        )
+
+    @staticmethod
+    def regions(code: str, max_lines: int = 200) -> Tuple[List[str], str, List[Tuple[str, int, int, str]]]:
+        """
+        Locate the top-level definitions of a module.
+
+        Args:
+            code (str): The normalized module source.
+            max_lines (int): Classes longer than this are split into one region per method.
+
+        Returns:
+            Tuple[List[str], str, List[Tuple[str, int, int, str]]]: The source lines, the imports shared by every
+            region, and the (name, start_line, end_line, extra_context) regions in source order.
+
+        Raises:
+            SyntaxError: If the code cannot be parsed.
+        """
+        lines = code.split("\n")
+        tree = ast.parse(code)
+        context_lines = []
+        regions: List[Tuple[str, int, int, str]] = []
+
+        def span(node: ast.AST) -> Tuple[int, int]:
+            start = min([node.lineno] + [decorator.lineno for decorator in getattr(node, "decorator_list", [])])
+            return start, node.end_lineno or node.lineno
+
+        for node in tree.body:
+            start, end = span(node)
+
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                context_lines.extend(lines[start - 1:end])
+            elif isinstance(node, ast.ClassDef) and end - start + 1 > max_lines:
+                methods = [child for child in node.body if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef))]
+                header = lines[start - 1:node.body[0].lineno - 1] + [
+                    line
+                    for child in node.body if child not in methods
+                    for line in lines[span(child)[0] - 1:span(child)[1]]
+                ]
+
+                for method in methods:
+                    method_start, method_end = span(method)
+                    regions.append((f"{node.name}.{method.name}", method_start, method_end, "\n".join(header)))
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                regions.append((node.name, start, end, ""))
+            elif regions and regions[-1][0] == "<module>" and regions[-1][2] >= start - 1:
+                regions[-1] = ("<module>", regions[-1][1], end, "")
+            else:
+                regions.append(("<module>", start, end, ""))
+
+        return lines, "\n".join(context_lines), regions
+
+    @staticmethod
+    def pack(
+        lines: List[str],
+        shared_context: str,
+        regions: List[Tuple[str, int, int, str]],
+    ) -> CodeChunk:
+        """
+        Build one chunk out of adjacent regions.
+        """
+        start, end = regions[0][1], regions[-1][2]
+        extra_context = [region[3] for region in regions if region[3]]
+
+        return CodeChunk(
+            names=[region[0] for region in regions],
+            start_line=start,
+            end_line=end,
+            context="\n".join([shared_context] + list(dict.fromkeys(extra_context))).strip("\n"),
+            source=CodeChunker.number(lines[start - 1:end], start),
+            digest=CodeNormalizer.digest("\n".join(lines[start - 1:end]), *extra_context),
+        )
+
+    @staticmethod
+    def split(code: str, max_lines: int = 200) -> List[CodeChunk]:
+        """
+        Split a module by top-level definitions, packing adjacent small definitions together.
+
+        Args:
+            code (str): The module source.
+            max_lines (int): Soft size limit of a chunk; a single larger definition still becomes one chunk.
+
+        Returns:
+            List[CodeChunk]: The chunks in source order, each carrying the module's imports as shared context.
+            Code that cannot be parsed is returned as a single chunk.
+        """
+        code = CodeNormalizer.normalize(code)
+
+        try:
+            lines, shared_context, regions = CodeChunker.regions(code, max_lines)
+        except (SyntaxError, ValueError):
+            lines = code.split("\n")
+            return [CodeChunker.pack(lines, "", [("<module>", 1, len(lines), "")])]
+
+        chunks: List[CodeChunk] = []
+        current: Optional[List[Tuple[str, int, int, str]]] = None
+
+        for region in regions:
+            if current and region[2] - current[0][1] + 1 > max_lines:
+                chunks.append(CodeChunker.pack(lines, shared_context, current))
+                current = None
+
+            current = (current or []) + [region]
+
+        if current:
+            chunks.append(CodeChunker.pack(lines, shared_context, current))
+
+        return chunks
+
+    @staticmethod
+    def definitions(code: str, max_lines: int = 200) -> List[CodeChunk]:
+        """
+        Split a module into one chunk per top-level definition (or per method of an oversized class),
+        without packing, so each definition can be compared and reviewed on its own.
+        """
+        code = CodeNormalizer.normalize(code)
+
+        try:
+            lines, shared_context, regions = CodeChunker.regions(code, max_lines)
+        except (SyntaxError, ValueError):
+            lines = code.split("\n")
+            return [CodeChunker.pack(lines, "", [("<module>", 1, len(lines), "")])]
+
+        return [CodeChunker.pack(lines, shared_context, [region]) for region in regions]
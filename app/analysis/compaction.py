@@ -0,0 +1,171 @@
+import ast
+import io
+import re
+import tokenize
+from typing import List
+#
+
+_INDENT_RE = re.compile(r"^[ \t]*")
+
+
+class PromptCompactor:
+    """
+    Shrinks code before it is sent to the LLM, trading fidelity for prompt tokens.
+
+    Levels are cumulative:
+        0: the code is sent verbatim.
+        1: comments and docstrings are removed.
+        2: trailing whitespace and blank lines are removed and indentation is reduced to one space per level.
+        3: long string and bytes literals are elided.
+    """
+
+    NONE = 0
+    STRIP = 1
+    WHITESPACE = 2
+    LITERALS = 3
+
+    @staticmethod
+    def _tokens(code: str) -> List[tokenize.TokenInfo]:
+        return list(tokenize.generate_tokens(io.StringIO(code).readline))
+
+    @staticmethod
+    def _replace(lines: List[str], start: tuple, end: tuple, text: str):
+        """
+        Replace a (row, col) span with `text`, keeping the number of lines so line references stay valid.
+        """
+        (start_row, start_col), (end_row, end_col) = start, end
+        lines[start_row - 1] = lines[start_row - 1][:start_col] + text + lines[end_row - 1][end_col:]
+
+        for row in range(start_row, end_row):
+            lines[row] = ""
+
+    @staticmethod
+    def strip(code: str) -> str:
+        """
+        Remove comments and docstrings. A docstring that is the only statement of its body becomes `...`.
+        """
+        lines = code.split("\n")
+
+        try:
+            tree = ast.parse(code)
+            tokens = PromptCompactor._tokens(code)
+        except (SyntaxError, ValueError, tokenize.TokenError):
+            return code
+
+        edits = [
+            (token.start, token.end, "")
+            for token in tokens if token.type == tokenize.COMMENT
+        ]
+
+        for node in ast.walk(tree):
+            body = getattr(node, "body", None)
+
+            if isinstance(body, list) and body and isinstance(body[0], ast.Expr) \
+                    and isinstance(body[0].value, ast.Constant) and isinstance(body[0].value.value, str):
+                docstring = body[0]
+                edits.append((
+                    (docstring.lineno, docstring.col_offset),
+                    (docstring.end_lineno, docstring.end_col_offset),
+                    "..." if len(body) == 1 else "",
+                ))
+
+        for start, end, text in sorted(edits, reverse=True):
+            PromptCompactor._replace(lines, start, end, text)
+
+        return "\n".join(line.rstrip() for line in lines)
+
+    @staticmethod
+    def elide_literals(code: str, max_length: int = 80) -> str:
+        """
+        Shorten string and bytes literals longer than `max_length` characters, keeping their prefix and quotes.
+        """
+        lines = code.split("\n")
+
+        try:
+            tokens = PromptCompactor._tokens(code)
+        except (SyntaxError, tokenize.TokenError):
+            return code
+
+        for token in reversed(tokens):
+            if token.type != tokenize.STRING or len(token.string) <= max_length:
+                continue
+
+            match = re.match(r"^([a-zA-Z]*)('''|\"\"\"|'|\")", token.string)
+
+            if match is None or "f" in match.group(1).lower():
+                continue
+
+            prefix, quote = match.groups()
+            body = token.string[len(prefix) + len(quote):-len(quote)]
+            head = body[:max_length // 2].split("\n")[0]
+            PromptCompactor._replace(lines, token.start, token.end, f"{prefix}{quote}{head}...{quote}")
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def collapse_whitespace(code: str, keep_lines: bool = False) -> str:
+        """
+        Drop trailing whitespace and blank lines and reduce each indentation level to a single space.
+
+        Args:
+            code (str): The code to collapse.
+            keep_lines (bool): Keep blank lines (emptied) so that line numbers are preserved.
+        """
+        try:
+            tokens = PromptCompactor._tokens(code)
+        except (SyntaxError, tokenize.TokenError):
+            tokens = None
+
+        lines = code.split("\n")
+
+        if tokens is not None:
+            depth = 0
+            depths = {}
+            continuation = set()
+
+            for token in tokens:
+                if token.type == tokenize.INDENT:
+                    depth += 1
+                elif token.type == tokenize.DEDENT:
+                    depth -= 1
+                elif token.type not in (tokenize.NL, tokenize.NEWLINE, tokenize.COMMENT):
+                    depths.setdefault(token.start[0], depth)
+                    continuation.update(range(token.start[0] + 1, token.end[0] + 1))
+
+            lines = [
+                line.rstrip() if row in continuation or row not in depths
+                else " " * depths[row] + line.strip()
+                for row, line in enumerate(lines, start=1)
+            ]
+        else:
+            lines = [line.rstrip() for line in lines]
+
+        if keep_lines:
+            return "\n".join(line if line.strip() else "" for line in lines)
+
+        return "\n".join(line for line in lines if line.strip())
+
+    @staticmethod
+    def compact(code: str, level: int, keep_lines: bool = False, max_literal_length: int = 80) -> str:
+        """
+        Apply every compaction step up to `level`.
+
+        Args:
+            code (str): The code to compact.
+            level (int): The compaction level (see the class documentation).
+            keep_lines (bool): Preserve the number of lines, for prompts that cite line numbers.
+            max_literal_length (int): Literal length above which level 3 elides the literal.
+
+        Returns:
+            str: The compacted code. Steps that cannot tokenize the input leave it unchanged.
+        """
+        if level >= PromptCompactor.STRIP:
+            code = PromptCompactor.strip(code)
+
+        if level >= PromptCompactor.LITERALS:
+            code = PromptCompactor.elide_literals(code, max_literal_length)
+
+        if level >= PromptCompactor.WHITESPACE:
+            code = PromptCompactor.collapse_whitespace(code, keep_lines)
+
+        return code
@@ -0,0 +1,167 @@
+import ast
+import re
+import random
+import struct
+import hashlib
+import builtins
+from typing import List, Sequence
+#
+from .normalizer import CodeNormalizer
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_COMMENT_RE = re.compile(r"#[^\n]*")
+_BUILTINS = frozenset(dir(builtins)) | {"self", "cls"}
+_MERSENNE_PRIME = (1 << 61) - 1
+_NUM_PERM = 64
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(_NUM_PERM)
+]
+
+
+class _Canonicalizer(ast.NodeTransformer):
+    """
+    Rewrites a syntax tree so that docstrings, literal values and identifier names no longer matter.
+    """
+
+    def __init__(self):
+        self.names = {}
+
+    def rename(self, name: str) -> str:
+        if name in _BUILTINS:
+            return name
+
+        return self.names.setdefault(name, f"v{len(self.names)}")
+
+    def strip_docstring(self, node: ast.AST) -> ast.AST:
+        body = getattr(node, "body", None)
+
+        if body and isinstance(body[0], ast.Expr) and isinstance(getattr(body[0], "value", None), ast.Constant) \
+                and isinstance(body[0].value.value, str):
+            node.body = body[1:] or [ast.Pass()]
+
+        return node
+
+    def visit_Module(self, node: ast.Module) -> ast.AST:
+        return self.generic_visit(self.strip_docstring(node))
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> ast.AST:
+        node.name = self.rename(node.name)
+        return self.generic_visit(self.strip_docstring(node))
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> ast.AST:
+        node.name = self.rename(node.name)
+        return self.generic_visit(self.strip_docstring(node))
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        node.id = self.rename(node.id)
+        return node
+
+    def visit_arg(self, node: ast.arg) -> ast.AST:
+        node.arg = self.rename(node.arg)
+        return self.generic_visit(node)
+
+    def visit_Constant(self, node: ast.Constant) -> ast.AST:
+        if isinstance(node.value, (bool, type(None), type(Ellipsis))):
+            return node
+
+        return ast.copy_location(ast.Constant(value=type(node.value)()), node)
+
+
+class CodeFingerprint:
+    """
+    MinHash signatures over the canonical token stream of a code snippet, with LSH banding for candidate lookup.
+    """
+
+    NUM_PERM = _NUM_PERM
+    BANDS = 16
+    SHINGLE_SIZE = 5
+
+    @staticmethod
+    def tokens(code: str) -> List[str]:
+        """
+        Tokenize a snippet after alpha-renaming identifiers and stripping literals, comments and docstrings.
+
+        Args:
+            code (str): The raw code snippet.
+
+        Returns:
+            List[str]: The canonical tokens. Snippets that are not valid Python fall back to a plain
+            lexical tokenization without comments.
+        """
+        code = CodeNormalizer.normalize(code)
+
+        try:
+            tree = _Canonicalizer().visit(ast.parse(code))
+            code = ast.unparse(tree)
+        except (SyntaxError, ValueError, RecursionError):
+            code = _COMMENT_RE.sub("", code)
+
+        return _TOKEN_RE.findall(code)
+
+    @classmethod
+    def signature(cls, code: str) -> List[int]:
+        """
+        Compute the MinHash signature of a snippet's token shingles.
+
+        Args:
+            code (str): The raw code snippet.
+
+        Returns:
+            List[int]: `NUM_PERM` minimum hash values.
+        """
+        tokens = cls.tokens(code)
+        size = min(cls.SHINGLE_SIZE, len(tokens)) or 1
+        shingles = {
+            int.from_bytes(hashlib.blake2b(" ".join(tokens[i:i + size]).encode("utf-8"), digest_size=8).digest(), "big")
+            for i in range(max(len(tokens) - size + 1, 1))
+        }
+
+        return [
+            min((a * value + b) % _MERSENNE_PRIME for value in shingles)
+            for a, b in _PERMUTATIONS
+        ]
+
+    @classmethod
+    def band_keys(cls, signature: Sequence[int], *context: str) -> List[str]:
+        """
+        Split a signature into LSH bands; snippets sharing any band key are near-duplicate candidates.
+
+        Args:
+            signature (Sequence[int]): A MinHash signature.
+            *context (str): Values that must match for two analyses to be interchangeable.
+
+        Returns:
+            List[str]: One key per band.
+        """
+        rows = len(signature) // cls.BANDS
+        prefix = "\0".join(str(value) for value in context).encode("utf-8")
+
+        return [
+            hashlib.blake2b(
+                prefix + struct.pack(f">B{rows}Q", band, *signature[band * rows:(band + 1) * rows]),
+                digest_size=16,
+            ).hexdigest()
+            for band in range(cls.BANDS)
+        ]
+
+    @staticmethod
+    def similarity(left: Sequence[int], right: Sequence[int]) -> float:
+        """
+        Estimate the Jaccard similarity of two snippets from their signatures.
+        """
+        if not left or len(left) != len(right):
+            return 0.0
+
+        return sum(a == b for a, b in zip(left, right)) / len(left)
+
+    @classmethod
+    def pack(cls, signature: Sequence[int]) -> bytes:
+        return struct.pack(f">{len(signature)}Q", *signature)
+
+    @classmethod
+    def unpack(cls, data: bytes) -> List[int]:
+        return list(struct.unpack(f">{len(data) // 8}Q", data))
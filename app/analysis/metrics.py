@@ -0,0 +1,273 @@
+import ast
+import builtins
+from pydantic import BaseModel
+from typing import Iterable, List, Optional, Set
+#
+from .normalizer import CodeNormalizer
+
+_DECISION_NODES = (ast.If, ast.IfExp, ast.For, ast.AsyncFor, ast.While, ast.ExceptHandler, ast.Assert, ast.match_case)
+_BUILTINS = frozenset(dir(builtins))
+_SCOPE_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)
+
+
+class FunctionMetrics(BaseModel):
+    name: str
+    line: int
+    lines: int
+    parameters: int
+    complexity: int
+    fan_out: int
+
+
+class ClassMetrics(BaseModel):
+    name: str
+    line: int
+    lines: int
+    methods: int
+    complexity: int
+    fan_out: int
+
+
+class StaticFinding(BaseModel):
+    kind: str
+    name: str
+    line: int
+    detail: str
+
+    def __str__(self) -> str:
+        return f"{self.kind}: {self.name} (line {self.line}) {self.detail}"
+
+
+class StaticReport(BaseModel):
+    parsed: bool
+    error: Optional[str] = None
+    error_line: Optional[int] = None
+    lines: int = 0
+    classes: List[ClassMetrics] = []
+    functions: List[FunctionMetrics] = []
+    findings: List[StaticFinding] = []
+
+    @property
+    def max_complexity(self) -> int:
+        return max((function.complexity for function in self.functions), default=1)
+
+
+class StaticAnalyzer:
+    """
+    Fast, local metrics of a Python snippet, focused on the SOLID concerns the agent reviews.
+    """
+
+    GOD_CLASS_METHODS = 20
+    GOD_CLASS_LINES = 500
+    GOD_CLASS_FAN_OUT = 30
+    LONG_PARAMETER_LIST = 5
+    HIGH_COMPLEXITY = 10
+
+    @staticmethod
+    def _walk_scope(node: ast.AST) -> Iterable[ast.AST]:
+        """
+        Walk a function body without descending into nested functions, classes or lambdas.
+        """
+        stack = list(ast.iter_child_nodes(node))
+
+        while stack:
+            child = stack.pop()
+            yield child
+
+            if not isinstance(child, _SCOPE_NODES):
+                stack.extend(ast.iter_child_nodes(child))
+
+    @staticmethod
+    def _calls(nodes: Iterable[ast.AST]) -> Set[str]:
+        """
+        Distinct collaborators called: modules, globals, `self.<attribute>` members and non-builtin functions.
+        Calls to the object's own methods, to builtins and on local variables are not dependencies.
+        """
+        nodes = list(nodes)
+        names = set()
+        local_names = {
+            node.id if isinstance(node, ast.Name) else node.arg
+            for node in nodes
+            if (isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store)) or isinstance(node, ast.arg)
+        }
+
+        for node in nodes:
+            if not isinstance(node, ast.Call):
+                continue
+
+            chain = []
+            target = node.func
+
+            while isinstance(target, ast.Attribute):
+                chain.append(target.attr)
+                target = target.value
+
+            if not isinstance(target, ast.Name):
+                continue
+
+            if target.id in ("self", "cls"):
+                if len(chain) > 1:
+                    names.add(f"{target.id}.{chain[-1]}")
+            elif target.id not in local_names and (chain or target.id not in _BUILTINS):
+                names.add(target.id)
+
+        return names
+
+    @staticmethod
+    def _function(node: ast.AST, name: str) -> FunctionMetrics:
+        nodes = list(StaticAnalyzer._walk_scope(node))
+        complexity = 1
+
+        for child in nodes:
+            if isinstance(child, _DECISION_NODES):
+                complexity += 1
+            elif isinstance(child, ast.BoolOp):
+                complexity += len(child.values) - 1
+            elif isinstance(child, ast.comprehension):
+                complexity += 1 + len(child.ifs)
+
+        arguments = node.args
+        parameters = [
+            arg.arg
+            for arg in arguments.posonlyargs + arguments.args + arguments.kwonlyargs
+            if arg.arg not in ("self", "cls")
+        ] + [arg.arg for arg in (arguments.vararg, arguments.kwarg) if arg is not None]
+
+        return FunctionMetrics(
+            name=name,
+            line=node.lineno,
+            lines=(node.end_lineno or node.lineno) - node.lineno + 1,
+            parameters=len(parameters),
+            complexity=complexity,
+            fan_out=len(StaticAnalyzer._calls(nodes)),
+        )
+
+    @staticmethod
+    def analyze(code: str) -> StaticReport:
+        """
+        Parse a snippet and compute class and function metrics plus heuristic findings.
+
+        Args:
+            code (str): The raw code snippet.
+
+        Returns:
+            StaticReport: The metrics, or `parsed=False` with the syntax error when the snippet does not parse.
+        """
+        code = CodeNormalizer.normalize(code)
+        lines = sum(1 for line in code.split("\n") if line.strip())
+
+        try:
+            tree = ast.parse(code)
+        except (SyntaxError, ValueError) as e:
+            return StaticReport(
+                parsed=False,
+                error=getattr(e, "msg", str(e)),
+                error_line=getattr(e, "lineno", None),
+                lines=lines,
+            )
+
+        report = StaticReport(parsed=True, lines=lines)
+
+        def visit(body: List[ast.stmt], prefix: str = ""):
+            for node in body:
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    report.functions.append(StaticAnalyzer._function(node, f"{prefix}{node.name}"))
+                    visit(node.body, f"{prefix}{node.name}.")
+                elif isinstance(node, ast.ClassDef):
+                    start = len(report.functions)
+                    visit(node.body, f"{prefix}{node.name}.")
+                    methods = [
+                        function for function in report.functions[start:]
+                        if function.name.count(".") == f"{prefix}{node.name}.".count(".")
+                    ]
+                    report.classes.append(ClassMetrics(
+                        name=f"{prefix}{node.name}",
+                        line=node.lineno,
+                        lines=(node.end_lineno or node.lineno) - node.lineno + 1,
+                        methods=len(methods),
+                        complexity=sum(method.complexity for method in methods),
+                        fan_out=len(StaticAnalyzer._calls(ast.walk(node))),
+                    ))
+                else:
+                    visit([child for child in ast.iter_child_nodes(node) if isinstance(child, ast.stmt)], prefix)
+
+        visit(tree.body)
+
+        for klass in report.classes:
+            if klass.methods > StaticAnalyzer.GOD_CLASS_METHODS or klass.lines > StaticAnalyzer.GOD_CLASS_LINES \
+                    or klass.fan_out > StaticAnalyzer.GOD_CLASS_FAN_OUT:
+                report.findings.append(StaticFinding(
+                    kind="god-class",
+                    name=klass.name,
+                    line=klass.line,
+                    detail=f"has {klass.methods} methods, {klass.lines} lines and depends on {klass.fan_out} collaborators",
+                ))
+
+        for function in report.functions:
+            if function.parameters > StaticAnalyzer.LONG_PARAMETER_LIST:
+                report.findings.append(StaticFinding(
+                    kind="long-parameter-list",
+                    name=function.name,
+                    line=function.line,
+                    detail=f"takes {function.parameters} parameters",
+                ))
+
+            if function.complexity > StaticAnalyzer.HIGH_COMPLEXITY:
+                report.findings.append(StaticFinding(
+                    kind="high-complexity",
+                    name=function.name,
+                    line=function.line,
+                    detail=f"has cyclomatic complexity {function.complexity}",
+                ))
+
+        return report
+
+    @staticmethod
+    def is_trivial(report: StaticReport, max_lines: int) -> bool:
+        """
+        A snippet is trivial when it is short, has no classes, simple control flow and no findings.
+        """
+        return report.parsed and report.lines <= max_lines and not report.classes \
+            and not report.findings and report.max_complexity <= 2
+
+    @staticmethod
+    def summary(report: StaticReport, names: Optional[List[str]] = None) -> str:
+        """
+        Render the metrics as compact prompt context, optionally restricted to some top-level names.
+        """
+        roots = None if names is None else {name.split(".")[0] for name in names}
+
+        def selected(name: str) -> bool:
+            return roots is None or name.split(".")[0] in roots
+
+        lines = [f"non-blank lines: {report.lines}"]
+        lines += [
+            f"class {klass.name} (line {klass.line}): {klass.lines} lines, {klass.methods} methods, "
+            f"complexity {klass.complexity}, fan-out {klass.fan_out}"
+            for klass in report.classes if selected(klass.name)
+        ]
+        lines += [
+            f"def {function.name} (line {function.line}): {function.lines} lines, {function.parameters} params, "
+            f"complexity {function.complexity}, fan-out {function.fan_out}"
+            for function in report.functions if selected(function.name)
+        ]
+        lines += [f"warning: {finding}" for finding in report.findings if selected(finding.name)]
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def local_report(report: StaticReport) -> str:
+        """
+        A short report answered without calling the LLM, for snippets that do not parse or are trivial.
+        """
+        if not report.parsed:
+            location = f" (linha {report.error_line})" if report.error_line else ""
+            return (
+                f"O código não pôde ser interpretado: {report.error}{location}. "
+                "Corrija o erro de sintaxe e envie o trecho novamente para uma análise completa."
+            )
+
+        return (
+            f"Trecho trivial ({report.lines} linha(s), complexidade ciclomática máxima {report.max_complexity}): "
+            "não há estrutura suficiente para sugerir melhorias de arquitetura, princípios SOLID ou padrões de projeto."
+        )
@@ -0,0 +1,44 @@
+import hashlib
+import textwrap
+#
+
+class CodeNormalizer:
+    """
+    Canonicalizes code snippets so that cosmetic differences do not change their identity.
+    """
+
+    @staticmethod
+    def normalize(code: str) -> str:
+        """
+        Normalize line endings, trailing whitespace, common indentation and surrounding blank lines.
+
+        Args:
+            code (str): The raw code snippet.
+
+        Returns:
+            str: The normalized code snippet.
+        """
+        code = code.replace("\r\n", "\n").replace("\r", "\n")
+        lines = [line.rstrip() for line in code.split("\n")]
+
+        return textwrap.dedent("\n".join(lines)).strip("\n")
+
+    @staticmethod
+    def digest(code: str, *context: str) -> str:
+        """
+        Compute a content address for a code snippet and the context it was analyzed with.
+
+        Args:
+            code (str): The raw code snippet; it is normalized before hashing.
+            *context (str): Extra values that change the analysis result (model, language, prompt version).
+
+        Returns:
+            str: The hexadecimal SHA-256 digest.
+        """
+        hasher = hashlib.sha256(CodeNormalizer.normalize(code).encode("utf-8"))
+
+        for value in context:
+            hasher.update(b"\0")
+            hasher.update(str(value).encode("utf-8"))
+
+        return hasher.hexdigest()
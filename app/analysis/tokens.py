@@ -0,0 +1,58 @@
+import math
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+#
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+class TokenEstimator:
+    """
+    Counts prompt and completion tokens, using the model's tokenizer when `tiktoken` is installed.
+    """
+
+    CHARS_PER_TOKEN = 4
+    MESSAGE_OVERHEAD = 4
+
+    @staticmethod
+    @lru_cache(maxsize=16)
+    def _encoding(model: Optional[str]) -> Any:
+        if tiktoken is None:
+            return None
+
+        try:
+            return tiktoken.encoding_for_model((model or "").split("/")[-1])
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+
+    @staticmethod
+    def count(text: str, model: Optional[str] = None) -> int:
+        """
+        Count the tokens of a text.
+
+        Args:
+            text (str): The text to measure.
+            model (Optional[str]): The model whose tokenizer should be used.
+
+        Returns:
+            int: The token count, or an estimate of `CHARS_PER_TOKEN` characters per token without `tiktoken`.
+        """
+        encoding = TokenEstimator._encoding(model)
+
+        if encoding is None:
+            return math.ceil(len(text) / TokenEstimator.CHARS_PER_TOKEN)
+
+        return len(encoding.encode(text, disallowed_special=()))
+
+    @staticmethod
+    def count_messages(messages: List[Dict[str, str]], model: Optional[str] = None) -> int:
+        """
+        Count the tokens of a chat prompt, including the per-message framing overhead.
+        """
+        return sum(
+            TokenEstimator.count(message.get("content") or "", model) + TokenEstimator.MESSAGE_OVERHEAD
+            for message in messages
+        )
@@ -1,4 +1,8 @@
 from sqlalchemy.ext.declarative import declarative_base
 BaseEntity = declarative_base()
+from .analysis_blob import AnalysisBlob
 from .analysis_history import AnalysisHistory
+from .analysis_fingerprint import AnalysisFingerprint, AnalysisFingerprintBand
+from .analysis_job import AnalysisJob
+from .analysis_region import AnalysisRegion
 from .llm_provider import LLM
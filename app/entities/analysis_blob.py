@@ -0,0 +1,39 @@
+from sqlalchemy import Column, String, Integer, LargeBinary, func, TIMESTAMP
+from utils import BlobCodec
+
+from . import BaseEntity
+
+
+class AnalysisBlob(BaseEntity):
+    __tablename__ = 'analysis_blob'
+
+    hash = Column(String(64), primary_key=True, nullable=False)
+    codec = Column(String(16), nullable=False)
+    size = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+
+    @classmethod
+    def of(cls, text: str) -> "AnalysisBlob":
+        """
+        Builds the compressed, content-addressed blob of a text body.
+        """
+        raw = text.encode("utf-8")
+        codec, data = BlobCodec.compress(raw)
+
+        return cls(hash=BlobCodec.digest(raw), codec=codec, size=len(raw), data=data)
+
+    def text(self) -> str:
+        return BlobCodec.decompress(self.codec, self.data).decode("utf-8")
+
+    def as_row(self):
+        return {"hash": self.hash, "codec": self.codec, "size": self.size, "data": self.data}
+
+    def as_dict(self):
+        return {
+            "hash": self.hash,
+            "codec": self.codec,
+            "size": self.size,
+            "stored_size": len(self.data),
+            "created_at": self.created_at,
+        }
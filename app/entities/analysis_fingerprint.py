@@ -0,0 +1,36 @@
+from sqlalchemy import Column, String, LargeBinary, ForeignKey, func, TIMESTAMP
+from sqlalchemy_utils import UUIDType
+
+from . import BaseEntity
+
+
+class AnalysisFingerprint(BaseEntity):
+    __tablename__ = 'analysis_fingerprint'
+
+    # Not a foreign key: `analysis_history` is partitioned, and retention removes these rows itself.
+    analysis_id = Column(
+        UUIDType(binary=False),
+        primary_key=True,
+        nullable=False
+    )
+    signature = Column(LargeBinary, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+
+
+    def as_dict(self):
+        return {
+            "analysis_id": str(self.analysis_id),
+            "created_at": self.created_at,
+        }
+
+
+class AnalysisFingerprintBand(BaseEntity):
+    __tablename__ = 'analysis_fingerprint_band'
+
+    band_key = Column(String(32), primary_key=True, nullable=False)
+    analysis_id = Column(
+        UUIDType(binary=False),
+        ForeignKey('analysis_fingerprint.analysis_id', ondelete='CASCADE'),
+        primary_key=True,
+        nullable=False
+    )
@@ -1,23 +1,112 @@
 import uuid
-from sqlalchemy import Column, String, func, TIMESTAMP
+from typing import Dict, List, Optional
+from sqlalchemy import Column, String, Integer, ForeignKey, func, TIMESTAMP, literal
+from sqlalchemy.dialects.postgresql import REGCONFIG, TSVECTOR
+from sqlalchemy.orm import deferred, relationship
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy_utils import UUIDType
+from utils import Environment
 
 from . import BaseEntity
+from .analysis_blob import AnalysisBlob
+
+
+SEARCH_CONFIG: str = Environment.get("SEARCH_TEXT_CONFIG", "simple")
+SEARCH_MAX_CHARS: int = int(Environment.get("SEARCH_MAX_CHARS", 100000))
+
+
+class SearchVector(TypeDecorator):
+    """
+    A `tsvector` written from plain text: the bound value goes through `to_tsvector` in the INSERT itself,
+    so rows are still sent in batches.
+    """
+
+    impl = TSVECTOR
+    cache_ok = True
+
+    def bind_expression(self, bindvalue):
+        return func.to_tsvector(literal(SEARCH_CONFIG, REGCONFIG), bindvalue)
 
 
 class AnalysisHistory(BaseEntity):
     __tablename__ = 'analysis_history'
+    # Monthly range partitions on `created_at`; the database key is (id, created_at).
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
+
+    # The text bodies kept in `analysis_blob`, and the column referencing each one.
+    BODIES: Dict[str, str] = {"code_snippet": "code_blob_hash", "suggestions": "suggestions_blob_hash"}
 
-    id = Column(UUIDType(binary=False), primary_key=True, default=uuid.uuid4, unique=True, nullable=False)
-    code_snippet = Column(String, nullable=False)
-    suggestions = Column(String, nullable=False)
+    id = Column(UUIDType(binary=False), primary_key=True, default=uuid.uuid4, nullable=False)
+    code_blob_hash = Column(String(64), ForeignKey('analysis_blob.hash'), nullable=False, index=True)
+    suggestions_blob_hash = Column(String(64), ForeignKey('analysis_blob.hash'), nullable=False, index=True)
+    code_hash = Column(String(64), nullable=True, index=True)
+    input_tokens = Column(Integer, nullable=True)
+    output_tokens = Column(Integer, nullable=True)
+    model = Column(String(255), nullable=True)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    # The bodies are compressed, so the search document is built from their text when they are set.
+    search_vector = deferred(Column(SearchVector, nullable=True))
+
+    # Blobs are shared between analyses and written by the repository with ON CONFLICT DO NOTHING,
+    # so the relationships only read them; joined loading keeps them usable from async sessions.
+    code_blob = relationship(AnalysisBlob, foreign_keys=[code_blob_hash], lazy="joined", viewonly=True)
+    suggestions_blob = relationship(AnalysisBlob, foreign_keys=[suggestions_blob_hash], lazy="joined", viewonly=True)
+
+    @property
+    def code_snippet(self) -> Optional[str]:
+        return self._body("code")
+
+    @code_snippet.setter
+    def code_snippet(self, value: str):
+        self._set_body("code", value)
+
+    @property
+    def suggestions(self) -> Optional[str]:
+        return self._body("suggestions")
+
+    @suggestions.setter
+    def suggestions(self, value: str):
+        self._set_body("suggestions", value)
+
+    def blobs(self) -> List[AnalysisBlob]:
+        """
+        The blobs of the bodies set on this instance, which must be stored before the row itself.
+        """
+        return [blob for blob in (self.__dict__.get("_code_pending"), self.__dict__.get("_suggestions_pending")) if blob]
+
+    def _body(self, name: str) -> Optional[str]:
+        # Bodies set on this instance are kept as text, so they are not decompressed back.
+        text = self.__dict__.get(f"_{name}_text")
+
+        if text is not None:
+            return text
+
+        blob = getattr(self, f"{name}_blob")
+
+        return blob.text() if blob is not None else None
+
+    def _set_body(self, name: str, value: str):
+        blob = AnalysisBlob.of(value)
+        self.__dict__[f"_{name}_text"] = value
+        self.__dict__[f"_{name}_pending"] = blob
+        setattr(self, f"{name}_blob_hash", blob.hash)
+        self.search_vector = self.search_document(self.__dict__.get("_suggestions_text"), self.__dict__.get("_code_text"))
 
+    @staticmethod
+    def search_document(suggestions: Optional[str], code: Optional[str]) -> str:
+        """
+        The text indexed for full-text search, capped so its `tsvector` stays within the Postgres limits.
+        """
+        return "\n".join(text for text in (suggestions, code) if text)[:SEARCH_MAX_CHARS]
 
     def as_dict(self):
         return {
             "id": str(self.id),
             "code_snippet": self.code_snippet,
             "suggestions": self.suggestions ,
+            "code_hash": self.code_hash,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "model": self.model,
             "created_at": self.created_at,
         }
@@ -0,0 +1,44 @@
+import uuid
+from sqlalchemy import Column, String, Integer, Boolean, func, TIMESTAMP
+from sqlalchemy_utils import UUIDType
+
+from . import BaseEntity
+
+
+class AnalysisJob(BaseEntity):
+    __tablename__ = 'analysis_job'
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    id = Column(UUIDType(binary=False), primary_key=True, default=uuid.uuid4, unique=True, nullable=False)
+    code_snippet = Column(String, nullable=False)
+    bypass_cache = Column(Boolean, nullable=False, default=False)
+    status = Column(String(16), nullable=False, default=PENDING, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    # Not a foreign key: `analysis_history` is partitioned, and retention clears it for archived analyses.
+    analysis_id = Column(UUIDType(binary=False), nullable=True)
+    # Trivial and unparsable snippets get a local report that is not stored in `analysis_history`.
+    local_result = Column(String, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    # Set when a transient failure sends the job back to the queue: it is not claimed before then.
+    run_after = Column(TIMESTAMP(timezone=True), nullable=True)
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+    def as_dict(self):
+        return {
+            "id": str(self.id),
+            "status": self.status,
+            "attempts": self.attempts,
+            "analysis_id": str(self.analysis_id) if self.analysis_id else None,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "run_after": self.run_after,
+            "updated_at": self.updated_at,
+        }
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, String, Integer, func, TIMESTAMP
+from sqlalchemy_utils import UUIDType
+
+from . import BaseEntity
+
+
+class AnalysisRegion(BaseEntity):
+    __tablename__ = 'analysis_region'
+
+    # Not a foreign key: `analysis_history` is partitioned, and retention removes these rows itself.
+    analysis_id = Column(
+        UUIDType(binary=False),
+        primary_key=True,
+        nullable=False
+    )
+    start_line = Column(Integer, primary_key=True, nullable=False)
+    end_line = Column(Integer, nullable=False)
+    name = Column(String(255), nullable=False)
+    region_hash = Column(String(64), nullable=False)
+    findings = Column(String, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+
+
+    def as_dict(self):
+        return {
+            "analysis_id": str(self.analysis_id),
+            "name": self.name,
+            "start_line": self.start_line,
+            "end_line": self.end_line,
+            "region_hash": self.region_hash,
+            "findings": self.findings,
+            "created_at": self.created_at,
+        }
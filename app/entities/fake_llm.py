@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List
+
+import litellm
+from litellm import CustomLLM, ModelResponse
+from utils import Environment
+
+
+class FakeLLM(CustomLLM):
+    """
+    A local stand-in for the model provider, registered in litellm as the `fake/` provider.
+
+    Select it with `LLM_MODEL="fake/<any-name>"`. Answers are derived from a hash of the prompt, so the
+    same prompt always gets the same text, and latency, token rate and failures are drawn from a
+    seeded generator, so load tests are repeatable without paying for or waiting on a real model.
+    """
+
+    PROVIDER = "fake"
+    WORDS = (
+        "Considere extrair esta lógica para uma função dedicada, reduzindo o acoplamento entre as "
+        "camadas e facilitando os testes. Prefira nomes descritivos, trate os erros explicitamente e "
+        "evite estado global compartilhado entre requisições."
+    ).split()
+
+    def __init__(self):
+        super().__init__()
+        self.latency = Environment.get("FAKE_LLM_LATENCY", "lognormal:0.5,0.3")
+        self.tokens_per_second = float(Environment.get("FAKE_LLM_TOKENS_PER_SECOND", 0))
+        self.output_tokens = int(Environment.get("FAKE_LLM_OUTPUT_TOKENS", 120))
+        self.failure_rate = float(Environment.get("FAKE_LLM_FAILURE_RATE", 0))
+        self.failure = Environment.get("FAKE_LLM_FAILURE", "rate_limit")
+        self._random = random.Random(int(Environment.get("FAKE_LLM_SEED", 42)))
+        self._lock = threading.Lock()
+
+    @classmethod
+    def register(cls):
+        """
+        Adds the provider to litellm once per process.
+        """
+        if any(item["provider"] == cls.PROVIDER for item in litellm.custom_provider_map):
+            return
+
+        litellm.custom_provider_map.append({"provider": cls.PROVIDER, "custom_handler": cls()})
+
+    @classmethod
+    def handles(cls, model: str) -> bool:
+        return model.startswith(f"{cls.PROVIDER}/")
+
+    def sample_latency(self) -> float:
+        """
+        Time to first token, in seconds, drawn from `FAKE_LLM_LATENCY`.
+
+        The setting is `<distribution>:<params>`: `fixed:0.5`, `uniform:0.2,1.0`, `normal:0.5,0.1`
+        (mean, standard deviation) or `lognormal:0.5,0.3` (median, sigma).
+        """
+        distribution, _, params = self.latency.partition(":")
+        values = [float(value) for value in params.split(",") if value]
+
+        with self._lock:
+            if distribution == "uniform":
+                latency = self._random.uniform(values[0], values[1])
+            elif distribution == "normal":
+                latency = self._random.gauss(values[0], values[1])
+            elif distribution == "lognormal":
+                latency = values[0] * self._random.lognormvariate(0, values[1])
+            else:
+                latency = values[0] if values else 0.0
+
+        return max(latency, 0.0)
+
+    def maybe_fail(self, model: str):
+        """
+        Raises the configured provider error with probability `FAKE_LLM_FAILURE_RATE`.
+        """
+        with self._lock:
+            failed = self._random.random() < self.failure_rate
+
+        if not failed:
+            return
+
+        message = "Falha simulada pelo provedor fake."
+
+        if self.failure == "timeout":
+            raise litellm.Timeout(message=message, model=model, llm_provider=self.PROVIDER)
+
+        if self.failure == "unavailable":
+            raise litellm.ServiceUnavailableError(message=message, model=model, llm_provider=self.PROVIDER)
+
+        raise litellm.RateLimitError(message=message, model=model, llm_provider=self.PROVIDER)
+
+    def answer(self, messages: List[Dict[str, Any]]) -> List[str]:
+        """
+        The answer tokens for a prompt; identical prompts always produce the same answer.
+        """
+        prompt = "\n".join(str(message.get("content", "")) for message in messages)
+        seed = int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:8], "big")
+        offset = seed % len(self.WORDS)
+        tokens = [self.WORDS[(offset + index) % len(self.WORDS)] + " " for index in range(self.output_tokens)]
+
+        # crewai agents only accept an answer in their ReAct format.
+        if "Final Answer:" in prompt:
+            tokens.insert(0, "Thought: I now can give a great answer\nFinal Answer: ")
+
+        return tokens
+
+    def response(self, model: str, messages: List[Dict[str, Any]], tokens: List[str]) -> ModelResponse:
+        prompt_tokens = sum(len(str(message.get("content", ""))) for message in messages) // 4
+
+        return ModelResponse(
+            model=model,
+            choices=[{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "".join(tokens)}}],
+            usage={
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(tokens),
+                "total_tokens": prompt_tokens + len(tokens),
+            },
+        )
+
+    def chunk(self, text: str, finished: bool = False) -> Dict[str, Any]:
+        return {
+            "text": text,
+            "is_finished": finished,
+            "finish_reason": "stop" if finished else None,
+            "index": 0,
+            "tool_use": None,
+            "usage": None,
+        }
+
+    def generation_time(self, tokens: List[str]) -> float:
+        return len(tokens) / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def completion(self, model: str, messages: List[Dict[str, Any]], *args, **kwargs) -> ModelResponse:
+        time.sleep(self.sample_latency())
+        self.maybe_fail(model)
+        tokens = self.answer(messages)
+        time.sleep(self.generation_time(tokens))
+
+        return self.response(model, messages, tokens)
+
+    def streaming(self, model: str, messages: List[Dict[str, Any]], *args, **kwargs) -> Iterator[Dict[str, Any]]:
+        time.sleep(self.sample_latency())
+        self.maybe_fail(model)
+        delay = 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+        for token in self.answer(messages):
+            time.sleep(delay)
+            yield self.chunk(token)
+
+        yield self.chunk("", finished=True)
+
+    async def acompletion(self, model: str, messages: List[Dict[str, Any]], *args, **kwargs) -> ModelResponse:
+        await asyncio.sleep(self.sample_latency())
+        self.maybe_fail(model)
+        tokens = self.answer(messages)
+        await asyncio.sleep(self.generation_time(tokens))
+
+        return self.response(model, messages, tokens)
+
+    async def astreaming(self, model: str, messages: List[Dict[str, Any]], *args, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        await asyncio.sleep(self.sample_latency())
+        self.maybe_fail(model)
+        delay = 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+        for token in self.answer(messages):
+            await asyncio.sleep(delay)
+            yield self.chunk(token)
+
+        yield self.chunk("", finished=True)
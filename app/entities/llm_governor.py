@@ -0,0 +1,226 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import litellm
+from utils import Environment, Telemetry
+
+
+class LLMUnavailableError(Exception):
+    """
+    The provider cannot take the call right now; callers should answer 503 with `Retry-After`.
+    """
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMGovernor:
+    """
+    Governs every call to one model: an AIMD concurrency limit, jittered exponential-backoff retries
+    that honour `Retry-After`, and a circuit breaker that fails fast while the provider is down.
+
+    The limit grows by one slot per window of successful calls under `LLM_LATENCY_TARGET` and is
+    halved on a 429 or a slow call, at most once per `LLM_DECREASE_COOLDOWN` seconds.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+    RETRYABLE = (
+        litellm.RateLimitError,
+        litellm.ServiceUnavailableError,
+        litellm.InternalServerError,
+        litellm.APIConnectionError,
+        litellm.Timeout,
+    )
+
+    _governors: Dict[str, "LLMGovernor"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, model: str):
+        self.model = model
+        self.min_limit = float(Environment.get("LLM_MIN_CONCURRENCY", 1))
+        self.max_limit = float(Environment.get("LLM_MAX_CONCURRENCY", 32))
+        self.limit = float(Environment.get("LLM_INITIAL_CONCURRENCY", 8))
+        self.latency_target = float(Environment.get("LLM_LATENCY_TARGET", 30))
+        self.decrease_cooldown = float(Environment.get("LLM_DECREASE_COOLDOWN", 5))
+        self.queue_timeout = float(Environment.get("LLM_QUEUE_TIMEOUT", 30))
+        self.max_attempts = int(Environment.get("LLM_RETRY_ATTEMPTS", 3))
+        self.backoff_base = float(Environment.get("LLM_RETRY_BACKOFF", 1))
+        self.backoff_max = float(Environment.get("LLM_RETRY_BACKOFF_MAX", 30))
+        self.failure_threshold = int(Environment.get("LLM_CIRCUIT_FAILURES", 5))
+        self.reset_timeout = float(Environment.get("LLM_CIRCUIT_RESET", 30))
+        self.in_flight = 0
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._last_decrease = 0.0
+        self._probing = False
+        self._condition = threading.Condition()
+        self._publish()
+
+    @classmethod
+    def for_model(cls, model: str) -> "LLMGovernor":
+        """
+        Returns the process-wide governor of a model, so every client of the same model shares its limits.
+        """
+        with cls._registry_lock:
+            if model not in cls._governors:
+                cls._governors[model] = cls(model)
+
+            return cls._governors[model]
+
+    @classmethod
+    def all_stats(cls) -> List[Dict[str, Any]]:
+        with cls._registry_lock:
+            governors = list(cls._governors.values())
+
+        return [governor.stats() for governor in governors]
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """
+        Run an LLM call under the concurrency limit, retrying transient provider errors.
+
+        Args:
+            fn (Callable[[], Any]): The call to make, e.g. `crew.kickoff`.
+
+        Returns:
+            Any: What `fn` returned.
+
+        Raises:
+            LLMUnavailableError: If the circuit is open, no slot freed up in time, or retries ran out.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            probe = self._acquire()
+            start = time.monotonic()
+
+            try:
+                result = fn()
+            except self.RETRYABLE as e:
+                rate_limited = isinstance(e, litellm.RateLimitError)
+                self._release(time.monotonic() - start, probe, success=False, rate_limited=rate_limited)
+                delay = self.retry_after(e) or self.backoff(attempt)
+
+                if attempt == self.max_attempts or self.state == self.OPEN:
+                    raise LLMUnavailableError(
+                        "O provedor do modelo está indisponível no momento. Tente novamente mais tarde.",
+                        retry_after=max(delay, self._remaining_open()),
+                    ) from e
+
+                Telemetry.LLM_RETRIES.labels(model=self.model, reason=type(e).__name__).inc()
+                time.sleep(delay)
+                continue
+            except BaseException:
+                # Not a provider health problem (bad request, prompt errors...): release without penalty.
+                self._release(time.monotonic() - start, probe, success=True, observe=False)
+                raise
+
+            self._release(time.monotonic() - start, probe, success=True)
+
+            return result
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Full-jitter exponential backoff.
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    @staticmethod
+    def retry_after(error: BaseException) -> Optional[float]:
+        """
+        The delay, in seconds, requested by the provider through the `Retry-After` header.
+        """
+        headers = getattr(getattr(error, "response", None), "headers", None) or getattr(error, "litellm_response_headers", None)
+
+        try:
+            return float(headers.get("retry-after")) if headers else None
+        except (TypeError, ValueError):
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "model": self.model,
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "state": ("closed", "half_open", "open")[self.state],
+                "failures": self.failures,
+            }
+
+    def _remaining_open(self) -> float:
+        return max(self.reset_timeout - (time.monotonic() - self.opened_at), 0.0) if self.state == self.OPEN else 0.0
+
+    def _acquire(self) -> bool:
+        deadline = time.monotonic() + self.queue_timeout
+
+        with self._condition:
+            if self.state == self.OPEN and self._remaining_open() == 0:
+                self.state = self.HALF_OPEN
+                self._publish()
+
+            if self.state == self.OPEN or (self.state == self.HALF_OPEN and self._probing):
+                Telemetry.LLM_REJECTED.labels(model=self.model, reason="circuit_open").inc()
+                raise LLMUnavailableError(
+                    "O provedor do modelo está indisponível no momento. Tente novamente mais tarde.",
+                    retry_after=max(self._remaining_open(), 1.0),
+                )
+
+            while self.in_flight >= int(self.limit):
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0:
+                    Telemetry.LLM_REJECTED.labels(model=self.model, reason="throttled").inc()
+                    raise LLMUnavailableError(
+                        "Muitas análises em andamento. Tente novamente em instantes.",
+                        retry_after=self.backoff_base,
+                    )
+
+                self._condition.wait(remaining)
+
+            probe = self._probing = self.state == self.HALF_OPEN
+            self.in_flight += 1
+            self._publish()
+
+            return probe
+
+    def _release(self, latency: float, probe: bool, success: bool, rate_limited: bool = False, observe: bool = True):
+        with self._condition:
+            self.in_flight -= 1
+
+            if probe:
+                self._probing = False
+
+            if observe:
+                self._adapt(latency, success, rate_limited)
+                self._trip(success)
+
+            self._publish()
+            self._condition.notify_all()
+
+    def _adapt(self, latency: float, success: bool, rate_limited: bool):
+        now = time.monotonic()
+
+        if rate_limited or (success and latency > self.latency_target):
+            if now - self._last_decrease >= self.decrease_cooldown:
+                self.limit = max(self.min_limit, self.limit / 2)
+                self._last_decrease = now
+        elif success:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def _trip(self, success: bool):
+        if success:
+            self.failures = 0
+            self.state = self.CLOSED
+            return
+
+        self.failures += 1
+
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def _publish(self):
+        Telemetry.LLM_CONCURRENCY_LIMIT.labels(model=self.model).set(self.limit)
+        Telemetry.LLM_IN_FLIGHT.labels(model=self.model).set(self.in_flight)
+        Telemetry.LLM_CIRCUIT_STATE.labels(model=self.model).set(self.state)
@@ -1,16 +1,91 @@
+import httpx
+import litellm
 from crewai import LLM
+from typing import Any, Dict, Iterator, List, Optional
+from entities.fake_llm import FakeLLM
+from entities.llm_governor import LLMGovernor
 from utils import Environment
 
 class LLMProvider:
-    def __init__(self):
-        llm_model = Environment.get("LLM_MODEL", "gpt-4")
-        self.model = LLM(
-            model=llm_model,
+    def __init__(
+        self,
+        stream: bool = False,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ):
+        llm_model = model or Environment.get("LLM_MODEL", "gpt-4")
+        self.model_name = llm_model
+        self.governor = LLMGovernor.for_model(llm_model)
+
+        if FakeLLM.handles(llm_model):
+            FakeLLM.register()
+
+        self.params = dict(
             temperature=0.8,
-            max_tokens=150,
+            max_tokens=max_tokens or int(Environment.get("LLM_MAX_TOKENS", 150)),
             top_p=0.9,
             frequency_penalty=0.1,
             presence_penalty=0.1,
             stop=["END"],
             seed=42
         )
+        self.params.update(params or {})
+        self.model = LLM(
+            model=llm_model,
+            stream=stream,
+            **self.params
+        )
+
+    @staticmethod
+    def keep_alive(pool_size: int, keepalive_expiry: float):
+        """
+        Shares one pooled HTTP client across every LLM call so provider connections stay warm.
+        """
+        litellm.client_session = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=keepalive_expiry,
+            )
+        )
+
+    def ping(self):
+        """
+        Sends a one-token completion, establishing the provider connection before the first request.
+        """
+        litellm.completion(
+            model=self.model_name,
+            messages=[{"role": "user", "content": "ping"}],
+            max_tokens=1,
+        )
+
+    def complete(self, messages: List[Dict[str, str]]) -> str:
+        """
+        Calls the model directly, without the agent loop, and returns the generated text.
+        """
+        response = self.governor.call(lambda: litellm.completion(
+            model=self.model_name,
+            messages=messages,
+            **self.params
+        ))
+
+        return response.choices[0].message.content or ""
+
+    def stream(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """
+        Calls the model with streaming enabled and yields the generated text as it arrives.
+        Only opening the stream is governed; a stream that breaks midway is not retried.
+        """
+        response = self.governor.call(lambda: litellm.completion(
+            model=self.model_name,
+            messages=messages,
+            stream=True,
+            **self.params
+        ))
+
+        for chunk in response:
+            content = chunk.choices[0].delta.content if chunk.choices else None
+
+            if content:
+                yield content
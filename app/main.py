@@ -1,17 +1,48 @@
 import os
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
 from pyctuator.pyctuator import Pyctuator, Endpoints
 from datetime import datetime
-from utils import Policy, Environment
+from utils import Policy, Environment, Telemetry
 from routes import router_code_analizer, router_health
+from entities.llm_provider import LLMProvider
+from repositories.async_base_db import AsyncBaseDBRepository
+from repositories.base_db import BaseDBRepository
+from services import AnalysisHistoryService, AnalysisJobService, CodeAnalyzerService
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    LLMProvider.keep_alive(
+        pool_size=int(Environment.get("LLM_HTTP_POOL_SIZE", 20)),
+        keepalive_expiry=float(Environment.get("LLM_HTTP_KEEPALIVE", 60)),
+    )
+    Telemetry.configure_otlp(Environment.get("OTEL_EXPORTER_OTLP_ENDPOINT"), service_name=app.title)
+    CodeAnalyzerService.agent_pool.warmup(ping=Environment.get("LLM_WARMUP") == "true")
+    AnalysisJobService.pool.start()
+    AnalysisHistoryService.maintenance.start()
+
+    if CodeAnalyzerService.write_behind:
+        CodeAnalyzerService.writer.start(CodeAnalyzerService.flush_pending, CodeAnalyzerService.describe_pending)
+
+    yield
+    AnalysisHistoryService.maintenance.stop()
+    AnalysisJobService.pool.stop()
+    CodeAnalyzerService.writer.stop(timeout=float(Environment.get("ANALYSIS_WRITE_BEHIND_SHUTDOWN_TIMEOUT", 10)))
+    await AsyncBaseDBRepository._engine.dispose()
+    BaseDBRepository.database.dispose()
 
 app = FastAPI(
     title= "Code Analyzer",
     description="Agente para sugestões de otimização de código Python",
     docs_url="/docs",
     redoc_url=None,
+    lifespan=lifespan,
+    # Repositories created while handling a request share its sessions, closed when it ends.
+    dependencies=[Depends(BaseDBRepository.database.request_scope)],
 )
 
 app.include_router(router_code_analizer)
@@ -44,4 +75,24 @@ if APPLICATION_URL:
         ]
     )
 
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    Telemetry.observe_http(
+        request.method,
+        route.path if route else "unmatched",
+        response.status_code,
+        time.perf_counter() - start,
+    )
+
+    return response
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Exporta as métricas no formato Prometheus.
+    """
+    content, media_type = Telemetry.export()
+    return Response(content=content, media_type=media_type)
@@ -1 +1,6 @@
-from .analysis import AnalyzerRepository
+from .analysis import AnalyzerRepository, AsyncAnalyzerRepository
+from .archive import ArchiveRepository
+from .fingerprint import FingerprintRepository
+from .job import JobRepository
+from .partition import PartitionRepository
+from .region import RegionRepository
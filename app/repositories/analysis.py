@@ -1,7 +1,290 @@
-from entities import AnalysisHistory
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import func, literal, text, tuple_
+from sqlalchemy.dialects.postgresql import REGCONFIG, Insert, insert
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Query, aliased
+from entities import AnalysisBlob, AnalysisHistory
+from entities.analysis_history import SEARCH_CONFIG
+from repositories.async_base_db import AsyncBaseDBRepository
 from repositories.base_db import BaseDBRepository
+from utils import BlobCodec
+
+
+def insert_blobs(entries: List[AnalysisHistory]) -> Optional[Insert]:
+    """
+    The statement storing each distinct body of `entries` once, skipping those already stored.
+    Rows are sorted by hash so concurrent writers lock them in the same order.
+    """
+    blobs = {blob.hash: blob for entry in entries for blob in entry.blobs()}
+
+    if not blobs:
+        return None
+
+    return (
+        insert(AnalysisBlob)
+        .values([blobs[blob_hash].as_row() for blob_hash in sorted(blobs)])
+        .on_conflict_do_nothing(index_elements=["hash"])
+    )
 
 
 class AnalyzerRepository(BaseDBRepository):
     def __init__(self):
         super().__init__(AnalysisHistory)
+
+    def create(self, entity_instance: AnalysisHistory):
+        self.create_many([entity_instance])
+
+    def create_many(self, entity_instances: List[AnalysisHistory]):
+        """
+        Stores the analyses and, in the same transaction, the blobs of their bodies.
+        """
+        statement = insert_blobs(entity_instances)
+
+        if statement is not None:
+            self.session.execute(statement)
+
+        super().create_many(entity_instances)
+
+    def find_latest_by_hash(self, code_hash: str) -> Optional[AnalysisHistory]:
+        """
+        Returns the most recent analysis stored for a content hash.
+        """
+        return (
+            self.find_by(code_hash=code_hash)
+            .order_by(self.entity.created_at.desc())
+            .first()
+        )
+
+    def find_suggestions(self, analysis_id: Any) -> Optional[str]:
+        """
+        Returns the suggestions of an analysis, without loading its code, or None if it does not exist.
+        """
+        row = (
+            self.session.query(AnalysisBlob.codec, AnalysisBlob.data)
+            .select_from(self.entity)
+            .join(AnalysisBlob, AnalysisBlob.hash == self.entity.suggestions_blob_hash)
+            .filter(self.entity.id == analysis_id)
+            .one_or_none()
+        )
+
+        return None if row is None else BlobCodec.decompress(row.codec, row.data).decode("utf-8")
+
+    def find_page(
+        self,
+        fields: List[str],
+        limit: int,
+        after: Optional[Tuple[datetime, Any]] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns up to `limit` analyses, newest first, with only the given fields.
+
+        `after` is the (created_at, id) of the last row of the previous page. The row comparison is
+        served by the (created_at, id) index, so a deep page costs the same as the first one.
+        """
+        query = self._history_query(fields, created_from, created_to)
+
+        if after is not None:
+            query = query.filter(tuple_(self.entity.created_at, self.entity.id) < tuple_(*after))
+
+        rows = (
+            query.order_by(self.entity.created_at.desc(), self.entity.id.desc())
+            .limit(limit)
+            .all()
+        )
+
+        return [self._as_dict(row, fields) for row in rows]
+
+    def iter_rows(
+        self,
+        fields: List[str],
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Streams analyses oldest first through a server-side cursor, holding `batch_size` rows at a time.
+        """
+        rows = (
+            self._history_query(fields, created_from, created_to)
+            .order_by(self.entity.created_at, self.entity.id)
+            .yield_per(batch_size)
+        )
+
+        return (self._as_dict(row, fields) for row in rows)
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        offset: int = 0,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns up to `limit` analyses matching a web-search style query (words, "phrases", `or`, `-word`),
+        best ranked first, with their bodies.
+
+        Matching uses the GIN index on `search_vector`; only the rows of the page are ranked against
+        their bodies and decompressed.
+        """
+        tsquery = func.websearch_to_tsquery(literal(SEARCH_CONFIG, REGCONFIG), query)
+        rank = func.ts_rank_cd(self.entity.search_vector, tsquery)
+        page = self.reader.query(
+            self.entity.id,
+            self.entity.created_at,
+            self.entity.code_hash,
+            self.entity.model,
+            self.entity.code_blob_hash,
+            self.entity.suggestions_blob_hash,
+            rank.label("rank"),
+        ).filter(self.entity.search_vector.op("@@")(tsquery))
+
+        if created_from is not None:
+            page = page.filter(self.entity.created_at >= created_from)
+
+        if created_to is not None:
+            page = page.filter(self.entity.created_at < created_to)
+
+        rows = page.order_by(rank.desc(), self.entity.created_at.desc(), self.entity.id.desc()).offset(offset).limit(limit).all()
+
+        if not rows:
+            return []
+
+        hashes = {row.code_blob_hash for row in rows} | {row.suggestions_blob_hash for row in rows}
+        bodies = {
+            blob.hash: blob.text()
+            for blob in self.reader.query(AnalysisBlob).filter(AnalysisBlob.hash.in_(hashes))
+        }
+
+        return [
+            {
+                "id": row.id,
+                "created_at": row.created_at,
+                "code_hash": row.code_hash,
+                "model": row.model,
+                "rank": row.rank,
+                "code_snippet": bodies[row.code_blob_hash],
+                "suggestions": bodies[row.suggestions_blob_hash],
+            }
+            for row in rows
+        ]
+
+    def headlines(self, query: str, texts: List[str], options: str) -> List[str]:
+        """
+        Excerpts of `texts` around the terms of `query`, highlighted by Postgres `ts_headline`, in order.
+        """
+        rows = self.reader.execute(
+            text(
+                "SELECT ts_headline(CAST(:config AS regconfig), body, websearch_to_tsquery(CAST(:config AS regconfig), :query), :options) "
+                "FROM unnest(CAST(:texts AS text[])) WITH ORDINALITY AS bodies(body, position) ORDER BY position"
+            ),
+            {"config": SEARCH_CONFIG, "query": query, "texts": texts, "options": options},
+        )
+
+        return [headline for headline, in rows]
+
+    def _history_query(self, fields: List[str], created_from: Optional[datetime], created_to: Optional[datetime]) -> Query:
+        columns = []
+        joins = []
+
+        for field in fields:
+            if field in self.entity.BODIES:
+                blob = aliased(AnalysisBlob, name=f"{field}_blob")
+                columns += [blob.codec.label(f"{field}_codec"), blob.data.label(f"{field}_data")]
+                joins.append((blob, blob.hash == getattr(self.entity, self.entity.BODIES[field])))
+            else:
+                columns.append(getattr(self.entity, field))
+
+        query = self.reader.query(*columns).select_from(self.entity)
+
+        for blob, condition in joins:
+            query = query.join(blob, condition)
+
+        if created_from is not None:
+            query = query.filter(self.entity.created_at >= created_from)
+
+        if created_to is not None:
+            query = query.filter(self.entity.created_at < created_to)
+
+        return query
+
+    def _as_dict(self, row: Row, fields: List[str]) -> Dict[str, Any]:
+        values = row._asdict()
+
+        return {
+            field: (
+                BlobCodec.decompress(values[f"{field}_codec"], values[f"{field}_data"]).decode("utf-8")
+                if field in self.entity.BODIES
+                else values[field]
+            )
+            for field in fields
+        }
+
+    @contextmanager
+    def advisory_lock(self, key: str) -> Iterator[None]:
+        """
+        Holds a Postgres transaction-level advisory lock on `key`, serializing work on the same key
+        across processes.
+
+        The lock is taken in this repository's session, so it costs no connection besides the one the
+        session already holds, and is released when the session's transaction ends: at the first commit
+        inside the block (e.g. the one storing the result), or when the block exits, which commits the
+        session or, on an exception, rolls it back.
+        """
+        self.session.execute(text("SELECT pg_advisory_xact_lock(hashtextextended(:key, 0))"), {"key": key})
+
+        try:
+            yield
+        except BaseException:
+            self.session.rollback()
+            raise
+
+        self.session.commit()
+
+
+class AsyncAnalyzerRepository(AsyncBaseDBRepository):
+    def __init__(self):
+        super().__init__(AnalysisHistory)
+
+    async def create(self, entity_instance: AnalysisHistory):
+        await self.create_many([entity_instance])
+
+    async def create_many(self, entity_instances: List[AnalysisHistory]):
+        """
+        Stores the analyses and, in the same transaction, the blobs of their bodies.
+        """
+        statement = insert_blobs(entity_instances)
+
+        if statement is not None:
+            await self.session.execute(statement)
+
+        await super().create_many(entity_instances)
+
+    async def find_latest_by_hash(self, code_hash: str) -> Optional[AnalysisHistory]:
+        """
+        Returns the most recent analysis stored for a content hash.
+        """
+        return await self.session.scalar(
+            self.find_by(code_hash=code_hash)
+            .order_by(self.entity.created_at.desc())
+            .limit(1)
+        )
+
+    @asynccontextmanager
+    async def advisory_lock(self, key: str) -> AsyncIterator[None]:
+        """
+        Async variant of `AnalyzerRepository.advisory_lock`.
+        """
+        await self.session.execute(text("SELECT pg_advisory_xact_lock(hashtextextended(:key, 0))"), {"key": key})
+
+        try:
+            yield
+        except BaseException:
+            await self.session.rollback()
+            raise
+
+        await self.session.commit()
@@ -0,0 +1,148 @@
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from utils import Environment
+
+try:
+    import pyarrow
+    import pyarrow.dataset
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class ArchiveRepository:
+    """
+    Columnar files holding the `analysis_history` partitions moved out of Postgres by retention,
+    one file per month (`analysis_history_pYYYYMM.parquet` or `.arrow`), with the bodies stored as text.
+    Requires `pyarrow`.
+    """
+
+    _directory: str = Environment.get("HISTORY_ARCHIVE_DIR", "archive")
+    _format: str = Environment.get("HISTORY_ARCHIVE_FORMAT", "parquet")
+    _compression: str = Environment.get("HISTORY_ARCHIVE_COMPRESSION", "zstd")
+
+    @property
+    def available(self) -> bool:
+        return pyarrow is not None
+
+    @staticmethod
+    def schema() -> "pyarrow.Schema":
+        return pyarrow.schema([
+            ("id", pyarrow.string()),
+            ("created_at", pyarrow.timestamp("us", tz="UTC")),
+            ("code_hash", pyarrow.string()),
+            ("model", pyarrow.string()),
+            ("input_tokens", pyarrow.int64()),
+            ("output_tokens", pyarrow.int64()),
+            ("code_snippet", pyarrow.large_string()),
+            ("suggestions", pyarrow.large_string()),
+        ])
+
+    def write(self, name: str, rows: Iterable[Dict[str, Any]], batch_size: int = 1000) -> Tuple[str, int]:
+        """
+        Writes the rows of one partition to its archive file. The file is written under a temporary name
+        and renamed at the end, so a partial file is never read as an archive.
+
+        Returns the path of the file and the number of rows written.
+        """
+        os.makedirs(self._directory, exist_ok=True)
+        path = os.path.join(self._directory, f"{name}.{self._format}")
+        partial = f"{path}.partial"
+        schema = self.schema()
+        count = 0
+
+        if self._format == "arrow":
+            writer = pyarrow.ipc.new_file(partial, schema, options=pyarrow.ipc.IpcWriteOptions(compression=self._compression))
+        else:
+            writer = pyarrow.parquet.ParquetWriter(partial, schema, compression=self._compression)
+
+        try:
+            batch = []
+
+            for row in rows:
+                batch.append(row)
+
+                if len(batch) >= batch_size:
+                    writer.write_table(pyarrow.Table.from_pylist(batch, schema=schema))
+                    count += len(batch)
+                    batch = []
+
+            if batch:
+                writer.write_table(pyarrow.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+        finally:
+            writer.close()
+
+        os.replace(partial, path)
+
+        return path, count
+
+    def files(self, created_from: Optional[datetime] = None, created_to: Optional[datetime] = None) -> List[str]:
+        """
+        The archive files whose month overlaps [created_from, created_to), oldest first.
+        """
+        if not os.path.isdir(self._directory):
+            return []
+
+        suffix = f".{self._format}"
+        found = []
+
+        for entry in sorted(os.listdir(self._directory)):
+            if not entry.startswith("analysis_history_p") or not entry.endswith(suffix):
+                continue
+
+            stamp = entry[len("analysis_history_p"):-len(suffix)]
+
+            if len(stamp) != 6 or not stamp.isdigit():
+                continue
+
+            start = datetime(int(stamp[:4]), int(stamp[4:]), 1, tzinfo=timezone.utc)
+            end = datetime(start.year + start.month // 12, start.month % 12 + 1, 1, tzinfo=timezone.utc)
+
+            if created_from is not None and self._utc(created_from) >= end:
+                continue
+
+            if created_to is not None and self._utc(created_to) <= start:
+                continue
+
+            found.append(os.path.join(self._directory, entry))
+
+        return found
+
+    def iter_rows(
+        self,
+        fields: List[str],
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Streams archived analyses oldest first, reading only the requested columns and skipping the
+        files and row groups outside the period.
+        """
+        condition = None
+
+        if created_from is not None:
+            condition = pyarrow.dataset.field("created_at") >= self._utc(created_from)
+
+        if created_to is not None:
+            upper = pyarrow.dataset.field("created_at") < self._utc(created_to)
+            condition = upper if condition is None else condition & upper
+
+        file_format = "ipc" if self._format == "arrow" else "parquet"
+
+        for path in self.files(created_from, created_to):
+            # Files are written in (created_at, id) order; a single-threaded scan keeps that order.
+            batches = pyarrow.dataset.dataset(path, format=file_format).to_batches(
+                columns=fields, filter=condition, batch_size=batch_size, use_threads=False
+            )
+
+            for batch in batches:
+                yield from batch.to_pylist()
+
+    @staticmethod
+    def _utc(moment: datetime) -> datetime:
+        # Query parameters may come without an offset; they are taken as UTC, like the partition bounds.
+        return moment if moment.tzinfo is not None else moment.replace(tzinfo=timezone.utc)
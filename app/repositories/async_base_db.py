@@ -0,0 +1,120 @@
+from typing import TypeVar, Type, Any, AsyncIterator, List, Dict, Optional
+from sqlalchemy import and_, select
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.sql import Select
+from repositories.database import engine_options
+from utils import Environment
+
+T = TypeVar("T")
+
+
+def async_url(url: str) -> URL:
+    """
+    Returns `url` with the asyncpg driver, so `DATABASE_URL` can stay a plain psycopg2 URL.
+    """
+    parsed = make_url(url)
+
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+asyncpg")
+
+
+class AsyncBaseDBRepository:
+    _engine: Any = create_async_engine(async_url(Environment.get("DATABASE_URL")), **engine_options("async", asynchronous=True))
+    # Attributes are kept after commit: reloading them lazily is not possible outside an await.
+    _Session: async_sessionmaker = async_sessionmaker(bind=_engine, expire_on_commit=False)
+
+    def __init__(self, entity: Type[T]):
+        """
+        Initializes the repository with a specific entity.
+        """
+        self.session: AsyncSession = self._Session()
+        self.entity = entity
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info: Any):
+        await self.close()
+
+    @classmethod
+    async def dependency(cls) -> AsyncIterator["AsyncBaseDBRepository"]:
+        """
+        FastAPI dependency yielding a repository whose session is closed once the response is sent.
+        """
+        async with cls() as repository:
+            yield repository
+
+    async def close(self):
+        """
+        Returns the session's connection to the pool.
+        """
+        await self.session.close()
+
+    async def release(self):
+        """
+        Async variant of `BaseDBRepository.release`.
+        """
+        await self.session.rollback()
+
+    async def find_all(self) -> List[T]:
+        """
+        Returns all records of the entity.
+        """
+        return list(await self.session.scalars(select(self.entity)))
+
+    def find_by(self, **filters: Dict[str, Any]) -> Select:
+        """
+        Returns a statement selecting the filtered records of the entity, to be refined and run with
+        `self.session.scalar` or `self.session.scalars`.
+        """
+        statement = select(self.entity)
+
+        if filters:
+            filter_conditions = [
+                getattr(self.entity, attr) == value
+                for attr, value in filters.items()
+                if hasattr(self.entity, attr)
+            ]
+
+            if filter_conditions:
+                statement = statement.where(and_(*filter_conditions))
+
+        return statement
+
+    async def create(self, entity_instance: T):
+        """
+        Adds a new instance of the entity to the database.
+        """
+        self.session.add(entity_instance)
+        await self.session.commit()
+
+    async def create_many(self, entity_instances: List[T]):
+        """
+        Adds several instances of the entity to the database in a single transaction.
+        """
+        self.session.add_all(entity_instances)
+        await self.session.commit()
+
+    async def update(self, uid: Any, **kwargs: Dict[str, Any]) -> Optional[T]:
+        """
+        Updates a record by its primary key.
+        """
+        instance = await self.session.get(self.entity, uid)
+
+        if instance:
+            for key, value in kwargs.items():
+                setattr(instance, key, value)
+
+            await self.session.commit()
+
+        return instance
+
+    async def delete(self, uid: Any):
+        """
+        Deletes a record by its primary key.
+        """
+        instance = await self.session.get(self.entity, uid)
+
+        if instance:
+            await self.session.delete(instance)
+            await self.session.commit()
@@ -1,31 +1,76 @@
-from typing import TypeVar, Type, Any, List, Dict
-from sqlalchemy import create_engine, and_
-from sqlalchemy.orm import sessionmaker
+import io
+from itertools import islice
+from typing import TypeVar, Type, Any, List, Dict, Iterable, Iterator, Optional
+from sqlalchemy import and_, delete, insert, inspect, select, update
 from sqlalchemy.orm.session import Session as ORMSession, Query
+from repositories.database import Database
 from utils import Environment
 
 T = TypeVar("T")
 
 
 class BaseDBRepository:
-    _engine: Any = create_engine(Environment.get("DATABASE_URL"), echo=True)
-    _Session: ORMSession = sessionmaker(bind=_engine)
+    database: Database = Database.from_env()
+    _engine: Any = database.engine
+    _batch_size: int = int(Environment.get("DATABASE_BATCH_SIZE", 1000))
 
     def __init__(self, entity: Type[T]):
         """
-        Initializes the repository with a specific entity.
+        Initializes the repository with a specific entity, on the session of the current scope
+        (see `Database.scope`) or, outside of one, on a session of its own.
         """
-        self.session: ORMSession = self._Session()
+        self.session, owned = self.database.session()
+        self._owned: List[ORMSession] = [self.session] if owned else []
+        self._reader: Optional[ORMSession] = None
         self.entity = entity
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info: Any):
+        self.close()
+
     def __del__(self):
-        self.session.close()
+        # Only a fallback: sessions shared by a scope are closed by it, owned ones by `close`.
+        for session in getattr(self, "_owned", []):
+            session.close()
+
+    @property
+    def reader(self) -> ORMSession:
+        """
+        The session for read-only queries that tolerate replication lag: the replica's when
+        `DATABASE_REPLICA_URL` is set, `self.session` otherwise.
+        """
+        if not self.database.has_replica:
+            return self.session
+
+        if self._reader is None:
+            self._reader, owned = self.database.session(read_only=True)
+
+            if owned:
+                self._owned.append(self._reader)
+
+        return self._reader
+
+    def close(self):
+        """
+        Closes the sessions this repository opened and returns their connections to the pool.
+        """
+        for session in self._owned:
+            session.close()
+
+    def release(self):
+        """
+        Ends the session's transaction, which only read so far, so its connection returns to the pool
+        while the caller does slow work; the session stays usable and reconnects on its next query.
+        """
+        self.session.rollback()
 
     def find_all(self) -> List[T]:
         """
         Returns all records of the entity.
         """
-        return self.session.query(self.entity).all()
+        return self.reader.query(self.entity).all()
 
     def find_by(self, **filters: Dict[str, Any]) -> Query[T]:
         """
@@ -52,24 +97,159 @@ class BaseDBRepository:
         self.session.add(entity_instance)
         self.session.commit()
 
-    def update(self, uid: Any, **kwargs: Dict[str, Any]):
+    def create_many(self, entity_instances: List[T], batch_size: Optional[int] = None):
         """
-        Updates a record by its UID.
+        Adds several instances of the entity to the database in a single transaction, flushed every
+        `batch_size` instances so the session does not hold the whole pending set at once.
         """
-        instance = self.find_by(uid=uid).one_or_none()
+        batch_size = batch_size or self._batch_size
+
+        for start in range(0, len(entity_instances), batch_size):
+            self.session.add_all(entity_instances[start:start + batch_size])
+            self.session.flush()
+
+        self.session.commit()
+
+    def insert_many(self, rows: Iterable[Dict[str, Any]], batch_size: Optional[int] = None) -> int:
+        """
+        Inserts plain rows without building entity instances, in a single transaction. Each batch is
+        one multi-row INSERT (insertmanyvalues). Returns the number of rows inserted.
+        """
+        count = 0
+
+        for batch in self._batches(rows, batch_size):
+            self.session.execute(insert(self.entity), batch)
+            count += len(batch)
+
+        self.session.commit()
+
+        return count
+
+    def copy_many(self, rows: Iterable[Dict[str, Any]], columns: List[str], batch_size: Optional[int] = None) -> int:
+        """
+        Loads plain rows with `COPY ... FROM STDIN`, the fastest path for backfills, in a single transaction.
+        Values go through CSV, so only the given columns are written and server defaults fill the rest.
+        Falls back to `insert_many` when the driver is not psycopg2. Returns the number of rows loaded.
+        """
+        if self._engine.dialect.driver != "psycopg2":
+            return self.insert_many(({column: row.get(column) for column in columns} for row in rows), batch_size)
+
+        table = inspect(self.entity).local_table
+        statement = (
+            f"COPY {table.name} ({', '.join(table.c[column].name for column in columns)}) "
+            "FROM STDIN WITH (FORMAT csv)"
+        )
+        cursor = self.session.connection().connection.cursor()
+        count = 0
+
+        try:
+            for batch in self._batches(rows, batch_size):
+                buffer = io.StringIO("".join(self._csv_line([row.get(column) for column in columns]) for row in batch))
+                cursor.copy_expert(statement, buffer)
+                count += len(batch)
+        finally:
+            cursor.close()
+
+        self.session.commit()
 
-        if instance:
-            for key, value in kwargs.items():
-                setattr(instance, key, value)
+        return count
 
-            self.session.commit()
+    def update(self, uid: Any, **kwargs: Dict[str, Any]):
+        """
+        Updates a record by its primary key.
+        """
+        self.update_where(kwargs, **self._primary_key(uid))
 
     def delete(self, uid: Any):
         """
-        Deletes a record by its UID.
+        Deletes a record by its primary key.
         """
-        instance = self.find_by(uid=uid).one_or_none()
+        self.delete_where(**self._primary_key(uid))
+
+    def update_where(self, values: Dict[str, Any], **filters: Dict[str, Any]) -> int:
+        """
+        Updates every record matching the filters with a single UPDATE. Returns the number of rows changed.
+        Only mapped columns can be set: properties such as the blob-backed bodies of `AnalysisHistory`
+        are refused, since the UPDATE would skip the code that stores them.
+        """
+        unknown = [attr for attr in values if attr not in inspect(self.entity).column_attrs]
+
+        if unknown:
+            raise ValueError(f"Not columns of {self.entity.__name__}, so update_where cannot set them: {', '.join(unknown)}")
+
+        result = self.session.execute(
+            update(self.entity)
+            .where(*self._conditions(filters))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        self.session.commit()
+
+        return result.rowcount
+
+    def delete_where(self, **filters: Dict[str, Any]) -> int:
+        """
+        Deletes every record matching the filters with a single DELETE. Returns the number of rows deleted.
+        """
+        result = self.session.execute(
+            delete(self.entity)
+            .where(*self._conditions(filters))
+            .execution_options(synchronize_session=False)
+        )
+        self.session.commit()
+
+        return result.rowcount
+
+    def iter_by(
+        self,
+        fields: Optional[List[str]] = None,
+        batch_size: Optional[int] = None,
+        **filters: Dict[str, Any],
+    ) -> Iterator[Any]:
+        """
+        Streams the records matching the filters through a server-side cursor, holding `batch_size`
+        rows at a time. With `fields`, only those columns are read and rows are yielded instead of entities.
+        """
+        conditions = self._conditions(filters, required=False)
+        options = {"yield_per": batch_size or self._batch_size}
+
+        if fields:
+            statement = select(*[getattr(self.entity, field) for field in fields]).where(*conditions)
+            yield from self.reader.execute(statement, execution_options=options)
+        else:
+            statement = select(self.entity).where(*conditions)
+            yield from self.reader.scalars(statement, execution_options=options)
+
+    def _conditions(self, filters: Dict[str, Any], required: bool = True) -> List[Any]:
+        # Unlike `find_by`, set-based statements reject unknown attributes and, unless told otherwise,
+        # an empty filter, so a typo cannot turn into a statement over the whole table.
+        columns = inspect(self.entity).column_attrs
+        unknown = [attr for attr in filters if attr not in columns]
+
+        if unknown:
+            raise ValueError(f"Unknown attributes for {self.entity.__name__}: {', '.join(unknown)}")
+
+        if required and not filters:
+            raise ValueError(f"Refusing to change every {self.entity.__name__} row without filters")
+
+        return [getattr(self.entity, attr) == value for attr, value in filters.items()]
+
+    def _primary_key(self, uid: Any) -> Dict[str, Any]:
+        columns = inspect(self.entity).primary_key
+
+        if len(columns) != 1:
+            raise ValueError(f"{self.entity.__name__} has a composite primary key; use update_where/delete_where")
+
+        return {columns[0].key: uid}
+
+    @staticmethod
+    def _csv_line(values: List[Any]) -> str:
+        # COPY reads an unquoted empty field as NULL and a quoted one as an empty string, so every
+        # value is quoted and only None is left bare; no string can be mistaken for a NULL marker.
+        return ",".join("" if value is None else '"' + str(value).replace('"', '""') + '"' for value in values) + "\n"
+
+    def _batches(self, rows: Iterable[Dict[str, Any]], batch_size: Optional[int]) -> Iterator[List[Dict[str, Any]]]:
+        rows = iter(rows)
 
-        if instance:
-            self.session.delete(instance)
-            self.session.commit()
+        while batch := list(islice(rows, batch_size or self._batch_size)):
+            yield batch
@@ -0,0 +1,159 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple, Type
+
+import anyio.to_thread
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.session import Session as ORMSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from utils import Environment, Telemetry
+
+
+class InstrumentedPool:
+    """
+    Pool mixin exporting how long checkouts take (waiting for a free connection or opening a new one),
+    checkout timeouts, and how much of the pool is in use.
+    """
+
+    label: str = "primary"
+
+    def _do_get(self):
+        start = time.perf_counter()
+
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            Telemetry.DB_POOL_TIMEOUTS.labels(pool=self.label).inc()
+            raise
+        finally:
+            Telemetry.DB_POOL_CHECKOUT_SECONDS.labels(pool=self.label).observe(time.perf_counter() - start)
+            self._report()
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._report()
+
+    def _report(self):
+        in_use = self.checkedout()
+        capacity = self.size() + max(self._max_overflow, 0)
+        Telemetry.DB_POOL_IN_USE.labels(pool=self.label).set(in_use)
+        Telemetry.DB_POOL_SATURATION.labels(pool=self.label).set(in_use / capacity if capacity else 0)
+
+
+def instrumented_pool(base: Type[QueuePool], label: str) -> Type[QueuePool]:
+    """
+    A `base` pool class reporting its metrics under `label`. The pool is built by the engine, so the
+    label is bound to the class.
+    """
+    return type(f"Instrumented{base.__name__}", (InstrumentedPool, base), {"label": label})
+
+
+def engine_options(label: str, asynchronous: bool = False) -> Dict[str, Any]:
+    """
+    The pool settings from the environment, shared by the sync and async engines.
+    """
+    return {
+        "echo": Environment.get("DATABASE_ECHO", "false") == "true",
+        "poolclass": instrumented_pool(AsyncAdaptedQueuePool if asynchronous else QueuePool, label),
+        "pool_size": int(Environment.get("DATABASE_POOL_SIZE", 5)),
+        "max_overflow": int(Environment.get("DATABASE_MAX_OVERFLOW", 10)),
+        "pool_timeout": float(Environment.get("DATABASE_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(Environment.get("DATABASE_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": Environment.get("DATABASE_POOL_PRE_PING", "true") == "true",
+    }
+
+
+class Database:
+    """
+    The engines of the primary and, optionally, of a read replica, and the sessions handed to repositories.
+
+    Inside a `scope` (one per request, through `request_scope`), every repository shares one session per
+    engine, closed when the scope ends. Outside of one, each repository gets its own session and closes it.
+    """
+
+    def __init__(self, url: str, replica_url: Optional[str] = None):
+        self.engine = create_engine(url, **engine_options("primary"))
+        self.sessions = sessionmaker(bind=self.engine)
+        self.replica_engine = create_engine(replica_url, **engine_options("replica")) if replica_url else None
+        self.replica_sessions = sessionmaker(bind=self.replica_engine) if replica_url else None
+        self._scope: ContextVar[Optional[Dict[str, ORMSession]]] = ContextVar("database_scope", default=None)
+
+    @classmethod
+    def from_env(cls) -> "Database":
+        return cls(Environment.get("DATABASE_URL"), Environment.get("DATABASE_REPLICA_URL") or None)
+
+    @property
+    def has_replica(self) -> bool:
+        return self.replica_sessions is not None
+
+    def session(self, read_only: bool = False) -> Tuple[ORMSession, bool]:
+        """
+        Returns the session to use and whether the caller owns it (and must close it).
+
+        Read-only sessions go to the replica when one is configured.
+        """
+        name = "replica" if read_only and self.has_replica else "primary"
+        factory = self.replica_sessions if name == "replica" else self.sessions
+        scope = self._scope.get()
+
+        if scope is None:
+            return factory(), True
+
+        if name not in scope:
+            scope[name] = factory()
+
+        return scope[name], False
+
+    @contextmanager
+    def scope(self) -> Iterator[None]:
+        """
+        Shares one session per engine among the repositories created in the block, and closes them at the end.
+        """
+        scope: Dict[str, ORMSession] = {}
+        token = self._scope.set(scope)
+
+        try:
+            yield
+        finally:
+            self._scope.reset(token)
+            self._close(scope)
+
+    async def request_scope(self) -> AsyncIterator[None]:
+        """
+        FastAPI dependency scoping the sessions to the request. It must be async: the scope is set in the
+        request's context, which the sync dependencies and routes run in the thread pool inherit.
+        """
+        scope: Dict[str, ORMSession] = {}
+        token = self._scope.set(scope)
+
+        try:
+            yield
+        finally:
+            self._scope.reset(token)
+
+            if scope:
+                # Closing rolls back and returns the connection, so it stays off the event loop.
+                await anyio.to_thread.run_sync(self._close, scope)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        engines = {"primary": self.engine, "replica": self.replica_engine}
+
+        return {
+            name: {"size": engine.pool.size(), "in_use": engine.pool.checkedout(), "overflow": engine.pool.overflow()}
+            for name, engine in engines.items()
+            if engine is not None
+        }
+
+    def dispose(self):
+        self.engine.dispose()
+
+        if self.replica_engine is not None:
+            self.replica_engine.dispose()
+
+    @staticmethod
+    def _close(scope: Dict[str, ORMSession]):
+        for session in scope.values():
+            session.close()
@@ -0,0 +1,40 @@
+from typing import Any, List, Tuple
+from entities import AnalysisFingerprint, AnalysisFingerprintBand
+from repositories.base_db import BaseDBRepository
+
+
+class FingerprintRepository(BaseDBRepository):
+    def __init__(self):
+        super().__init__(AnalysisFingerprint)
+
+    def find_candidates(self, band_keys: List[str], limit: int = 50) -> List[Tuple[Any, bytes]]:
+        """
+        Returns (analysis_id, signature) pairs that share at least one LSH band with the given keys.
+        """
+        return (
+            self.session.query(AnalysisFingerprint.analysis_id, AnalysisFingerprint.signature)
+            .join(AnalysisFingerprintBand, AnalysisFingerprintBand.analysis_id == AnalysisFingerprint.analysis_id)
+            .filter(AnalysisFingerprintBand.band_key.in_(band_keys))
+            .distinct()
+            .limit(limit)
+            .all()
+        )
+
+    def create_with_bands(self, fingerprint: AnalysisFingerprint, band_keys: List[str]):
+        """
+        Stores a fingerprint together with its LSH band keys in a single transaction.
+        """
+        self.create_many_with_bands([(fingerprint, band_keys)])
+
+    def create_many_with_bands(self, fingerprints: List[Tuple[AnalysisFingerprint, List[str]]]):
+        """
+        Stores several fingerprints and their LSH band keys in a single transaction.
+        """
+        self.session.add_all([fingerprint for fingerprint, _ in fingerprints])
+        self.session.flush()
+        self.session.add_all([
+            AnalysisFingerprintBand(band_key=band_key, analysis_id=fingerprint.analysis_id)
+            for fingerprint, band_keys in fingerprints
+            for band_key in set(band_keys)
+        ])
+        self.session.commit()
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import func, or_
+from entities import AnalysisHistory, AnalysisJob
+from repositories.base_db import BaseDBRepository
+
+
+class JobRepository(BaseDBRepository):
+    def __init__(self):
+        super().__init__(AnalysisJob)
+
+    def find_with_result(self, job_id: Any) -> Optional[Tuple[AnalysisJob, Optional[str]]]:
+        """
+        Returns a job together with the suggestions of the analysis it produced, or its local report, if any.
+        """
+        found = (
+            self.session.query(AnalysisJob, AnalysisHistory)
+            .outerjoin(AnalysisHistory, AnalysisHistory.id == AnalysisJob.analysis_id)
+            .filter(AnalysisJob.id == job_id)
+            .one_or_none()
+        )
+
+        if found is None:
+            return None
+
+        job, analysis = found
+
+        return job, analysis.suggestions if analysis is not None else job.local_result
+
+    def claim_pending(self, limit: int) -> List[Any]:
+        """
+        Atomically moves up to `limit` pending jobs to running and returns their ids. Jobs waiting
+        out a retry delay are left until `run_after` passes.
+
+        Rows locked by another worker process are skipped, so concurrent claimers never share a job.
+        """
+        rows = (
+            self.session.query(AnalysisJob.id)
+            .filter(AnalysisJob.status == AnalysisJob.PENDING)
+            .filter(or_(AnalysisJob.run_after.is_(None), AnalysisJob.run_after <= func.now()))
+            .order_by(AnalysisJob.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        job_ids = [row.id for row in rows]
+
+        if job_ids:
+            self.session.query(AnalysisJob).filter(AnalysisJob.id.in_(job_ids)).update(
+                {
+                    AnalysisJob.status: AnalysisJob.RUNNING,
+                    AnalysisJob.started_at: func.now(),
+                    AnalysisJob.attempts: AnalysisJob.attempts + 1,
+                },
+                synchronize_session=False,
+            )
+
+        self.session.commit()
+
+        return job_ids
+
+    def requeue_stale(self, lease: float, max_attempts: int) -> int:
+        """
+        Returns running jobs whose lease expired (e.g. their worker died) to the queue,
+        failing those that already used all their attempts.
+        """
+        deadline = datetime.now(timezone.utc) - timedelta(seconds=lease)
+        stale = self.session.query(AnalysisJob).filter(
+            AnalysisJob.status == AnalysisJob.RUNNING,
+            AnalysisJob.started_at < deadline,
+        )
+        failed = stale.filter(AnalysisJob.attempts >= max_attempts).update(
+            {AnalysisJob.status: AnalysisJob.FAILED, AnalysisJob.error: "Tempo limite de execução excedido."},
+            synchronize_session=False,
+        )
+        requeued = stale.filter(AnalysisJob.attempts < max_attempts).update(
+            {AnalysisJob.status: AnalysisJob.PENDING},
+            synchronize_session=False,
+        )
+        self.session.commit()
+
+        return failed + requeued
+
+    def finish(self, job_id: Any, analysis_id: Any = None, local_result: Optional[str] = None):
+        """
+        Marks a job as done and links it to the analysis it produced, or keeps the local report of a
+        snippet answered without the model, which has no analysis.
+        """
+        self.update_where(
+            {"status": AnalysisJob.DONE, "analysis_id": analysis_id, "local_result": local_result, "error": None},
+            id=job_id,
+        )
+
+    def retry(self, job_id: Any, error: str, delay: float):
+        """
+        Returns a job to the queue after a transient error, keeping the error, to be claimed again
+        once `delay` seconds have passed by the database clock.
+        """
+        self.update_where(
+            {"status": AnalysisJob.PENDING, "error": error, "run_after": func.now() + timedelta(seconds=delay)},
+            id=job_id,
+        )
+
+    def fail(self, job_id: Any, error: str):
+        """
+        Marks a job as failed with the given error message.
+        """
+        self.update_where({"status": AnalysisJob.FAILED, "error": error}, id=job_id)
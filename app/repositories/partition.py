@@ -0,0 +1,169 @@
+import re
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, Dict, Iterator, List
+from sqlalchemy import text
+from entities import AnalysisHistory
+from repositories.base_db import BaseDBRepository
+from utils import BlobCodec
+
+PARTITION_NAME = re.compile(r"^analysis_history_p(\d{4})(\d{2})$")
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class PartitionRepository(BaseDBRepository):
+    """
+    DDL and bulk access for the monthly partitions of `analysis_history`, named `analysis_history_pYYYYMM`
+    and bounded by UTC month starts.
+    """
+
+    def __init__(self):
+        super().__init__(AnalysisHistory)
+
+    @staticmethod
+    def partition_name(month: date) -> str:
+        return f"analysis_history_p{month:%Y%m}"
+
+    @staticmethod
+    def partition_month(name: str) -> date:
+        """
+        The month covered by a partition. Names are checked here before they are used in DDL.
+        """
+        match = PARTITION_NAME.match(name)
+
+        if match is None:
+            raise ValueError(f"Not an analysis_history partition: {name}")
+
+        return date(int(match.group(1)), int(match.group(2)), 1)
+
+    def attached(self) -> List[str]:
+        """
+        The partitions currently attached to `analysis_history`, oldest first.
+        """
+        rows = self.session.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'analysis_history'::regclass ORDER BY c.relname"
+        ))
+
+        return [name for name, in rows if PARTITION_NAME.match(name)]
+
+    def detached(self) -> List[str]:
+        """
+        Partition tables no longer attached, left behind by an archival that did not finish.
+        """
+        rows = self.session.execute(text(
+            "SELECT t.tablename FROM pg_tables t "
+            "WHERE t.schemaname = current_schema() AND t.tablename LIKE 'analysis\\_history\\_p%' "
+            "AND NOT EXISTS ("
+            "  SELECT 1 FROM pg_inherits i WHERE i.inhrelid = (quote_ident(t.schemaname) || '.' || quote_ident(t.tablename))::regclass"
+            ") ORDER BY t.tablename"
+        ))
+
+        return [name for name, in rows if PARTITION_NAME.match(name)]
+
+    def create_partition(self, month: date) -> bool:
+        """
+        Creates the partition of `month` if it does not exist yet. Returns whether it was created.
+        """
+        name = self.partition_name(month)
+        exists = self.session.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+
+        if exists:
+            return False
+
+        self.session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF analysis_history "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+        ))
+        self.session.commit()
+
+        return True
+
+    def detach(self, name: str):
+        self.partition_month(name)
+        self.session.execute(text(f"ALTER TABLE analysis_history DETACH PARTITION {name}"))
+        self.session.commit()
+
+    def iter_partition(self, name: str, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Streams every row of a detached partition, with its bodies decompressed, through a server-side cursor.
+        """
+        self.partition_month(name)
+        rows = self.session.execute(
+            text(
+                "SELECT h.id, h.created_at, h.code_hash, h.model, h.input_tokens, h.output_tokens, "
+                "c.codec AS code_codec, c.data AS code_data, s.codec AS suggestions_codec, s.data AS suggestions_data "
+                f"FROM {name} h "
+                "JOIN analysis_blob c ON c.hash = h.code_blob_hash "
+                "JOIN analysis_blob s ON s.hash = h.suggestions_blob_hash "
+                "ORDER BY h.created_at, h.id"
+            ),
+            execution_options={"yield_per": batch_size},
+        )
+
+        for row in rows:
+            values = row._asdict()
+            yield {
+                "id": str(values["id"]),
+                "created_at": values["created_at"],
+                "code_hash": values["code_hash"],
+                "model": values["model"],
+                "input_tokens": values["input_tokens"],
+                "output_tokens": values["output_tokens"],
+                "code_snippet": BlobCodec.decompress(values["code_codec"], values["code_data"]).decode("utf-8"),
+                "suggestions": BlobCodec.decompress(values["suggestions_codec"], values["suggestions_data"]).decode("utf-8"),
+            }
+
+    def purge(self, name: str) -> int:
+        """
+        Drops a detached partition together with the rows that only existed for it: fingerprints,
+        regions, job links and the blobs no remaining analysis references. Returns the rows dropped.
+        """
+        self.partition_month(name)
+        count = self.session.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+        self.session.execute(text(f"DELETE FROM analysis_fingerprint WHERE analysis_id IN (SELECT id FROM {name})"))
+        self.session.execute(text(f"DELETE FROM analysis_region WHERE analysis_id IN (SELECT id FROM {name})"))
+        self.session.execute(text(f"UPDATE analysis_job SET analysis_id = NULL WHERE analysis_id IN (SELECT id FROM {name})"))
+        # A detached partition keeps its foreign keys to the blobs, so their hashes are set aside before it is dropped.
+        self.session.execute(text(
+            "CREATE TEMPORARY TABLE purged_blob ON COMMIT DROP AS "
+            f"SELECT code_blob_hash AS hash FROM {name} UNION SELECT suggestions_blob_hash FROM {name}"
+        ))
+        self.session.execute(text(f"DROP TABLE {name}"))
+        # Writers insert a blob (skipping it when it exists) and the analysis using it in one transaction.
+        # This lock waits for those in flight, so their analyses are visible to the check below, and holds
+        # new ones off until the purge commits, so none can reuse a blob about to be deleted.
+        self.session.execute(text("LOCK TABLE analysis_blob IN SHARE ROW EXCLUSIVE MODE"))
+        self.session.execute(text(
+            "DELETE FROM analysis_blob b "
+            "WHERE b.hash IN (SELECT hash FROM purged_blob) "
+            "AND NOT EXISTS (SELECT 1 FROM analysis_history h WHERE h.code_blob_hash = b.hash) "
+            "AND NOT EXISTS (SELECT 1 FROM analysis_history h WHERE h.suggestions_blob_hash = b.hash)"
+        ))
+        self.session.commit()
+
+        return count
+
+    @contextmanager
+    def try_lock(self, key: str) -> Iterator[bool]:
+        """
+        Tries a Postgres session-level advisory lock on `key`, held for the block. Yields whether it was
+        acquired, so only one process runs the maintenance at a time.
+        """
+        with self._engine.connect() as connection:
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(hashtextextended(:key, 0))"), {"key": key}
+            ).scalar()
+            connection.commit()
+
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    connection.execute(text("SELECT pg_advisory_unlock(hashtextextended(:key, 0))"), {"key": key})
+                    connection.commit()
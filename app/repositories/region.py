@@ -0,0 +1,23 @@
+from typing import Any, Dict
+from sqlalchemy.engine import Row
+from entities import AnalysisRegion
+from repositories.base_db import BaseDBRepository
+
+
+class RegionRepository(BaseDBRepository):
+    def __init__(self):
+        super().__init__(AnalysisRegion)
+
+    def find_by_hash(self, analysis_id: Any) -> Dict[str, Row]:
+        """
+        Returns the regions stored for an analysis by hash, as plain rows (`start_line`, `end_line`,
+        `findings`) that stay readable once the session's transaction ends.
+        """
+        rows = self.session.query(
+            self.entity.region_hash,
+            self.entity.start_line,
+            self.entity.end_line,
+            self.entity.findings,
+        ).filter(self.entity.analysis_id == analysis_id)
+
+        return {row.region_hash: row for row in rows}
@@ -1,19 +1,184 @@
-from fastapi import APIRouter, Depends, HTTPException
-from services import CodeAnalyzerService
+import json
+import uuid
+from datetime import datetime
+from functools import partial
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from services import CodeAnalyzerService, AnalysisJobService, AnalysisHistoryService
 from adapters.dtos import CodeDTO, ResponseDTO
+from utils import Environment, Telemetry
+
+MAX_BATCH_ITEMS = int(Environment.get("ANALYSIS_BATCH_MAX_ITEMS", 200))
+MAX_SEARCH_OFFSET = int(Environment.get("SEARCH_MAX_OFFSET", 1000))
+ASYNC_DATABASE = Environment.get("DATABASE_ASYNC", "false") == "true"
 
 router = APIRouter(
     prefix="/analyze-code",
     tags=["CodeAnalysis"],
 )
 
+def encode(payload: ResponseDTO, response: Response, model: str) -> JSONResponse:
+    """
+    Serializes the response inside an `encode` span, keeping the headers set by the route.
+    """
+    with Telemetry.span("encode", model):
+        return JSONResponse(
+            content=payload.model_dump(mode="json"),
+            status_code=response.status_code or 200,
+            headers=dict(response.headers),
+        )
+
 @router.post("/", response_model=ResponseDTO)
-def ctrl_analyze_code(
+async def ctrl_analyze_code(
     data: CodeDTO,
+    response: Response,
     service: CodeAnalyzerService = Depends()
 ):
     try:
-        result = service.code_analizer(data.code)
-        return ResponseDTO(message="Análise concluída com sucesso.", data=result)
+        analyze = service.acode_analizer if ASYNC_DATABASE else partial(run_in_threadpool, service.code_analizer)
+        result = await analyze(
+            data.code,
+            bypass_cache=data.bypass_cache,
+            previous_analysis_id=data.previous_analysis_id,
+            priority=data.priority,
+        )
+        response.headers["X-Cache"] = result.cache
+
+        if result.model:
+            response.headers["X-Model"] = result.model
+
+        if result.hedged:
+            response.headers["X-Hedged"] = "true"
+
+        if result.cache_tier:
+            response.headers["X-Cache-Tier"] = result.cache_tier
+
+        if result.near_duplicate:
+            response.headers["X-Near-Duplicate"] = "true"
+            response.headers["X-Similarity"] = f"{result.similarity:.4f}"
+
+        if result.coalesced:
+            response.headers["X-Coalesced"] = "true"
+
+        if result.reused_regions is not None:
+            response.headers["X-Reused-Regions"] = ", ".join(result.reused_regions)
+            response.headers["X-Analyzed-Regions"] = ", ".join(result.analyzed_regions or [])
+
+        return encode(
+            ResponseDTO(message="Análise concluída com sucesso.", data=result.suggestions),
+            response,
+            result.model or service.llm_provider.model_name,
+        )
+    except HTTPException as e:
+        response.status_code = e.status_code
+        response.headers.update(e.headers or {})
+        return ResponseDTO(message=str(e.detail))
     except Exception as e:
         return ResponseDTO( message=str(e))
+
+@router.post("/batch", response_model=ResponseDTO)
+def ctrl_batch_analyze_code(
+    data: List[CodeDTO],
+    response: Response,
+    service: CodeAnalyzerService = Depends()
+):
+    """
+    Analisa vários trechos de código em paralelo, retornando os resultados na ordem de entrada.
+    """
+    if len(data) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"O lote deve ter no máximo {MAX_BATCH_ITEMS} itens.")
+
+    results = service.batch_code_analizer(data)
+    return encode(
+        ResponseDTO(message="Análise em lote concluída.", data=results),
+        response,
+        service.llm_provider.model_name,
+    )
+
+@router.post("/stream")
+def ctrl_stream_analyze_code(
+    data: CodeDTO,
+    service: CodeAnalyzerService = Depends()
+):
+    """
+    Transmite a análise via Server-Sent Events à medida que o modelo a gera.
+    """
+    events = (
+        f"event: {event['event']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+        for event in service.stream_code_analizer(data.code, bypass_cache=data.bypass_cache, priority=data.priority)
+    )
+
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/jobs", response_model=ResponseDTO, status_code=202)
+def ctrl_create_analysis_job(
+    data: CodeDTO,
+    service: AnalysisJobService = Depends()
+):
+    """
+    Enfileira uma análise e retorna imediatamente o identificador do job.
+    """
+    job = service.submit(data.code, bypass_cache=data.bypass_cache)
+    return ResponseDTO(message="Análise enfileirada.", data=job)
+
+@router.get("/jobs/{job_id}", response_model=ResponseDTO)
+def ctrl_get_analysis_job(
+    job_id: uuid.UUID,
+    service: AnalysisJobService = Depends()
+):
+    """
+    Retorna o status e, quando concluído, o resultado de um job de análise.
+    """
+    return ResponseDTO(data=service.get(job_id))
+
+@router.get("/history", response_model=ResponseDTO)
+def ctrl_list_history(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    service: AnalysisHistoryService = Depends()
+):
+    """
+    Lista as análises gravadas, da mais recente para a mais antiga, com paginação por cursor.
+    """
+    return ResponseDTO(data=service.page(limit, cursor, created_from, created_to, fields))
+
+@router.get("/history/export")
+def ctrl_export_history(
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    include_archived: bool = False,
+    service: AnalysisHistoryService = Depends()
+):
+    """
+    Exporta as análises em NDJSON, uma por linha, da mais antiga para a mais recente.
+    Com `include_archived=true`, inclui antes as análises já movidas para os arquivos de retenção.
+    """
+    return StreamingResponse(
+        service.export(created_from, created_to, fields, include_archived),
+        media_type="application/x-ndjson",
+    )
+
+@router.get("/search", response_model=ResponseDTO)
+def ctrl_search_history(
+    q: str = Query(..., min_length=1, max_length=256),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    service: AnalysisHistoryService = Depends()
+):
+    """
+    Busca textual nas sugestões e no código das análises gravadas, ordenada por relevância,
+    com trechos destacados.
+    """
+    return ResponseDTO(data=service.search(q, limit, offset, created_from, created_to))
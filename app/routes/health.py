@@ -1,10 +1,20 @@
 from fastapi import APIRouter
+from entities.llm_governor import LLMGovernor
+from repositories.base_db import BaseDBRepository
+from services import CodeAnalyzerService
 
 router = APIRouter()
 
 @router.get("/health")
-def health():
+async def health():
     """
-    Retorna o status do agente.
+    Retorna o status do agente, a economia da coalescência, o estado de cada modelo, a fila de gravação
+    e o uso dos pools de conexões.
     """
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "single_flight": CodeAnalyzerService.single_flight.stats(),
+        "llm": LLMGovernor.all_stats(),
+        "write_behind": CodeAnalyzerService.writer.stats(),
+        "database": BaseDBRepository.database.stats(),
+    }
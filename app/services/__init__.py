@@ -1 +1,3 @@
-from .code_analizer import CodeAnalyzerService
\ No newline at end of file
+from .code_analizer import CodeAnalyzerService
+from .jobs import AnalysisJobService
+from .history import AnalysisHistoryService
@@ -1,38 +1,1045 @@
-from crewai import Crew
+from crewai import Crew, Task
 from fastapi import HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 import logging
-from typing import Optional, Dict, Any
+import math
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
+from adapters.dtos import AnalysisDTO, BatchItemDTO, CodeDTO
 from agents.agents import Agents
+from agents.pool import AgentPool
+from agents.router import PRIORITIES, ModelRoute, ModelRouter
 from agents.tasks import Tasks
-from entities import AnalysisHistory
-from entities.llm_provider import LLMProvider
-from repositories import AnalyzerRepository
+from analysis import (
+    CodeChunk,
+    CodeChunker,
+    CodeFingerprint,
+    CodeNormalizer,
+    PromptCompactor,
+    StaticAnalyzer,
+    StaticReport,
+    TokenEstimator,
+)
+from entities import AnalysisHistory, AnalysisFingerprint, AnalysisRegion
+from entities.llm_governor import LLMUnavailableError
+from repositories import AnalyzerRepository, AsyncAnalyzerRepository, FingerprintRepository, RegionRepository
+from repositories.base_db import BaseDBRepository
+from utils import Environment, SingleFlight, Telemetry, TTLCache, WriteBehindQueue
+
+# An analysis waiting for write-behind: its history row, fingerprint and per-region findings.
+PendingAnalysis = Tuple[AnalysisHistory, Optional[Tuple[AnalysisFingerprint, List[str]]], List[AnalysisRegion]]
 
 
 class CodeAnalyzerService:
-    def __init__(self, analyzer_repository: AnalyzerRepository = Depends()):
-        llm_provider = LLMProvider()
-        self.agents = Agents(llm_provider)
-        self.analyzer_repository = analyzer_repository
-        self.tasks = Tasks(self.agents)
+    _cache: TTLCache = TTLCache(
+        maxsize=int(Environment.get("ANALYSIS_CACHE_SIZE", 1024)),
+        ttl=float(Environment.get("ANALYSIS_CACHE_TTL", 3600)),
+    )
+    _near_duplicate_threshold: float = float(Environment.get("NEAR_DUPLICATE_THRESHOLD", 0.9))
+    _batch_concurrency: int = int(Environment.get("ANALYSIS_BATCH_CONCURRENCY", 8))
+    _chunk_min_lines: int = int(Environment.get("ANALYSIS_CHUNK_MIN_LINES", 300))
+    _chunk_max_lines: int = int(Environment.get("ANALYSIS_CHUNK_MAX_LINES", 200))
+    _chunk_concurrency: int = int(Environment.get("ANALYSIS_CHUNK_CONCURRENCY", 8))
+    _static_analysis: bool = Environment.get("STATIC_ANALYSIS", "true") == "true"
+    _trivial_max_lines: int = int(Environment.get("STATIC_TRIVIAL_MAX_LINES", 5))
+    _compaction_level: int = int(Environment.get("PROMPT_COMPACTION_LEVEL", 2))
+    _token_budget: int = int(Environment.get("PROMPT_TOKEN_BUDGET", 0))
+    _budget_policy: str = Environment.get("PROMPT_BUDGET_POLICY", "chunk")
+    _single_flight_mode: str = Environment.get("ANALYSIS_SINGLE_FLIGHT", "local")
+    single_flight: SingleFlight = SingleFlight()
+    agent_pool: AgentPool = AgentPool(size=int(Environment.get("AGENT_POOL_SIZE", 8)))
+    router: ModelRouter = ModelRouter.from_env(agent_pool)
+    write_behind: bool = Environment.get("ANALYSIS_WRITE_BEHIND", "false") == "true"
+    writer: WriteBehindQueue = WriteBehindQueue(
+        "analysis_history",
+        max_size=int(Environment.get("ANALYSIS_WRITE_BEHIND_QUEUE_SIZE", 10000)),
+        batch_size=int(Environment.get("ANALYSIS_WRITE_BEHIND_BATCH_SIZE", 200)),
+        flush_interval=float(Environment.get("ANALYSIS_WRITE_BEHIND_INTERVAL", 0.5)),
+        put_timeout=float(Environment.get("ANALYSIS_WRITE_BEHIND_PUT_TIMEOUT", 1)),
+        retries=int(Environment.get("ANALYSIS_WRITE_BEHIND_RETRIES", 2)),
+        retry_backoff=float(Environment.get("ANALYSIS_WRITE_BEHIND_RETRY_BACKOFF", 0.5)),
+    )
+
+    def __init__(
+        self,
+        analyzer_repository: AnalyzerRepository = Depends(),
+        fingerprint_repository: FingerprintRepository = Depends(),
+        region_repository: RegionRepository = Depends(),
+        async_analyzer_repository: Optional[AsyncAnalyzerRepository] = Depends(AsyncAnalyzerRepository.dependency),
+    ):
+        with Telemetry.span("construct", self.agent_pool.llm_provider.model_name):
+            self.llm_provider = self.agent_pool.llm_provider
+            self.agents = Agents(self.llm_provider)
+            self.analyzer_repository = analyzer_repository
+            self.fingerprint_repository = fingerprint_repository
+            self.region_repository = region_repository
+            self.async_analyzer_repository = async_analyzer_repository
+            self.tasks = Tasks(self.agents)
+
+    def context(self) -> tuple:
+        return (self.llm_provider.model_name, self.tasks.language, Tasks.PROMPT_VERSION, self._compaction_level)
+
+    def cache_key(self, code: str) -> str:
+        return CodeNormalizer.digest(code, *self.context())
+
+    def code_analizer(
+        self,
+        code: str,
+        bypass_cache: bool = False,
+        previous_analysis_id: Optional[uuid.UUID] = None,
+        priority: str = "normal",
+    ) -> AnalysisDTO:
+        with self._observed() as observe:
+            return observe(self._code_analizer(code, bypass_cache, previous_analysis_id, priority))
+
+    def _code_analizer(
+        self,
+        code: str,
+        bypass_cache: bool,
+        previous_analysis_id: Optional[uuid.UUID],
+        priority: str,
+    ) -> AnalysisDTO:
+        with self._http_errors():
+            report, local, route, code_hash = self._plan(code, priority)
+
+            if local is not None:
+                return local
+
+            if not bypass_cache:
+                with Telemetry.span("cache", self.llm_provider.model_name):
+                    cached = self._lookup(code_hash) or self._lookup_near_duplicate(code)
+
+                if cached is not None:
+                    return cached
+
+            if self._single_flight_mode != "postgres":
+                self._release_connections()
+
+            if self._single_flight_mode == "off":
+                return self._analyze(code, code_hash, report, route, bypass_cache, previous_analysis_id)
+
+            result, shared = self.single_flight.do(
+                self._flight_key(code_hash, route, previous_analysis_id),
+                lambda: self._analyze(code, code_hash, report, route, bypass_cache, previous_analysis_id),
+            )
+
+            return result.model_copy(update={"coalesced": True}) if shared else result
+
+    async def acode_analizer(
+        self,
+        code: str,
+        bypass_cache: bool = False,
+        previous_analysis_id: Optional[uuid.UUID] = None,
+        priority: str = "normal",
+    ) -> AnalysisDTO:
+        """
+        Event-loop variant of `code_analizer`: `analysis_history` is read and written through asyncpg and
+        identical requests wait on a future, so no thread is held while waiting on the database. The crew
+        run and the fingerprint and region tables stay synchronous and run in the thread pool.
+        """
+        with self._observed() as observe:
+            return observe(await self._acode_analizer(code, bypass_cache, previous_analysis_id, priority))
+
+    async def _acode_analizer(
+        self,
+        code: str,
+        bypass_cache: bool,
+        previous_analysis_id: Optional[uuid.UUID],
+        priority: str,
+    ) -> AnalysisDTO:
+        with self._http_errors():
+            report, local, route, code_hash = self._plan(code, priority)
+
+            if local is not None:
+                return local
+
+            if not bypass_cache:
+                with Telemetry.span("cache", self.llm_provider.model_name):
+                    cached = (
+                        await self._alookup(code_hash)
+                        or await run_in_threadpool(self._lookup_near_duplicate, code)
+                    )
+
+                if cached is not None:
+                    return cached
+
+            await run_in_threadpool(self._release_connections)
+
+            if self._single_flight_mode != "postgres":
+                await self.async_analyzer_repository.release()
+
+            if self._single_flight_mode == "off":
+                return await self._aanalyze(code, code_hash, report, route, bypass_cache, previous_analysis_id)
+
+            result, shared = await self.single_flight.ado(
+                self._flight_key(code_hash, route, previous_analysis_id),
+                lambda: self._aanalyze(code, code_hash, report, route, bypass_cache, previous_analysis_id),
+            )
+
+            return result.model_copy(update={"coalesced": True}) if shared else result
+
+    @contextmanager
+    def _observed(self) -> Iterator[Callable[[AnalysisDTO], AnalysisDTO]]:
+        """
+        Records the duration and outcome of an analysis; the block passes its result through the yielded
+        function, and an exception counts as an error.
+        """
+        start = time.perf_counter()
+        observed = {"model": self.llm_provider.model_name, "outcome": "error"}
+
+        def observe(result: AnalysisDTO) -> AnalysisDTO:
+            observed["model"] = result.model or observed["model"]
+            observed["outcome"] = "coalesced" if result.coalesced else result.cache.lower()
+
+            return result
 
-    def code_analizer(self, code: str) -> Optional[Dict[str, Any]]:
         try:
-            code_improvement_task = self.tasks.get_code_improvement_task(code)
-            crew = Crew(
-                agents=[
-                    self.agents.get_code_improvement_agent(),
-                ],
-                tasks=[code_improvement_task],
+            yield observe
+        finally:
+            Telemetry.observe_analysis(observed["model"], observed["outcome"], time.perf_counter() - start)
+
+    @staticmethod
+    @contextmanager
+    def _http_errors() -> Iterator[None]:
+        """
+        Turns the errors of an analysis into HTTP errors: 503 with `Retry-After` while the model is
+        unavailable, 500 for anything unexpected.
+        """
+        try:
+            yield
+        except HTTPException:
+            raise
+        except LLMUnavailableError as e:
+            raise HTTPException(
+                status_code=503,
+                detail=str(e),
+                headers={"Retry-After": str(math.ceil(e.retry_after))},
             )
-            crew_result = crew.kickoff()
-            analysis_entry = AnalysisHistory(
-                code_snippet=str(code),
-                suggestions=str(crew_result)
+        except Exception as e:
+            logging.error(e)
+            raise HTTPException(status_code=500, detail="Erro na análise de código")
+
+    def _plan(
+        self,
+        code: str,
+        priority: str,
+    ) -> Tuple[Optional[StaticReport], Optional[AnalysisDTO], Optional[ModelRoute], Optional[str]]:
+        """
+        The steps before the cache: the static analysis, and for snippets that need the model, their
+        route and cache key. Returns (report, local result, route, code hash); with a local result,
+        the route and key are None.
+        """
+        report, local = self._pre_analyze(code)
+
+        if local is not None:
+            return report, local, None, None
+
+        return report, None, self.router.select(code, report, priority), self.cache_key(code)
+
+    def stream_code_analizer(
+        self,
+        code: str,
+        bypass_cache: bool = False,
+        priority: str = "normal",
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yields `chunk` events with the model output as it is generated, then a `done` event carrying
+        the persisted analysis id. The analysis is only stored once the stream has finished.
+        """
+        try:
+            report, cached, route, code_hash = self._plan(code, priority)
+
+            if cached is None and not bypass_cache:
+                cached = self._lookup(code_hash) or self._lookup_near_duplicate(code)
+
+            if cached is not None:
+                yield {"event": "chunk", "data": cached.suggestions}
+                yield {"event": "done", "data": cached.model_dump(exclude={"suggestions"})}
+                return
+
+            self._release_connections()
+            chunks = []
+            llm_provider = self.router.pool(route.model, route.params).llm_provider
+            model_name = route.model
+
+            with Telemetry.span("prompt", model_name):
+                metrics = StaticAnalyzer.summary(report) if report else None
+                messages = self.tasks.get_code_improvement_messages(
+                    PromptCompactor.compact(code, self._compaction_level),
+                    metrics,
+                )
+                input_tokens = self._check_budget(TokenEstimator.count_messages(messages, model_name))
+
+            with Telemetry.span("llm", model_name, streamed=True):
+                for chunk in llm_provider.stream(messages):
+                    chunks.append(chunk)
+                    yield {"event": "chunk", "data": chunk}
+
+            suggestions = "".join(chunks)
+            result = AnalysisDTO(
+                suggestions=suggestions,
+                cache="BYPASS" if bypass_cache else "MISS",
+                input_tokens=input_tokens,
+                output_tokens=TokenEstimator.count(suggestions, model_name),
+                model=model_name,
             )
-            self.analyzer_repository.create(analysis_entry)
-            return str(crew_result)
+            result.id = self._store(code, code_hash, result)
+
+            yield {"event": "done", "data": result.model_dump(exclude={"suggestions"})}
+        except HTTPException as e:
+            yield {"event": "error", "data": e.detail}
+        except LLMUnavailableError as e:
+            yield {"event": "error", "data": str(e)}
         except Exception as e:
             logging.error(e)
-            raise HTTPException(status_code=500, detail=f"Erro na análise de código")
+            yield {"event": "error", "data": "Erro na análise de código"}
+        finally:
+            # The stream outlives the request scope, so the sessions it reopened are closed here.
+            self.close()
+
+    def close(self):
+        """
+        Closes the sessions of the service's repositories.
+        """
+        for repository in (self.analyzer_repository, self.fingerprint_repository, self.region_repository):
+            repository.session.close()
+
+    def _release_connections(self):
+        """
+        Ends the read transactions the cache lookups opened, so no pooled connection is held while the
+        model runs. In postgres single-flight mode the request's transaction holds the advisory lock,
+        so the request path keeps it open until the analysis is stored.
+        """
+        for repository in (self.analyzer_repository, self.fingerprint_repository, self.region_repository):
+            repository.release()
+
+    def batch_code_analizer(self, items: List[CodeDTO]) -> List[BatchItemDTO]:
+        """
+        Analyzes several snippets, returning one result per input in input order.
+
+        Identical snippets are analyzed once, cache misses run concurrently (bounded by
+        `ANALYSIS_BATCH_CONCURRENCY`) and all new analyses are stored in a single transaction.
+        A failing item only sets its own `error`.
+        """
+        results: Dict[int, BatchItemDTO] = {}
+        groups: Dict[str, List[int]] = {}
+        codes: Dict[str, str] = {}
+
+        for index, item in enumerate(items):
+            code_hash = self.cache_key(item.code)
+            groups.setdefault(code_hash, []).append(index)
+            codes.setdefault(code_hash, item.code)
+
+        pending = []
+        reports: Dict[str, Optional[StaticReport]] = {}
+        routes: Dict[str, ModelRoute] = {}
+
+        for code_hash, indexes in groups.items():
+            bypass_cache = any(items[index].bypass_cache for index in indexes)
+            priority = max((items[index].priority for index in indexes), key=PRIORITIES.index)
+
+            try:
+                reports[code_hash], cached = self._pre_analyze(codes[code_hash])
+                routes[code_hash] = self.router.select(codes[code_hash], reports[code_hash], priority)
+
+                if cached is None and not bypass_cache:
+                    cached = self._lookup(code_hash) or self._lookup_near_duplicate(codes[code_hash])
+            except Exception as e:
+                logging.error(e)
+                self.analyzer_repository.session.rollback()
+                cached = None
+
+            if cached is not None:
+                results.update({index: BatchItemDTO(index=index, result=cached) for index in indexes})
+            else:
+                pending.append((code_hash, bypass_cache))
+
+        analyzed: List[Tuple[str, str, AnalysisDTO]] = []
+        self._release_connections()
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self._batch_concurrency, len(pending))) as executor:
+                futures = {
+                    code_hash: executor.submit(self._kickoff, codes[code_hash], reports.get(code_hash), routes.get(code_hash))
+                    for code_hash, _ in pending
+                }
+
+                for code_hash, future in futures.items():
+                    try:
+                        analyzed.append((codes[code_hash], code_hash, future.result()))
+                    except Exception as e:
+                        logging.error(e)
+
+                        if isinstance(e, HTTPException):
+                            error = e.detail
+                        elif isinstance(e, LLMUnavailableError):
+                            error = str(e)
+                        else:
+                            error = "Erro na análise de código"
+
+                        results.update({
+                            index: BatchItemDTO(index=index, error=error)
+                            for index in groups[code_hash]
+                        })
+
+        try:
+            analysis_ids = self._store_many(analyzed)
+        except Exception as e:
+            logging.error(e)
+            self.analyzer_repository.session.rollback()
+            analysis_ids = None
+
+        bypassed = dict(pending)
+
+        for position, (_, code_hash, result) in enumerate(analyzed):
+            for index in groups[code_hash]:
+                if analysis_ids is None:
+                    results[index] = BatchItemDTO(index=index, error="Erro ao salvar a análise de código")
+                else:
+                    results[index] = BatchItemDTO(index=index, result=result.model_copy(update={
+                        "id": analysis_ids[position],
+                        "cache": "BYPASS" if bypassed[code_hash] else "MISS",
+                    }))
+
+        return [results[index] for index in range(len(items))]
+
+    def _analyze(
+        self,
+        code: str,
+        code_hash: str,
+        report: Optional[StaticReport],
+        route: ModelRoute,
+        bypass_cache: bool,
+        previous_analysis_id: Optional[uuid.UUID] = None,
+    ) -> AnalysisDTO:
+        if self._single_flight_mode != "postgres":
+            return self._analyze_and_store(code, code_hash, report, route, bypass_cache, previous_analysis_id)
+
+        # The lock lives in the request session's transaction, which the lookup below already holds a
+        # connection for, and is released by the commit that stores the analysis.
+        with self.analyzer_repository.advisory_lock(self._flight_key(code_hash, route, previous_analysis_id)):
+            if not bypass_cache:
+                # Another worker may have finished the same analysis while this one waited for the lock.
+                cached = self._lookup(code_hash)
+
+                if cached is not None:
+                    self.single_flight.record_shared()
+                    return cached.model_copy(update={"coalesced": True})
+
+            return self._analyze_and_store(code, code_hash, report, route, bypass_cache, previous_analysis_id)
+
+    async def _aanalyze(
+        self,
+        code: str,
+        code_hash: str,
+        report: Optional[StaticReport],
+        route: ModelRoute,
+        bypass_cache: bool,
+        previous_analysis_id: Optional[uuid.UUID] = None,
+    ) -> AnalysisDTO:
+        if self._single_flight_mode != "postgres":
+            return await self._aanalyze_and_store(code, code_hash, report, route, bypass_cache, previous_analysis_id)
+
+        async with self.async_analyzer_repository.advisory_lock(self._flight_key(code_hash, route, previous_analysis_id)):
+            if not bypass_cache:
+                cached = await self._alookup(code_hash)
+
+                if cached is not None:
+                    self.single_flight.record_shared()
+                    return cached.model_copy(update={"coalesced": True})
+
+            return await self._aanalyze_and_store(code, code_hash, report, route, bypass_cache, previous_analysis_id)
+
+    def _analyze_and_store(
+        self,
+        code: str,
+        code_hash: str,
+        report: Optional[StaticReport],
+        route: ModelRoute,
+        bypass_cache: bool,
+        previous_analysis_id: Optional[uuid.UUID] = None,
+    ) -> AnalysisDTO:
+        result, regions = self._generate(code, report, route, previous_analysis_id)
+
+        return self._stored(result, self._store(code, code_hash, result, regions), bypass_cache)
+
+    async def _aanalyze_and_store(
+        self,
+        code: str,
+        code_hash: str,
+        report: Optional[StaticReport],
+        route: ModelRoute,
+        bypass_cache: bool,
+        previous_analysis_id: Optional[uuid.UUID] = None,
+    ) -> AnalysisDTO:
+        result, regions = await run_in_threadpool(self._generate, code, report, route, previous_analysis_id)
+
+        return self._stored(result, await self._astore(code, code_hash, result, regions), bypass_cache)
+
+    @staticmethod
+    def _stored(result: AnalysisDTO, analysis_id: Optional[str], bypass_cache: bool) -> AnalysisDTO:
+        result.id = analysis_id
+        result.cache = "BYPASS" if bypass_cache else "MISS"
+
+        return result
+
+    def _generate(
+        self,
+        code: str,
+        report: Optional[StaticReport],
+        route: ModelRoute,
+        previous_analysis_id: Optional[uuid.UUID] = None,
+    ) -> Tuple[AnalysisDTO, List[AnalysisRegion]]:
+        if previous_analysis_id is not None:
+            return self._kickoff_incremental(code, report, previous_analysis_id, route)
+
+        return self._kickoff(code, report, route), []
+
+    @staticmethod
+    def _flight_key(code_hash: str, route: ModelRoute, previous_analysis_id: Optional[uuid.UUID]) -> str:
+        """
+        Identical requests share one analysis only when they would get the same one: the same code,
+        route and previous analysis.
+        """
+        return f"{code_hash}:{route.name}:{previous_analysis_id or ''}"
+
+    def _pre_analyze(self, code: str) -> Tuple[Optional[StaticReport], Optional[AnalysisDTO]]:
+        """
+        Runs the local static analysis. Snippets that do not parse or are trivial get a local report
+        right away; for the others the metrics are returned so they can be attached to the prompt.
+        """
+        if not self._static_analysis:
+            return None, None
+
+        with Telemetry.span("static", self.llm_provider.model_name):
+            report = StaticAnalyzer.analyze(code)
+
+        if not report.parsed or StaticAnalyzer.is_trivial(report, self._trivial_max_lines):
+            return report, AnalysisDTO(suggestions=StaticAnalyzer.local_report(report), cache="LOCAL")
+
+        return report, None
+
+    def _store(
+        self,
+        code: str,
+        code_hash: str,
+        result: AnalysisDTO,
+        regions: Optional[List[AnalysisRegion]] = None,
+    ) -> Optional[str]:
+        return self._store_many([(code, code_hash, result)], [regions or []])[0]
+
+    def _store_many(
+        self,
+        analyses: List[Tuple[str, str, AnalysisDTO]],
+        regions: Optional[List[List[AnalysisRegion]]] = None,
+    ) -> List[Optional[str]]:
+        """
+        Persists analyses with their fingerprints and regions and returns their ids. In write-behind mode
+        they are only queued, and an analysis is written on the request path only when the queue stays
+        full; a queued analysis has no id (None) and reaches the cache only once it is written.
+        """
+        if not analyses:
+            return []
+
+        entries = [self._history_entry(code, code_hash, result) for code, code_hash, result in analyses]
+        pending = self._pending(entries, regions or [[] for _ in entries])
+        # Read before the commit expires the instances, which would reload each one.
+        analysis_ids = [str(entry.id) for entry in entries]
+        queued = [self._deferred and self.writer.put(item) for item in pending]
+        written = [item for item, was_queued in zip(pending, queued) if not was_queued]
+
+        if written:
+            self._write(written, self.analyzer_repository, self.fingerprint_repository, self.region_repository)
+
+        return [None if was_queued else analysis_id for analysis_id, was_queued in zip(analysis_ids, queued)]
+
+    async def _astore(
+        self,
+        code: str,
+        code_hash: str,
+        result: AnalysisDTO,
+        regions: Optional[List[AnalysisRegion]] = None,
+    ) -> Optional[str]:
+        entry = self._history_entry(code, code_hash, result)
+        pending = self._pending([entry], [regions or []])
+        # Only wait for room in the queue on a worker thread, never on the event loop.
+        queued = self._deferred and (
+            self.writer.put(pending[0], block=False)
+            or await run_in_threadpool(self.writer.put, pending[0])
+        )
+
+        if queued:
+            return None
+
+        cached = self._cached(pending)
+
+        with Telemetry.span("db_commit", self.llm_provider.model_name, rows=1):
+            await self.async_analyzer_repository.create(entry)
+
+        await run_in_threadpool(self._write_related, pending, self.fingerprint_repository, self.region_repository)
+        self._remember(cached)
+
+        return str(entry.id)
+
+    @property
+    def _deferred(self) -> bool:
+        """
+        Whether new analyses go through the write-behind queue. Postgres single-flight writes them on the
+        request path, so the advisory lock covers the write and other workers find the row once it ends.
+        """
+        return self.write_behind and self._single_flight_mode != "postgres"
+
+    def _pending(self, entries: List[AnalysisHistory], regions: List[List[AnalysisRegion]]) -> List[PendingAnalysis]:
+        pending = []
+
+        with Telemetry.span("fingerprint", self.llm_provider.model_name, rows=len(entries)):
+            for entry, entry_regions in zip(entries, regions):
+                # A full analysis stores its definitions too, covered by its report, for later incremental ones.
+                entry_regions = entry_regions or self._covered_regions(entry.code_snippet)
+
+                for region in entry_regions:
+                    region.analysis_id = entry.id
+
+                pending.append((entry, self._fingerprint(entry.id, entry.code_snippet), entry_regions))
+
+        return pending
+
+    @classmethod
+    def flush_pending(cls, pending: List[PendingAnalysis]):
+        """
+        Writes a batch from the write-behind queue, a single transaction per table for the whole batch.
+        """
+        with BaseDBRepository.database.scope():
+            cls._write(pending, AnalyzerRepository(), FingerprintRepository(), RegionRepository())
+
+    @staticmethod
+    def describe_pending(item: PendingAnalysis) -> str:
+        return f"análise {item[0].id}"
+
+    @classmethod
+    def _write(
+        cls,
+        pending: List[PendingAnalysis],
+        analyzer_repository: AnalyzerRepository,
+        fingerprint_repository: FingerprintRepository,
+        region_repository: RegionRepository,
+    ):
+        cached = cls._cached(pending)
+
+        with Telemetry.span("db_commit", cls.agent_pool.llm_provider.model_name, rows=len(pending)):
+            analyzer_repository.create_many([entry for entry, _, _ in pending])
+
+        cls._write_related(pending, fingerprint_repository, region_repository)
+        cls._remember(cached)
+
+    @staticmethod
+    def _cached(pending: List[PendingAnalysis]) -> List[Tuple[str, Tuple[str, str, Optional[str]]]]:
+        # Read before the commit expires the instances, which would reload each one.
+        return [(entry.code_hash, (str(entry.id), entry.suggestions, entry.model)) for entry, _, _ in pending]
+
+    @classmethod
+    def _remember(cls, cached: List[Tuple[str, Tuple[str, str, Optional[str]]]]):
+        """
+        Puts stored analyses in the memory cache; only written rows go there, so a cached id always resolves.
+        """
+        for code_hash, value in cached:
+            cls._cache.set(code_hash, value)
+
+    @classmethod
+    def _write_related(
+        cls,
+        pending: List[PendingAnalysis],
+        fingerprint_repository: FingerprintRepository,
+        region_repository: RegionRepository,
+    ):
+        """
+        Writes the fingerprints and regions of analyses already stored. Failures only cost the
+        near-duplicate index or the incremental reuse, so they are logged rather than raised.
+        """
+        fingerprints = [fingerprint for _, fingerprint, _ in pending if fingerprint is not None]
+        regions = [region for _, _, entry_regions in pending for region in entry_regions]
+
+        if fingerprints:
+            try:
+                with Telemetry.span("db_fingerprint", cls.agent_pool.llm_provider.model_name, rows=len(fingerprints)):
+                    fingerprint_repository.create_many_with_bands(fingerprints)
+            except Exception as e:
+                fingerprint_repository.session.rollback()
+                logging.warning(f"Falha ao indexar a impressão digital das análises: {e}")
+
+        if regions:
+            try:
+                region_repository.create_many(regions)
+            except Exception as e:
+                region_repository.session.rollback()
+                logging.warning(f"Falha ao salvar as regiões da análise: {e}")
+
+    @staticmethod
+    def _history_entry(code: str, code_hash: str, result: AnalysisDTO) -> AnalysisHistory:
+        return AnalysisHistory(
+            id=uuid.uuid4(),
+            code_snippet=str(code),
+            suggestions=result.suggestions,
+            code_hash=code_hash,
+            input_tokens=result.input_tokens,
+            output_tokens=result.output_tokens,
+            model=result.model,
+        )
+
+    def _lookup(self, code_hash: str) -> Optional[AnalysisDTO]:
+        return self._lookup_memory(code_hash) or self._database_hit(
+            code_hash,
+            self.analyzer_repository.find_latest_by_hash(code_hash),
+        )
+
+    async def _alookup(self, code_hash: str) -> Optional[AnalysisDTO]:
+        return self._lookup_memory(code_hash) or self._database_hit(
+            code_hash,
+            await self.async_analyzer_repository.find_latest_by_hash(code_hash),
+        )
+
+    def _lookup_memory(self, code_hash: str) -> Optional[AnalysisDTO]:
+        cached = self._cache.get(code_hash)
+
+        if cached is None:
+            return None
+
+        analysis_id, suggestions, model = cached
+
+        return AnalysisDTO(id=analysis_id, suggestions=suggestions, cache="HIT", cache_tier="memory", model=model)
+
+    def _database_hit(self, code_hash: str, analysis_entry: Optional[AnalysisHistory]) -> Optional[AnalysisDTO]:
+        if analysis_entry is None:
+            return None
+
+        self._cache.set(code_hash, (str(analysis_entry.id), analysis_entry.suggestions, analysis_entry.model))
+
+        return AnalysisDTO(
+            id=str(analysis_entry.id),
+            suggestions=analysis_entry.suggestions,
+            cache="HIT",
+            cache_tier="database",
+            model=analysis_entry.model,
+        )
+
+    def _lookup_near_duplicate(self, code: str) -> Optional[AnalysisDTO]:
+        if self._near_duplicate_threshold > 1:
+            return None
+
+        signature = CodeFingerprint.signature(code)
+        band_keys = CodeFingerprint.band_keys(signature, *self.context())
+        best_id, best_similarity = None, 0.0
+
+        for analysis_id, packed in self.fingerprint_repository.find_candidates(band_keys):
+            similarity = CodeFingerprint.similarity(signature, CodeFingerprint.unpack(packed))
+
+            if similarity > best_similarity:
+                best_id, best_similarity = analysis_id, similarity
+
+        if best_id is None or best_similarity < self._near_duplicate_threshold:
+            return None
+
+        analysis_entry = self.analyzer_repository.find_by(id=best_id).one_or_none()
+
+        if analysis_entry is None:
+            return None
+
+        return AnalysisDTO(
+            id=str(analysis_entry.id),
+            suggestions=analysis_entry.suggestions,
+            cache="HIT",
+            cache_tier="near-duplicate",
+            near_duplicate=True,
+            similarity=best_similarity,
+            model=analysis_entry.model,
+        )
+
+    def _fingerprint(self, analysis_id: uuid.UUID, code: str) -> Optional[Tuple[AnalysisFingerprint, List[str]]]:
+        try:
+            signature = CodeFingerprint.signature(code)
+        except Exception as e:
+            logging.warning(f"Falha ao indexar a impressão digital das análises: {e}")
+            return None
+
+        return (
+            AnalysisFingerprint(analysis_id=analysis_id, signature=CodeFingerprint.pack(signature)),
+            CodeFingerprint.band_keys(signature, *self.context()),
+        )
+
+    def _check_budget(self, prompt_tokens: int) -> int:
+        if self._token_budget and prompt_tokens > self._token_budget:
+            raise HTTPException(
+                status_code=413,
+                detail=f"O código excede o orçamento de {self._token_budget} tokens por prompt ({prompt_tokens} estimados).",
+            )
+
+        return prompt_tokens
+
+    def _kickoff(self, code: str, report: Optional[StaticReport] = None, route: Optional[ModelRoute] = None) -> AnalysisDTO:
+        route = route or self.router.default
+        model_name = route.model
+
+        with Telemetry.span("prompt", model_name):
+            metrics = StaticAnalyzer.summary(report) if report else None
+            compacted = PromptCompactor.compact(code, self._compaction_level)
+            prompt_tokens = TokenEstimator.count_messages(
+                self.tasks.get_code_improvement_messages(compacted, metrics),
+                model_name,
+            )
+
+        chunked = bool(self._chunk_min_lines) and len(CodeNormalizer.normalize(code).split("\n")) >= self._chunk_min_lines
+        over_budget = bool(self._token_budget) and prompt_tokens > self._token_budget
+
+        if chunked or (over_budget and self._budget_policy == "chunk"):
+            chunks = CodeChunker.split(
+                PromptCompactor.compact(code, self._compaction_level, keep_lines=True),
+                max_lines=self._chunk_max_lines,
+            )
+
+            if len(chunks) > 1:
+                return self._kickoff_chunked(chunks, report, route)
+
+        self._check_budget(prompt_tokens)
+        suggestions, model, hedged = self._call_model(
+            route,
+            lambda pool: self._run_crew(pool, "llm", lambda tasks: tasks.get_code_improvement_task(compacted, metrics)),
+        )
+
+        return AnalysisDTO(
+            suggestions=suggestions,
+            input_tokens=prompt_tokens,
+            output_tokens=TokenEstimator.count(suggestions, model),
+            model=model,
+            hedged=hedged,
+        )
+
+    def _kickoff_chunked(
+        self,
+        chunks: List[CodeChunk],
+        report: Optional[StaticReport] = None,
+        route: Optional[ModelRoute] = None,
+    ) -> AnalysisDTO:
+        findings, input_tokens, output_tokens = self._review_chunks(chunks, report, route or self.router.default)
+
+        return self._reduce(findings, input_tokens, output_tokens)
+
+    def _kickoff_incremental(
+        self,
+        code: str,
+        report: Optional[StaticReport],
+        previous_analysis_id: uuid.UUID,
+        route: Optional[ModelRoute] = None,
+    ) -> Tuple[AnalysisDTO, List[AnalysisRegion]]:
+        """
+        Reviews only the definitions whose content changed since a previous analysis and carries the
+        stored findings over for the others, so the LLM cost follows the size of the diff.
+        """
+        route = route or self.router.default
+        previous_suggestions = self.analyzer_repository.find_suggestions(previous_analysis_id)
+
+        if previous_suggestions is None:
+            raise HTTPException(status_code=404, detail="Análise anterior não encontrada.")
+
+        # Every stored analysis keeps the hashes of its top-level definitions; those with empty findings
+        # are covered by its whole report.
+        previous = self.region_repository.find_by_hash(previous_analysis_id)
+
+        if self._single_flight_mode != "postgres":
+            self._release_connections()
+
+        definitions = self._definitions(code)
+
+        if not definitions:
+            return self._kickoff(code, report, route), []
+
+        changed = [chunk for chunk, region_hash in definitions if region_hash not in previous]
+        reviewed, input_tokens, output_tokens = self._review_chunks(changed, report, route)
+        reviewed = iter(reviewed)
+        findings: List[Dict[str, Any]] = []
+        covered: List[str] = []
+        regions: List[AnalysisRegion] = []
+        reused: List[str] = []
+
+        for chunk, region_hash in definitions:
+            stored = previous.get(region_hash)
+
+            if stored is None:
+                finding = next(reviewed)
+            else:
+                reused.append(chunk.names[0])
+                region = f"{chunk.names[0]} (lines {chunk.start_line}-{chunk.end_line}"
+                shift = chunk.start_line - stored.start_line
+
+                if shift:
+                    region += f"; reviewed earlier at lines {stored.start_line}-{stored.end_line}, shift its line references by {shift:+d}"
+
+                finding = {"region": f"{region})", "findings": stored.findings}
+
+            # Empty findings mean the region is covered by the whole report of the previous analysis.
+            if finding["findings"]:
+                findings.append(finding)
+            else:
+                covered.append(finding["region"])
+
+            regions.append(AnalysisRegion(
+                name=chunk.names[0][:255],
+                start_line=chunk.start_line,
+                end_line=chunk.end_line,
+                region_hash=region_hash,
+                findings=finding["findings"],
+            ))
+
+        if covered:
+            findings.append({
+                "region": f"Unchanged since the previous report, keep only what it says about: {'; '.join(covered)}",
+                "findings": previous_suggestions,
+            })
+
+        result = self._reduce(findings, input_tokens, output_tokens)
+        result.reused_regions = reused
+        result.analyzed_regions = [chunk.names[0] for chunk in changed]
+
+        return result, regions
+
+    def _covered_regions(self, code: str) -> List[AnalysisRegion]:
+        return [
+            AnalysisRegion(
+                name=chunk.names[0][:255],
+                start_line=chunk.start_line,
+                end_line=chunk.end_line,
+                region_hash=region_hash,
+                findings="",
+            )
+            for chunk, region_hash in self._definitions(code)
+        ]
+
+    def _definitions(self, code: str) -> List[Tuple[CodeChunk, str]]:
+        """
+        The top-level definitions of a snippet, each with the hash its findings are stored under.
+        """
+        chunks = CodeChunker.definitions(
+            PromptCompactor.compact(code, self._compaction_level, keep_lines=True),
+            max_lines=self._chunk_max_lines,
+        )
+
+        return [(chunk, CodeNormalizer.digest(chunk.digest, *self.context())) for chunk in chunks]
+
+    def _review_chunks(
+        self,
+        chunks: List[CodeChunk],
+        report: Optional[StaticReport],
+        route: ModelRoute,
+    ) -> Tuple[List[Dict[str, Any]], int, int]:
+        if not chunks:
+            return [], 0, 0
+
+        model_name = route.model
+        prompts = [
+            (chunk, StaticAnalyzer.summary(report, chunk.names) if report else None)
+            for chunk in chunks
+        ]
+        input_tokens = sum(
+            self._check_budget(TokenEstimator.count(self.tasks.get_chunk_review_description(chunk, metrics), model_name))
+            for chunk, metrics in prompts
+        )
+
+        with ThreadPoolExecutor(max_workers=min(self._chunk_concurrency, len(chunks))) as executor:
+            findings = list(executor.map(lambda prompt: self._review_chunk(*prompt, route), prompts))
+
+        output_tokens = sum(TokenEstimator.count(finding["findings"], finding["model"]) for finding in findings)
+
+        return findings, input_tokens, output_tokens
+
+    def _reduce(self, findings: List[Dict[str, Any]], input_tokens: int = 0, output_tokens: int = 0) -> AnalysisDTO:
+        reduce_provider = self.agent_pool.reduce_llm_provider
+        reduce_messages = self.tasks.get_reduce_messages(findings)
+
+        with Telemetry.span("llm_reduce", reduce_provider.model_name, findings=len(findings)):
+            suggestions = reduce_provider.complete(reduce_messages)
+
+        # The models that reviewed the code; the reduce model only merges their findings.
+        models = list(dict.fromkeys(finding["model"] for finding in findings if "model" in finding))
+
+        return AnalysisDTO(
+            suggestions=suggestions,
+            input_tokens=input_tokens + TokenEstimator.count_messages(reduce_messages, reduce_provider.model_name),
+            output_tokens=output_tokens + TokenEstimator.count(suggestions, reduce_provider.model_name),
+            model=", ".join(models) or reduce_provider.model_name,
+            hedged=any(finding.get("hedged") for finding in findings),
+        )
+
+    def _review_chunk(self, chunk: CodeChunk, metrics: Optional[str], route: ModelRoute) -> Dict[str, Any]:
+        findings, model, hedged = self._call_model(
+            route,
+            lambda pool: self._run_crew(pool, "llm_chunk", lambda tasks: tasks.get_chunk_review_task(chunk, metrics)),
+        )
+
+        return {
+            "region": f"{', '.join(chunk.names)} (lines {chunk.start_line}-{chunk.end_line})",
+            "findings": findings,
+            "model": model,
+            "hedged": hedged,
+        }
+
+    def _run_crew(self, pool: AgentPool, stage: str, build_task: Callable[[Tasks], Task]) -> str:
+        with pool.acquire() as agents:
+            crew = Crew(
+                agents=[
+                    agents.get_code_improvement_agent(),
+                ],
+                tasks=[build_task(Tasks(agents))],
+            )
+
+            with Telemetry.span(stage, pool.llm_provider.model_name):
+                return str(pool.llm_provider.governor.call(crew.kickoff))
+
+    def _call_model(self, route: ModelRoute, run: Callable[[AgentPool], str]) -> Tuple[str, str, bool]:
+        """
+        Runs `run` on the route's agent pool and returns (text, model, hedged).
+
+        Once the route has a latency history, a call still running at its latency quantile is also sent
+        to the route's hedge model and whichever answers first wins; the slower call finishes in the
+        background, since a crew run cannot be cancelled.
+        """
+        primary = self.router.pool(route.model, route.params)
+        delay = self.router.hedge_delay(route)
+
+        def timed() -> str:
+            start = time.perf_counter()
+            text = run(primary)
+            self.router.observe(route, time.perf_counter() - start)
+
+            return text
+
+        if delay is None:
+            return timed(), route.model, False
+
+        # Each call runs on the threads of its own agent pool, so primaries never queue behind hedges
+        # (or behind other routes) and the number of parallel calls is bounded only by the agents.
+        futures = {primary.executor.submit(timed): route.model}
+        done, _ = wait(futures, timeout=delay)
+
+        if not done:
+            Telemetry.LLM_HEDGED.labels(model=route.model, hedge_model=route.hedge_model).inc()
+            hedge = self.router.pool(route.hedge_model)
+            futures[hedge.executor.submit(run, hedge)] = route.hedge_model
+
+        error: Optional[BaseException] = None
+
+        for future in as_completed(futures):
+            try:
+                text = future.result()
+            except Exception as e:
+                error = e
+                continue
+
+            if futures[future] != route.model:
+                Telemetry.LLM_HEDGE_WINS.labels(model=route.model, hedge_model=route.hedge_model).inc()
+
+            return text, futures[future], len(futures) > 1
+
+        raise error
@@ -0,0 +1,183 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+from itertools import chain
+from fastapi import HTTPException, Depends
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from repositories import AnalyzerRepository, ArchiveRepository
+from services.retention import PartitionMaintenance
+from utils import Environment
+
+
+class AnalysisHistoryService:
+    FIELDS = ("id", "created_at", "code_hash", "model", "input_tokens", "output_tokens", "code_snippet", "suggestions")
+    DEFAULT_FIELDS = ("id", "created_at", "code_hash", "model", "input_tokens", "output_tokens")
+    _export_batch_size: int = int(Environment.get("HISTORY_EXPORT_BATCH_SIZE", 1000))
+    _headline_options: str = Environment.get(
+        "SEARCH_HEADLINE_OPTIONS",
+        "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter=\" ... \"",
+    )
+    maintenance: PartitionMaintenance = PartitionMaintenance(
+        interval=float(Environment.get("HISTORY_MAINTENANCE_INTERVAL", 3600)),
+        partitions_ahead=int(Environment.get("HISTORY_PARTITIONS_AHEAD", 3)),
+        retention_months=int(Environment.get("HISTORY_RETENTION_MONTHS", 0)),
+        batch_size=int(Environment.get("HISTORY_EXPORT_BATCH_SIZE", 1000)),
+    )
+
+    def __init__(
+        self,
+        analyzer_repository: AnalyzerRepository = Depends(),
+        archive_repository: ArchiveRepository = Depends(),
+    ):
+        self.analyzer_repository = analyzer_repository
+        self.archive_repository = archive_repository
+
+    def page(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        fields: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Returns one page of analyses, newest first, and the cursor of the next page, if any.
+        """
+        rows = self.analyzer_repository.find_page(
+            self._fields(fields),
+            limit + 1,
+            after=self._decode_cursor(cursor),
+            created_from=created_from,
+            created_to=created_to,
+        )
+
+        return {
+            "items": [self._serialize(row) for row in rows[:limit]],
+            "next_cursor": self._encode_cursor(rows[limit - 1]) if len(rows) > limit else None,
+        }
+
+    def export(
+        self,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        fields: Optional[str] = None,
+        include_archived: bool = False,
+    ) -> Iterator[str]:
+        """
+        Returns the matching analyses as NDJSON lines, oldest first. The fields are validated before
+        the first line is produced, so an invalid request still gets a `400`.
+
+        With `include_archived`, the analyses moved to the archive files by retention come first; they
+        are all older than the ones still in the database.
+        """
+        selected = self._fields(fields)
+
+        if include_archived and not self.archive_repository.available:
+            raise HTTPException(status_code=501, detail="Leitura do arquivo indisponível: o pacote pyarrow não está instalado.")
+
+        rows = self.analyzer_repository.iter_rows(
+            selected,
+            created_from=created_from,
+            created_to=created_to,
+            batch_size=self._export_batch_size,
+        )
+
+        if include_archived:
+            archived = self.archive_repository.iter_rows(
+                selected,
+                created_from=created_from,
+                created_to=created_to,
+                batch_size=self._export_batch_size,
+            )
+            rows = chain(archived, rows)
+
+        return self._lines(rows)
+
+    def _lines(self, rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+        # The response is streamed after the request scope has closed its sessions, so the session
+        # reopened by the export is closed here.
+        try:
+            for row in rows:
+                yield json.dumps(self._serialize(row), ensure_ascii=False) + "\n"
+        finally:
+            self.analyzer_repository.reader.close()
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """
+        Returns one page of the analyses matching `query`, best ranked first, with highlighted excerpts
+        of the suggestions and of the code, and the offset of the next page, if any.
+        """
+        rows = self.analyzer_repository.search(query, limit + 1, offset, created_from, created_to)
+        page = rows[:limit]
+        excerpts = self.analyzer_repository.headlines(
+            query,
+            [text for row in page for text in (row["suggestions"], row["code_snippet"])],
+            self._headline_options,
+        )
+
+        return {
+            "items": [
+                self._serialize({
+                    "id": row["id"],
+                    "created_at": row["created_at"],
+                    "code_hash": row["code_hash"],
+                    "model": row["model"],
+                    "rank": round(row["rank"], 6),
+                    "suggestions_excerpt": excerpts[2 * index],
+                    "code_excerpt": excerpts[2 * index + 1],
+                })
+                for index, row in enumerate(page)
+            ],
+            "next_offset": offset + limit if len(rows) > limit else None,
+        }
+
+    def _fields(self, fields: Optional[str]) -> List[str]:
+        if not fields:
+            return list(self.DEFAULT_FIELDS)
+
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in requested if field not in self.FIELDS]
+
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Campos inválidos: {', '.join(unknown)}. Disponíveis: {', '.join(self.FIELDS)}.",
+            )
+
+        # The cursor is built from these two, so they are always returned.
+        return ["id", "created_at"] + [field for field in dict.fromkeys(requested) if field not in ("id", "created_at")]
+
+    @staticmethod
+    def _serialize(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            key: value.isoformat() if isinstance(value, datetime) else str(value) if isinstance(value, uuid.UUID) else value
+            for key, value in row.items()
+        }
+
+    @staticmethod
+    def _encode_cursor(row: Dict[str, Any]) -> str:
+        payload = json.dumps([row["created_at"].isoformat(), str(row["id"])])
+
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, str]]:
+        if not cursor:
+            return None
+
+        try:
+            created_at, analysis_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+
+            return datetime.fromisoformat(created_at), str(uuid.UUID(analysis_id))
+        except (binascii.Error, ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Cursor inválido.")
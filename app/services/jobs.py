@@ -0,0 +1,195 @@
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, Depends
+from typing import Any, Dict, Optional
+
+from entities import AnalysisJob
+from entities.llm_governor import LLMUnavailableError
+from repositories import AnalyzerRepository, FingerprintRepository, JobRepository, RegionRepository
+from repositories.base_db import BaseDBRepository
+from services.code_analizer import CodeAnalyzerService
+from utils import Environment
+
+logger = logging.getLogger("application.service")
+
+
+class JobWorkerPool:
+    """
+    A bounded, process-wide pool that claims pending jobs from `analysis_job` and runs them.
+
+    Postgres is the queue: every process polls it with `SKIP LOCKED`, so jobs survive restarts
+    and are picked up by whichever worker process has a free slot. A job that fails while the model
+    is unavailable goes back to the queue with exponential backoff until `max_attempts`.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        poll_interval: float,
+        lease: float,
+        max_attempts: int,
+        retry_backoff: float = 10,
+        retry_backoff_max: float = 300,
+    ):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self._executor = None
+        self._thread = None
+        self._busy = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="analysis-job")
+        self._thread = threading.Thread(target=self._loop, name="analysis-job-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, wait: bool = True):
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        self._thread = None
+        self._executor = None
+
+    def notify(self):
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                with JobRepository() as repository:
+                    repository.requeue_stale(self.lease, self.max_attempts)
+
+                self._dispatch()
+            except Exception as e:
+                logger.error(f"Falha ao despachar jobs de análise: {e}")
+
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _dispatch(self):
+        with self._lock:
+            free = self.workers - self._busy
+
+        if free <= 0:
+            return
+
+        with JobRepository() as repository:
+            job_ids = repository.claim_pending(free)
+
+        with self._lock:
+            self._busy += len(job_ids)
+
+        for job_id in job_ids:
+            self._executor.submit(self._run, job_id)
+
+    def _run(self, job_id: Any):
+        try:
+            # The job's repositories share one session, closed as soon as the job ends.
+            with BaseDBRepository.database.scope():
+                self._execute(job_id)
+        finally:
+            with self._lock:
+                self._busy -= 1
+
+            self._wake.set()
+
+    def _execute(self, job_id: Any):
+        repository = JobRepository()
+        attempts = None
+
+        try:
+            job = repository.find_by(id=job_id).one()
+            attempts = job.attempts
+            service = CodeAnalyzerService(AnalyzerRepository(), FingerprintRepository(), RegionRepository())
+            # The job row references the analysis, so it must be in the table before `finish`.
+            service.write_behind = False
+            result = service.code_analizer(job.code_snippet, bypass_cache=job.bypass_cache)
+
+            if result.id is None:
+                repository.finish(job_id, local_result=result.suggestions)
+            else:
+                repository.finish(job_id, uuid.UUID(result.id))
+        except Exception as e:
+            repository.session.rollback()
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            delay = self._retry_delay(e, attempts) if attempts is not None else None
+
+            if delay is None:
+                logger.error(f"Job de análise {job_id} falhou: {detail}")
+                repository.fail(job_id, str(detail))
+            else:
+                logger.warning(f"Job de análise {job_id} será tentado novamente em {delay:.0f}s: {detail}")
+                repository.retry(job_id, str(detail), delay)
+
+    def _retry_delay(self, error: Exception, attempts: int) -> Optional[float]:
+        """
+        Seconds to wait before running a job again after `error`, or None when it must fail now: the
+        error is permanent (anything but the model being unavailable) or every attempt was used.
+        The exponential backoff never undercuts the provider's `Retry-After`.
+        """
+        if isinstance(error, LLMUnavailableError):
+            retry_after = error.retry_after
+        elif isinstance(error, HTTPException) and error.status_code == 503:
+            retry_after = float((error.headers or {}).get("Retry-After", 0))
+        else:
+            return None
+
+        if attempts >= self.max_attempts:
+            return None
+
+        return max(retry_after, min(self.retry_backoff_max, self.retry_backoff * 2 ** (attempts - 1)))
+
+
+class AnalysisJobService:
+    pool: JobWorkerPool = JobWorkerPool(
+        workers=int(Environment.get("ANALYSIS_JOB_WORKERS", 4)),
+        poll_interval=float(Environment.get("ANALYSIS_JOB_POLL_INTERVAL", 2)),
+        lease=float(Environment.get("ANALYSIS_JOB_LEASE", 600)),
+        max_attempts=int(Environment.get("ANALYSIS_JOB_MAX_ATTEMPTS", 3)),
+        retry_backoff=float(Environment.get("ANALYSIS_JOB_RETRY_BACKOFF", 10)),
+        retry_backoff_max=float(Environment.get("ANALYSIS_JOB_RETRY_BACKOFF_MAX", 300)),
+    )
+
+    def __init__(self, job_repository: JobRepository = Depends()):
+        self.job_repository = job_repository
+
+    def submit(self, code: str, bypass_cache: bool = False) -> Dict[str, Any]:
+        job = AnalysisJob(
+            id=uuid.uuid4(),
+            code_snippet=str(code),
+            bypass_cache=bypass_cache,
+            status=AnalysisJob.PENDING,
+            attempts=0,
+        )
+        self.job_repository.create(job)
+        self.pool.notify()
+
+        return job.as_dict()
+
+    def get(self, job_id: uuid.UUID) -> Dict[str, Any]:
+        found = self.job_repository.find_with_result(job_id)
+
+        if found is None:
+            raise HTTPException(status_code=404, detail="Job de análise não encontrado.")
+
+        job, suggestions = found
+        result = job.as_dict()
+        result["result"] = suggestions
+
+        return result
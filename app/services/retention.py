@@ -0,0 +1,107 @@
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from repositories.archive import ArchiveRepository
+from repositories.partition import PartitionRepository, add_months
+
+logger = logging.getLogger("application.service")
+
+
+class PartitionMaintenance:
+    """
+    Keeps the monthly partitions of `analysis_history` ahead of the clock and, when a retention is set,
+    moves the partitions older than it to columnar files.
+
+    Every process runs it; a Postgres advisory lock lets only one of them work at a time.
+    """
+
+    LOCK_KEY = "analysis_history_partitions"
+
+    def __init__(self, interval: float, partitions_ahead: int, retention_months: int, batch_size: int):
+        self.interval = interval
+        self.partitions_ahead = partitions_ahead
+        self.retention_months = retention_months
+        self.batch_size = batch_size
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="analysis-history-partitions", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def run_once(self) -> Dict[str, Any]:
+        """
+        Creates the missing future partitions, then archives the expired ones. Returns what was done.
+        """
+        result = {"locked": False, "created": [], "archived": []}
+
+        with PartitionRepository() as repository, repository.try_lock(self.LOCK_KEY) as acquired:
+            if not acquired:
+                return result
+
+            result["locked"] = True
+            result["created"] = self.ensure_partitions(repository)
+
+            if self.retention_months > 0:
+                result["archived"] = self.archive_expired(repository)
+
+        return result
+
+    def ensure_partitions(self, repository: PartitionRepository) -> List[str]:
+        current = datetime.now(timezone.utc).date().replace(day=1)
+        months = [add_months(current, offset) for offset in range(self.partitions_ahead + 1)]
+
+        return [repository.partition_name(month) for month in months if repository.create_partition(month)]
+
+    def archive_expired(self, repository: PartitionRepository) -> List[str]:
+        archive = ArchiveRepository()
+
+        if not archive.available:
+            logger.warning("HISTORY_RETENTION_MONTHS definido, mas o pacote pyarrow não está instalado; nada foi arquivado.")
+            return []
+
+        oldest_kept = add_months(datetime.now(timezone.utc).date().replace(day=1), -self.retention_months)
+        # Partitions detached by an interrupted run come first, so they are finished before new ones are detached.
+        attached = repository.attached()
+        expired = repository.detached() + [name for name in attached if repository.partition_month(name) < oldest_kept]
+        archived = []
+
+        for name in expired:
+            if name in attached:
+                repository.detach(name)
+
+            path, count = archive.write(name, repository.iter_partition(name, self.batch_size), self.batch_size)
+            dropped = repository.purge(name)
+
+            if dropped != count:
+                # Nothing writes to a detached partition, so this only happens if it was changed by hand.
+                logger.warning(f"Partição {name}: {count} linhas arquivadas, {dropped} removidas.")
+
+            logger.info(f"Partição {name} arquivada em {os.path.abspath(path)} ({count} linhas).")
+            archived.append(name)
+
+        return archived
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Falha na manutenção das partições de analysis_history: {e}")
+
+            self._stop.wait(self.interval)
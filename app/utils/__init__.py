@@ -7,3 +7,8 @@ from .logger import (
 from .checkers import Checkers as Checkers
 from .policy import Policy as Policy
 from .environment import Environment as Environment
+from .cache import TTLCache as TTLCache
+from .singleflight import SingleFlight as SingleFlight
+from .telemetry import Telemetry as Telemetry
+from .write_behind import WriteBehindQueue as WriteBehindQueue
+from .compression import BlobCodec as BlobCodec
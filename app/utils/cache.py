@@ -0,0 +1,91 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+#
+
+class TTLCache:
+    """
+    A thread-safe, size-bounded LRU cache whose entries expire after a time-to-live.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        """
+        Initializes the cache.
+
+        Args:
+            maxsize (int): Maximum number of entries kept; the least recently used entry is evicted first.
+            ttl (Optional[float]): Default time-to-live in seconds. None keeps entries until they are evicted.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Retrieve a value and mark it as recently used.
+
+        Args:
+            key (Hashable): The cache key.
+            default (Any): The value returned when the key is missing or expired.
+
+        Returns:
+            Any: The cached value, or `default`.
+        """
+        with self._lock:
+            item = self._data.get(key)
+
+            if item is None:
+                return default
+
+            expires_at, value = item
+
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Store a value, evicting the least recently used entries when the cache is full.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to store.
+            ttl (Optional[float]): Time-to-live for this entry. Falls back to the cache default.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Remove a key and return its value, or `default` if it is not cached.
+        """
+        with self._lock:
+            item = self._data.pop(key, None)
+
+        return default if item is None else item[1]
+
+    def clear(self):
+        """
+        Remove every entry from the cache.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, self) is not self
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,79 @@
+import hashlib
+import zlib
+from typing import Tuple
+#
+from .environment import Environment
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class BlobCodec:
+    """
+    Compression of the text bodies kept in the content-addressed blob table: zstd when `zstandard`
+    is installed, zlib otherwise. Each blob records its codec, so blobs written with either one stay readable.
+    """
+
+    CODEC: str = Environment.get("BLOB_CODEC", "zstd" if zstandard else "zlib")
+    LEVEL: int = int(Environment.get("BLOB_COMPRESSION_LEVEL", 3 if zstandard else 6))
+
+    @staticmethod
+    def digest(raw: bytes) -> str:
+        """
+        The content address of a body.
+
+        Args:
+            raw (bytes): The uncompressed body.
+
+        Returns:
+            str: Its SHA-256, in hex.
+        """
+        return hashlib.sha256(raw).hexdigest()
+
+    @classmethod
+    def compress(cls, raw: bytes) -> Tuple[str, bytes]:
+        """
+        Compress a body with the configured codec.
+
+        Args:
+            raw (bytes): The uncompressed body.
+
+        Returns:
+            Tuple[str, bytes]: The codec used (`zstd`, `zlib` or `none`) and the stored bytes.
+        """
+        if cls.CODEC == "none":
+            return "none", raw
+
+        if cls.CODEC == "zstd" and zstandard is not None:
+            # Compressor objects are not thread-safe, so each call gets its own.
+            return "zstd", zstandard.ZstdCompressor(level=cls.LEVEL).compress(raw)
+
+        return "zlib", zlib.compress(raw, min(cls.LEVEL, 9))
+
+    @staticmethod
+    def decompress(codec: str, data: bytes) -> bytes:
+        """
+        Restore a body stored by `compress`.
+
+        Args:
+            codec (str): The codec recorded with the blob.
+            data (bytes): The stored bytes.
+
+        Returns:
+            bytes: The uncompressed body.
+
+        Raises:
+            ValueError: If the codec is unknown, or is zstd and `zstandard` is not installed.
+        """
+        if codec == "none":
+            return bytes(data)
+
+        if codec == "zlib":
+            return zlib.decompress(data)
+
+        if codec == "zstd" and zstandard is not None:
+            return zstandard.ZstdDecompressor().decompress(data)
+
+        raise ValueError(f"Unsupported blob codec: {codec}")
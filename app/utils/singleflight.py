@@ -0,0 +1,132 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs the function and every
+    caller that arrives while it is still running waits for, and receives, the same result.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._executed = 0
+        self._shared = 0
+        self._external = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run `fn` once for all concurrent callers of `key`.
+
+        Args:
+            key (Hashable): Identifies equivalent calls.
+            fn (Callable[[], Any]): The function run by the first caller.
+
+        Returns:
+            Tuple[Any, bool]: The result and whether it was shared from another caller's run.
+            An exception raised by `fn` is re-raised in every caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+
+            if leader:
+                call = self._calls[key] = _Call()
+                self._executed += 1
+            else:
+                self._shared += 1
+
+        if not leader:
+            call.done.wait()
+
+            if call.error is not None:
+                raise call.error
+
+            return call.value, True
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+            call.done.set()
+
+        return call.value, False
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Async variant of `do`: callers wait on a future instead of blocking a thread. Keys are
+        coalesced only with other `ado` callers on the same event loop.
+
+        Args:
+            key (Hashable): Identifies equivalent calls.
+            fn (Callable[[], Awaitable[Any]]): The coroutine function awaited by the first caller.
+
+        Returns:
+            Tuple[Any, bool]: The result and whether it was shared from another caller's run.
+        """
+        with self._lock:
+            future = self._async_calls.get(key)
+            leader = future is None
+
+            if leader:
+                future = self._async_calls[key] = asyncio.get_running_loop().create_future()
+                self._executed += 1
+            else:
+                self._shared += 1
+
+        if not leader:
+            # Shielded, so a follower that is cancelled does not cancel the leader's result.
+            return await asyncio.shield(future), True
+
+        try:
+            value = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting for it.
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            with self._lock:
+                del self._async_calls[key]
+
+        return value, False
+
+    def record_shared(self):
+        """
+        Count a call saved outside this process, e.g. a result produced by another worker.
+        """
+        with self._lock:
+            self._external += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns how many calls ran, how many were saved and how many are still in flight.
+        """
+        with self._lock:
+            return {
+                "executed": self._executed,
+                "saved": self._shared + self._external,
+                "saved_in_process": self._shared,
+                "saved_across_workers": self._external,
+                "in_flight": len(self._calls) + len(self._async_calls),
+            }
@@ -0,0 +1,210 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Tuple
+#
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+logger = logging.getLogger("application.engine")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+
+class Telemetry:
+    """
+    Per-stage spans and request histograms, exported in the Prometheus format and, optionally, over OTLP.
+    """
+
+    STAGE_SECONDS = Histogram(
+        "analysis_stage_seconds",
+        "Time spent in each stage of an analysis.",
+        ["stage", "model", "outcome"],
+        buckets=LATENCY_BUCKETS,
+    )
+    ANALYSIS_SECONDS = Histogram(
+        "analysis_request_seconds",
+        "End-to-end time of an analysis, by how it was answered.",
+        ["model", "outcome"],
+        buckets=LATENCY_BUCKETS,
+    )
+    ANALYSIS_TOTAL = Counter(
+        "analysis_requests_total",
+        "Analyses served, by how they were answered.",
+        ["model", "outcome"],
+    )
+    HTTP_SECONDS = Histogram(
+        "http_request_seconds",
+        "HTTP request duration.",
+        ["method", "route", "status"],
+        buckets=LATENCY_BUCKETS,
+    )
+    LLM_CONCURRENCY_LIMIT = Gauge(
+        "llm_concurrency_limit",
+        "Current adaptive limit of concurrent LLM calls.",
+        ["model"],
+        multiprocess_mode="livesum",
+    )
+    LLM_IN_FLIGHT = Gauge(
+        "llm_in_flight",
+        "LLM calls currently running.",
+        ["model"],
+        multiprocess_mode="livesum",
+    )
+    LLM_CIRCUIT_STATE = Gauge(
+        "llm_circuit_state",
+        "LLM circuit breaker state: 0 closed, 1 half-open, 2 open.",
+        ["model"],
+        multiprocess_mode="livemax",
+    )
+    LLM_RETRIES = Counter(
+        "llm_retries_total",
+        "LLM calls retried, by reason.",
+        ["model", "reason"],
+    )
+    LLM_REJECTED = Counter(
+        "llm_rejected_total",
+        "LLM calls refused without reaching the provider, by reason.",
+        ["model", "reason"],
+    )
+    LLM_HEDGED = Counter(
+        "llm_hedged_total",
+        "LLM calls that were also sent to the hedge model after passing the primary's latency quantile.",
+        ["model", "hedge_model"],
+    )
+    LLM_HEDGE_WINS = Counter(
+        "llm_hedge_wins_total",
+        "Hedged LLM calls answered first by the hedge model.",
+        ["model", "hedge_model"],
+    )
+    WRITE_BEHIND_DEPTH = Gauge(
+        "write_behind_queue_depth",
+        "Items waiting in a write-behind queue.",
+        ["queue"],
+        multiprocess_mode="livesum",
+    )
+    WRITE_BEHIND_BATCH = Histogram(
+        "write_behind_batch_size",
+        "Items written per write-behind flush.",
+        ["queue"],
+        buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+    )
+    WRITE_BEHIND_ITEMS = Counter(
+        "write_behind_items_total",
+        "Write-behind items by outcome: flushed, failed, or rejected by a full queue.",
+        ["queue", "outcome"],
+    )
+    DB_POOL_CHECKOUT_SECONDS = Histogram(
+        "db_pool_checkout_seconds",
+        "Time to get a connection from the pool, waiting for a free one or opening a new one.",
+        ["pool"],
+        buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    )
+    DB_POOL_IN_USE = Gauge(
+        "db_pool_connections_in_use",
+        "Connections currently checked out of the pool.",
+        ["pool"],
+        multiprocess_mode="livesum",
+    )
+    DB_POOL_SATURATION = Gauge(
+        "db_pool_saturation",
+        "Connections checked out over the pool capacity (size plus overflow).",
+        ["pool"],
+        multiprocess_mode="livemax",
+    )
+    DB_POOL_TIMEOUTS = Counter(
+        "db_pool_timeouts_total",
+        "Checkouts that gave up after DATABASE_POOL_TIMEOUT seconds.",
+        ["pool"],
+    )
+    API_CLIENT_CACHE = Counter(
+        "api_client_cache_total",
+        "External API GETs by cache outcome: hit, miss, or revalidated with a 304.",
+        ["cache", "outcome"],
+    )
+
+    _tracer: Any = None
+
+    @classmethod
+    def configure_otlp(cls, endpoint: Optional[str], service_name: str = "code-analyzer"):
+        """
+        Export spans to an OTLP collector, such as a local OpenTelemetry Collector or Jaeger.
+
+        Args:
+            endpoint (Optional[str]): The collector's OTLP/HTTP traces URL; nothing is exported when empty.
+            service_name (str): The `service.name` resource attribute.
+        """
+        if not endpoint:
+            return
+
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        except ImportError:
+            logger.warning("OTEL_EXPORTER_OTLP_ENDPOINT definido, mas os pacotes opentelemetry não estão instalados.")
+            return
+
+        provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint)))
+        trace.set_tracer_provider(provider)
+        cls._tracer = trace.get_tracer(service_name)
+
+    @classmethod
+    @contextmanager
+    def span(cls, stage: str, model: str = "", **attributes: Any) -> Iterator[None]:
+        """
+        Time a stage, recording it in `analysis_stage_seconds` and as a tracing span when OTLP is enabled.
+
+        Args:
+            stage (str): The stage name, e.g. `static`, `prompt`, `llm` or `db_commit`.
+            model (str): The model label.
+            **attributes (Any): Extra span attributes.
+        """
+        outcome = "ok"
+        start = time.perf_counter()
+        otel_span = cls._tracer.start_as_current_span(stage, attributes={"model": model, **attributes}) if cls._tracer else None
+
+        try:
+            if otel_span is not None:
+                with otel_span:
+                    yield
+            else:
+                yield
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            cls.STAGE_SECONDS.labels(stage=stage, model=model, outcome=outcome).observe(time.perf_counter() - start)
+
+    @classmethod
+    def observe_analysis(cls, model: str, outcome: str, seconds: float):
+        """
+        Record one analysis request and how it was answered (`hit`, `miss`, `bypass`, `local`, `error`...).
+        """
+        cls.ANALYSIS_TOTAL.labels(model=model, outcome=outcome).inc()
+        cls.ANALYSIS_SECONDS.labels(model=model, outcome=outcome).observe(seconds)
+
+    @classmethod
+    def observe_http(cls, method: str, route: str, status: int, seconds: float):
+        cls.HTTP_SECONDS.labels(method=method, route=route, status=str(status)).observe(seconds)
+
+    @staticmethod
+    def export() -> Tuple[bytes, str]:
+        """
+        The current metrics in the Prometheus text format, aggregated across uvicorn workers when
+        `PROMETHEUS_MULTIPROC_DIR` is set.
+        """
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+
+            return generate_latest(registry), CONTENT_TYPE_LATEST
+
+        return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,228 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .telemetry import Telemetry
+
+logger = logging.getLogger("application.engine")
+
+
+class WriteBehindQueue:
+    """
+    A bounded in-memory queue drained by a background thread, which hands the queued items to a
+    flush function in batches once `batch_size` items are waiting or `flush_interval` has passed.
+
+    A failed batch is retried `retries` times with exponential backoff starting at `retry_backoff`
+    seconds, then split in halves until the items that keep failing are isolated, so one bad item
+    or a short outage does not lose the rest of the batch.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+        put_timeout: float,
+        retries: int = 2,
+        retry_backoff: float = 0.5,
+    ):
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self._queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self._flush: Optional[Callable[[List[Any]], None]] = None
+        self._describe: Callable[[Any], str] = repr
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._flushed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._batches = 0
+        self._retried = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and not self._stop.is_set()
+
+    def start(self, flush: Callable[[List[Any]], None], describe: Optional[Callable[[Any], str]] = None):
+        """
+        Start the background flusher.
+
+        Args:
+            flush (Callable[[List[Any]], None]): Writes one batch atomically; an exception means none
+                of its items were written, so they can be written again.
+            describe (Optional[Callable[[Any], str]]): Names an item in the log when it is dropped.
+        """
+        if self._thread is not None:
+            return
+
+        self._flush = flush
+        self._describe = describe or repr
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=f"{self.name}-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float) -> int:
+        """
+        Stop accepting items and flush what is queued.
+
+        Args:
+            timeout (float): How long to wait for the queue to drain, in seconds.
+
+        Returns:
+            int: The number of items left unwritten when the timeout expired.
+        """
+        if self._thread is None:
+            return 0
+
+        self._stop.set()
+        self._thread.join(timeout)
+        left = self._queue.qsize()
+
+        if left:
+            logger.error(f"{left} itens de {self.name} não foram gravados antes do encerramento.")
+
+            # The flusher may still be running, so the items are only read, under the queue's lock.
+            with self._queue.mutex:
+                left_items = list(self._queue.queue)
+
+            for item in left_items:
+                logger.error(f"Item de {self.name} descartado no encerramento: {self._describe(item)}")
+
+        self._thread = None
+
+        return left
+
+    def put(self, item: Any, block: bool = True) -> bool:
+        """
+        Queue an item for the next batch. A full queue holds the caller for up to `put_timeout`
+        seconds, so producers slow down to the pace of the database.
+
+        Args:
+            item (Any): The item to write.
+            block (bool): Whether to wait for room when the queue is full.
+
+        Returns:
+            bool: False if the flusher is not running or the queue stayed full; the caller must then
+            write the item itself.
+        """
+        if not self.running:
+            return False
+
+        try:
+            self._queue.put(item, block, self.put_timeout)
+        except queue.Full:
+            if block:
+                with self._lock:
+                    self._rejected += 1
+
+                Telemetry.WRITE_BEHIND_ITEMS.labels(queue=self.name, outcome="rejected").inc()
+
+            return False
+
+        with self._lock:
+            self._queued += 1
+
+        Telemetry.WRITE_BEHIND_DEPTH.labels(queue=self.name).set(self._queue.qsize())
+
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self.running,
+                "depth": self._queue.qsize(),
+                "queued": self._queued,
+                "flushed": self._flushed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "batches": self._batches,
+                "retried": self._retried,
+            }
+
+    def _loop(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._collect()
+
+            if batch:
+                self._write(batch)
+
+    def _collect(self) -> List[Any]:
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            # While stopping, drain without waiting for more items to arrive.
+            remaining = 0 if self._stop.is_set() else deadline - time.monotonic()
+
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _write(self, batch: List[Any]):
+        Telemetry.WRITE_BEHIND_DEPTH.labels(queue=self.name).set(self._queue.qsize())
+        Telemetry.WRITE_BEHIND_BATCH.labels(queue=self.name).observe(len(batch))
+
+        with self._lock:
+            self._batches += 1
+
+        self._write_or_split(batch, self.retries)
+
+    def _write_or_split(self, batch: List[Any], retries: int):
+        """
+        Writes `batch`, retrying it `retries` times; if it still fails, writes each half on its own
+        (without further retries, the batch already waited out the backoff) down to single items.
+        """
+        for attempt in range(retries + 1):
+            if attempt:
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+
+                with self._lock:
+                    self._retried += len(batch)
+
+                Telemetry.WRITE_BEHIND_ITEMS.labels(queue=self.name, outcome="retried").inc(len(batch))
+
+            try:
+                self._flush(batch)
+            except Exception as e:
+                error = e
+                continue
+
+            self._count("flushed", len(batch))
+
+            return
+
+        if len(batch) > 1:
+            logger.warning(f"Falha ao gravar um lote de {len(batch)} itens de {self.name}, dividindo o lote: {error}")
+            middle = len(batch) // 2
+            self._write_or_split(batch[:middle], 0)
+            self._write_or_split(batch[middle:], 0)
+
+            return
+
+        logger.error(f"Falha ao gravar um item de {self.name}, descartado: {self._describe(batch[0])}: {error}")
+        self._count("failed", 1)
+
+    def _count(self, outcome: str, items: int):
+        with self._lock:
+            if outcome == "flushed":
+                self._flushed += items
+            else:
+                self._failed += items
+
+        Telemetry.WRITE_BEHIND_ITEMS.labels(queue=self.name, outcome=outcome).inc(items)
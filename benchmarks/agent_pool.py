@@ -0,0 +1,69 @@
+"""
+Measures the per-request cost of building the LLM client and agents versus borrowing them from `AgentPool`.
+
+Usage:
+    OPENAI_API_KEY=dummy python benchmarks/agent_pool.py --iterations 200
+
+No LLM call is made; only object construction is timed.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "app")))
+
+from agents.agents import Agents
+from agents.pool import AgentPool
+from agents.tasks import Tasks
+from entities.llm_provider import LLMProvider
+
+CODE = "def example_function(): print('Hello World!')"
+
+
+def per_request() -> None:
+    agents = Agents(LLMProvider())
+    tasks = Tasks(agents)
+    tasks.get_code_improvement_task(CODE)
+    Agents(agents.llm_provider).get_code_improvement_agent()
+
+
+def pooled(pool: AgentPool) -> None:
+    with pool.acquire() as agents:
+        Tasks(agents).get_code_improvement_task(CODE)
+        agents.get_code_improvement_agent()
+
+
+def measure(fn, iterations: int) -> dict:
+    samples = []
+
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+
+    return {
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p95_ms": samples[int(len(samples) * 0.95) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent construction benchmark")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    pool = AgentPool(size=1)
+    pool.warmup()
+
+    for name, fn in (("per-request", per_request), ("pooled", lambda: pooled(pool))):
+        result = measure(fn, args.iterations)
+        print(f"{name:>12}: mean {result['mean_ms']:.3f} ms | p50 {result['p50_ms']:.3f} ms | p95 {result['p95_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
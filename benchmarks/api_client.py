@@ -0,0 +1,152 @@
+"""
+Measures `APIClient` against a local stub HTTP server: one `requests.request` per call (a new connection
+every time, as before the pooled session) vs the pooled client, and the previous list-building
+`request_all` vs the streaming `iter_all` (time to first result and total) and `AsyncAPIClient.iter_all`.
+
+Usage:
+    python benchmarks/api_client.py --requests 500 --concurrency 5 20 --latency 0.02
+
+The stub answers `GET /items/<n>` with a small JSON body after `--latency` seconds.
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import AsyncIterator, Callable, Dict, Iterable
+
+import requests
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "app")))
+
+from adapters.api_client import APIClient, AsyncAPIClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle's algorithm, keep-alive connections would wait
+    # for delayed ACKs and measure those instead of the client.
+    disable_nagle_algorithm = True
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        body = json.dumps({"path": self.path, "items": list(range(20))}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connection attempts beyond it, which are then retried a second later.
+    request_queue_size = 128
+
+
+def serve(latency: float) -> StubServer:
+    StubHandler.latency = latency
+    server = StubServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+def unpooled_request_all(base_url: str, endpoints: list) -> list:
+    # The previous behaviour: module-level `requests.request`, 5 workers, the whole list built before returning.
+    def call(endpoint):
+        res = requests.request("GET", f"{base_url}{endpoint}", headers={"Accept": "application/json"})
+        res.raise_for_status()
+        return res.json()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+        return [future.result() for future in concurrent.futures.as_completed([executor.submit(call, e) for e in endpoints])]
+
+
+def consume(results: Callable[[], Iterable]) -> Dict:
+    start = time.perf_counter()
+    first = None
+    count = 0
+
+    for _ in results():
+        count += 1
+        first = first if first is not None else time.perf_counter() - start
+
+    return {"first_ms": (first or 0) * 1000, "total_s": time.perf_counter() - start, "count": count}
+
+
+async def consume_async(results: Callable[[], AsyncIterator]) -> Dict:
+    start = time.perf_counter()
+    first = None
+    count = 0
+
+    async for _ in results():
+        count += 1
+        first = first if first is not None else time.perf_counter() - start
+
+    return {"first_ms": (first or 0) * 1000, "total_s": time.perf_counter() - start, "count": count}
+
+
+def sequential(call: Callable[[str], object], endpoints: list) -> Dict:
+    start = time.perf_counter()
+
+    for endpoint in endpoints:
+        call(endpoint)
+
+    seconds = time.perf_counter() - start
+
+    return {"first_ms": 0, "total_s": seconds, "count": len(endpoints)}
+
+
+async def run_async(base_url: str, endpoints: list, concurrency: int) -> Dict:
+    async with AsyncAPIClient(base_url, pool_size=concurrency) as client:
+        return await consume_async(lambda: client.iter_all("GET", endpoints, concurrency=concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="APIClient benchmark against a local stub server")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[5, 20])
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub response delay in seconds")
+    args = parser.parse_args()
+
+    server = serve(args.latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    endpoints = [f"/items/{index}" for index in range(args.requests)]
+    results = {}
+
+    try:
+        results["sequential, unpooled"] = sequential(
+            lambda endpoint: requests.request("GET", f"{base_url}{endpoint}").json(), endpoints
+        )
+
+        with APIClient(base_url) as client:
+            results["sequential, pooled"] = sequential(client.get, endpoints)
+
+        results["request_all (before)"] = consume(lambda: unpooled_request_all(base_url, endpoints))
+
+        for concurrency in args.concurrency:
+            with APIClient(base_url, pool_size=concurrency) as client:
+                results[f"iter_all x{concurrency}"] = consume(lambda: client.iter_all("GET", endpoints, concurrency=concurrency))
+
+            results[f"async iter_all x{concurrency}"] = asyncio.run(run_async(base_url, endpoints, concurrency))
+    finally:
+        server.shutdown()
+
+    for name, result in results.items():
+        print(
+            f"{name:>24}: {result['count'] / result['total_s']:9.1f} req/s | "
+            f"first result {result['first_ms']:8.2f} ms | total {result['total_s']:7.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Exercises the `APIClient` response cache against a local stub HTTP server that sends `ETag`, `Last-Modified`
+and `Cache-Control`, and compares repeated GETs without a cache, with fresh hits, and with revalidation
+(`max-age=0`, answered by `304 Not Modified`). Each scenario checks the cache counters and what the stub
+actually served, then a second cache over the same directory checks that entries survive a restart.
+
+Usage:
+    python benchmarks/api_client_cache.py --resources 50 --rounds 20 --latency 0.005
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "app")))
+
+from adapters.api_client import APIClient
+from adapters.http_cache import HTTPCache
+
+LAST_MODIFIED = "Mon, 05 Jan 2026 10:00:00 GMT"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle's algorithm, keep-alive connections would wait
+    # for delayed ACKs and measure those instead of the client.
+    disable_nagle_algorithm = True
+    latency = 0.0
+    max_age = 60
+    served: Counter = Counter()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        etag = f'"{self.path.rsplit("/", 1)[-1]}-v1"'
+
+        if self.headers.get("If-None-Match") == etag or self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            self.reply(304, b"", etag)
+            return
+
+        body = json.dumps({"path": self.path, "items": [{"id": index, "name": f"item {index}"} for index in range(50)]})
+        self.reply(200, body.encode(), etag)
+
+    def reply(self, status: int, body: bytes, etag: str):
+        with self.lock:
+            self.served[status] += 1
+
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.send_header("Cache-Control", f"max-age={self.max_age}")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connection attempts beyond it, which are then retried a second later.
+    request_queue_size = 128
+
+
+def serve(latency: float) -> StubServer:
+    StubHandler.latency = latency
+    server = StubServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+def run(base_url: str, resources: int, rounds: int, max_age: int, cache: Optional[HTTPCache]) -> Dict:
+    StubHandler.max_age = max_age
+    StubHandler.served.clear()
+    start = time.perf_counter()
+
+    with APIClient(base_url, cache=cache) as client:
+        for _ in range(rounds):
+            for index in range(resources):
+                assert client.get(f"/reference/{index}")["path"] == f"/reference/{index}"
+
+    seconds = time.perf_counter() - start
+
+    return {
+        "gets_per_s": resources * rounds / seconds,
+        "served_200": StubHandler.served[200],
+        "served_304": StubHandler.served[304],
+        "cache": cache.stats() if cache is not None else {},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="APIClient response cache against a local stub server")
+    parser.add_argument("--resources", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.005, help="Stub response delay in seconds")
+    args = parser.parse_args()
+
+    server = serve(args.latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    total = args.resources * args.rounds
+    results = {}
+
+    try:
+        results["no cache"] = run(base_url, args.resources, args.rounds, 60, None)
+        assert results["no cache"]["served_200"] == total
+
+        results["fresh hits"] = run(base_url, args.resources, args.rounds, 60, HTTPCache(maxsize=args.resources))
+        assert results["fresh hits"]["served_200"] == args.resources
+        assert results["fresh hits"]["cache"]["hits"] == total - args.resources
+
+        results["revalidation"] = run(base_url, args.resources, args.rounds, 0, HTTPCache(maxsize=args.resources))
+        assert results["revalidation"]["served_304"] == total - args.resources
+        assert results["revalidation"]["cache"]["revalidations"] == total - args.resources
+
+        # Half the resources fit in memory: every round evicts what the next one needs.
+        results["evicting LRU"] = run(base_url, args.resources, args.rounds, 60, HTTPCache(maxsize=max(args.resources // 2, 1)))
+
+        with tempfile.TemporaryDirectory() as directory:
+            run(base_url, args.resources, 1, 60, HTTPCache(maxsize=args.resources, directory=directory))
+            results["on disk, restarted"] = run(
+                base_url, args.resources, args.rounds, 60, HTTPCache(maxsize=args.resources, directory=directory)
+            )
+            assert results["on disk, restarted"]["served_200"] == 0
+    finally:
+        server.shutdown()
+
+    for name, result in results.items():
+        print(
+            f"{name:>20}: {result['gets_per_s']:9.1f} GET/s | stub 200 {result['served_200']:6} | "
+            f"304 {result['served_304']:6} | {result['cache']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Compares the synchronous repository driven through the thread pool (as FastAPI runs `def` routes) with
+the native asyncpg repository, at increasing concurrency.
+
+Usage:
+    python benchmarks/async_db.py --requests 2000 --concurrency 16 64 256 1024
+
+Each operation mirrors a cache miss of `POST /analyze-code/`: look the hash up, insert the analysis and
+read it back. `DATABASE_URL` must point to a migrated database; the rows written are deleted at the end.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List
+
+from fastapi.concurrency import run_in_threadpool
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "app")))
+
+from entities import AnalysisHistory
+from repositories import AnalyzerRepository, AsyncAnalyzerRepository
+from repositories.async_base_db import AsyncBaseDBRepository
+from repositories.base_db import BaseDBRepository
+
+PREFIX = "bench-async-db-"
+
+
+def entry(index: int) -> AnalysisHistory:
+    return AnalysisHistory(
+        id=uuid.uuid4(),
+        code_snippet=f"def bench_{index}(): pass",
+        suggestions="benchmark",
+        code_hash=f"{PREFIX}{index}",
+    )
+
+
+def sync_operation(index: int):
+    repository = AnalyzerRepository()
+
+    try:
+        code_hash = f"{PREFIX}{index}"
+        repository.find_latest_by_hash(code_hash)
+        repository.create(entry(index))
+        repository.find_latest_by_hash(code_hash)
+    finally:
+        repository.session.close()
+
+
+async def async_operation(index: int):
+    async with AsyncAnalyzerRepository() as repository:
+        code_hash = f"{PREFIX}{index}"
+        await repository.find_latest_by_hash(code_hash)
+        await repository.create(entry(index))
+        await repository.find_latest_by_hash(code_hash)
+
+
+async def drive(operation: Callable[[int], Awaitable[None]], requests: int, concurrency: int, offset: int) -> Dict:
+    latencies: List[float] = []
+    counter = iter(range(offset, offset + requests))
+    peak_threads = threading.active_count()
+
+    async def run():
+        nonlocal peak_threads
+
+        for index in counter:
+            start = time.perf_counter()
+            await operation(index)
+            latencies.append((time.perf_counter() - start) * 1000)
+            peak_threads = max(peak_threads, threading.active_count())
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    return {
+        "ops_per_s": requests / elapsed,
+        "mean_ms": statistics.fmean(latencies),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+        "threads": peak_threads,
+    }
+
+
+async def cleanup():
+    from sqlalchemy import delete
+
+    async with AsyncAnalyzerRepository() as repository:
+        await repository.session.execute(delete(AnalysisHistory).where(AnalysisHistory.code_hash.startswith(PREFIX)))
+        await repository.session.commit()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Sync (thread pool) vs async (asyncpg) repository benchmark")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[16, 64, 256, 1024])
+    args = parser.parse_args()
+
+    modes = {
+        "sync+threads": lambda index: run_in_threadpool(sync_operation, index),
+        "asyncpg": async_operation,
+    }
+    offset = 0
+
+    try:
+        for concurrency in args.concurrency:
+            for name, operation in modes.items():
+                await drive(operation, min(args.requests, concurrency * 2), concurrency, offset)
+                offset += args.requests
+                result = await drive(operation, args.requests, concurrency, offset)
+                offset += args.requests
+                print(
+                    f"{name:>13} c={concurrency:<5}: {result['ops_per_s']:8.1f} ops/s | "
+                    f"p50 {result['p50_ms']:.2f} ms | p95 {result['p95_ms']:.2f} ms | "
+                    f"p99 {result['p99_ms']:.2f} ms | threads {result['threads']}"
+                )
+    finally:
+        await cleanup()
+        BaseDBRepository._engine.dispose()
+        await AsyncBaseDBRepository._engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
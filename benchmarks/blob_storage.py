@@ -0,0 +1,189 @@
+"""
+Compares storing analysis bodies inline (the previous `analysis_history` layout) with the compressed,
+content-addressed `analysis_blob` table: bytes on disk and write/read throughput.
+
+Usage:
+    python benchmarks/blob_storage.py --rows 20000 --distinct 2000
+
+Scratch tables are created next to the application tables and dropped at the end. Sizes come from
+`pg_total_relation_size`, so they include indexes and TOAST (which already applies pglz to large values).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from typing import Dict, List
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "app")))
+
+from entities import AnalysisBlob
+from repositories.base_db import BaseDBRepository
+from utils import BlobCodec
+
+metadata = sa.MetaData()
+plain = sa.Table(
+    "bench_plain_history", metadata,
+    sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+    sa.Column("code_snippet", sa.String, nullable=False),
+    sa.Column("suggestions", sa.String, nullable=False),
+)
+blobs = sa.Table(
+    "bench_blob", metadata,
+    sa.Column("hash", sa.String(64), primary_key=True),
+    sa.Column("codec", sa.String(16), nullable=False),
+    sa.Column("size", sa.Integer, nullable=False),
+    sa.Column("data", sa.LargeBinary, nullable=False),
+)
+referenced = sa.Table(
+    "bench_blob_history", metadata,
+    sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+    sa.Column("code_blob_hash", sa.String(64), sa.ForeignKey("bench_blob.hash"), nullable=False),
+    sa.Column("suggestions_blob_hash", sa.String(64), sa.ForeignKey("bench_blob.hash"), nullable=False),
+)
+
+SNIPPET = '''
+class ReportBuilder{index}:
+    def __init__(self, repository, formatter):
+        self.repository = repository
+        self.formatter = formatter
+
+    def build(self, customer_id, start, end):
+        rows = self.repository.orders(customer_id, start, end)
+        total = sum(row["price"] * row["quantity"] for row in rows if row["quantity"] > 0)
+        return self.formatter.render(customer_id, rows, total)
+'''
+SUGGESTIONS = (
+    "1. `ReportBuilder{index}.build` mistura consulta, cálculo e formatação; extraia o cálculo do total.\n"
+    "2. Valide o intervalo `start`/`end` antes de consultar o repositório.\n"
+    "3. Use `Decimal` para valores monetários em vez de `float`.\n"
+)
+
+
+def dataset(rows: int, distinct: int) -> List[Dict]:
+    return [
+        {
+            "id": uuid.uuid4(),
+            "code_snippet": SNIPPET.format(index=index % distinct),
+            "suggestions": SUGGESTIONS.format(index=index % distinct),
+        }
+        for index in range(rows)
+    ]
+
+
+def write_plain(connection, batch: List[Dict]):
+    connection.execute(plain.insert(), batch)
+
+
+def write_blobs(connection, batch: List[Dict]):
+    stored = {}
+    links = []
+
+    for row in batch:
+        code, suggestions = AnalysisBlob.of(row["code_snippet"]), AnalysisBlob.of(row["suggestions"])
+        stored[code.hash], stored[suggestions.hash] = code.as_row(), suggestions.as_row()
+        links.append({"id": row["id"], "code_blob_hash": code.hash, "suggestions_blob_hash": suggestions.hash})
+
+    connection.execute(
+        postgresql.insert(blobs)
+        .values([stored[blob_hash] for blob_hash in sorted(stored)])
+        .on_conflict_do_nothing(index_elements=["hash"])
+    )
+    connection.execute(referenced.insert(), links)
+
+
+def read_plain(connection, ids: List[uuid.UUID]) -> int:
+    rows = connection.execute(sa.select(plain.c.code_snippet, plain.c.suggestions).where(plain.c.id.in_(ids)))
+
+    return sum(len(code) + len(suggestions) for code, suggestions in rows)
+
+
+def read_blobs(connection, ids: List[uuid.UUID]) -> int:
+    code, suggestions = blobs.alias("code"), blobs.alias("suggestions")
+    rows = connection.execute(
+        sa.select(code.c.codec, code.c.data, suggestions.c.codec, suggestions.c.data)
+        .select_from(
+            referenced
+            .join(code, code.c.hash == referenced.c.code_blob_hash)
+            .join(suggestions, suggestions.c.hash == referenced.c.suggestions_blob_hash)
+        )
+        .where(referenced.c.id.in_(ids))
+    )
+
+    return sum(
+        len(BlobCodec.decompress(code_codec, code_data)) + len(BlobCodec.decompress(suggestions_codec, suggestions_data))
+        for code_codec, code_data, suggestions_codec, suggestions_data in rows
+    )
+
+
+def size(connection, *tables: sa.Table) -> int:
+    return sum(
+        connection.execute(sa.text("SELECT pg_total_relation_size(:table)"), {"table": table.name}).scalar()
+        for table in tables
+    )
+
+
+def measure(engine, rows: List[Dict], args, write, read, tables) -> Dict:
+    start = time.perf_counter()
+
+    for offset in range(0, len(rows), args.batch_size):
+        with engine.begin() as connection:
+            write(connection, rows[offset:offset + args.batch_size])
+
+    write_seconds = time.perf_counter() - start
+    sample = [row["id"] for row in random.sample(rows, min(args.reads, len(rows)))]
+    start = time.perf_counter()
+
+    with engine.connect() as connection:
+        for offset in range(0, len(sample), args.batch_size):
+            read(connection, sample[offset:offset + args.batch_size])
+
+    read_seconds = time.perf_counter() - start
+
+    with engine.begin() as connection:
+        for table in tables:
+            connection.execute(sa.text(f"ANALYZE {table.name}"))
+
+        total = size(connection, *tables)
+
+    return {
+        "bytes": total,
+        "write_rows_per_s": len(rows) / write_seconds,
+        "read_rows_per_s": len(sample) / read_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inline vs compressed blob storage benchmark")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--distinct", type=int, default=2000, help="Distinct snippets among the rows")
+    parser.add_argument("--reads", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    engine = BaseDBRepository._engine
+    rows = dataset(args.rows, args.distinct)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+
+    try:
+        results = {
+            "inline": measure(engine, rows, args, write_plain, read_plain, [plain]),
+            f"blob ({BlobCodec.CODEC})": measure(engine, rows, args, write_blobs, read_blobs, [referenced, blobs]),
+        }
+    finally:
+        metadata.drop_all(engine)
+
+    for name, result in results.items():
+        print(
+            f"{name:>12}: {result['bytes'] / 1024 / 1024:8.2f} MiB | "
+            f"write {result['write_rows_per_s']:9.1f} rows/s | read {result['read_rows_per_s']:9.1f} rows/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Compares the per-row `BaseDBRepository` methods with the set-based and streaming ones: `create` in a loop
+vs `create_many`/`insert_many`/`copy_many`, SELECT-then-commit updates and deletes vs `update_where`/
+`delete_where`, and `find_all` vs `iter_by` with a projection (time and peak Python memory).
+
+Usage:
+    python benchmarks/bulk_repository.py --rows 50000 --per-row 2000 --batch-size 1000
+
+A scratch table is created next to the application tables and dropped at the end. Per-row methods run
+on `--per-row` rows and are reported as rows/s, so both sides are comparable.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from typing import Callable, Dict, List
+
+from sqlalchemy import Column, Integer, String, delete
+from sqlalchemy.orm import declarative_base
+from sqlalchemy_utils import UUIDType
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "app")))
+
+from repositories.base_db import BaseDBRepository
+
+Base = declarative_base()
+
+
+class BenchRow(Base):
+    __tablename__ = "bench_bulk"
+
+    id = Column(UUIDType(binary=False), primary_key=True, default=uuid.uuid4)
+    bucket = Column(Integer, nullable=False, index=True)
+    status = Column(String(16), nullable=False)
+    payload = Column(String, nullable=False)
+
+
+def rows(count: int, buckets: int) -> List[Dict]:
+    return [
+        {"id": uuid.uuid4(), "bucket": index % buckets, "status": "pending", "payload": f"payload {index} " * 8}
+        for index in range(count)
+    ]
+
+
+def timed(count: int, run: Callable[[], None]) -> Dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"rows_per_s": count / seconds, "peak_mib": peak / 1024 / 1024}
+
+
+def reset():
+    repository = BaseDBRepository(BenchRow)
+    repository.session.execute(delete(BenchRow))
+    repository.session.commit()
+
+
+def create_per_row(data: List[Dict]):
+    repository = BaseDBRepository(BenchRow)
+
+    for row in data:
+        repository.create(BenchRow(**row))
+
+
+def update_per_row(ids: List[uuid.UUID]):
+    # What `update` did before `update_where`: a SELECT, then a commit, per row.
+    repository = BaseDBRepository(BenchRow)
+
+    for row_id in ids:
+        instance = repository.find_by(id=row_id).one()
+        instance.status = "done"
+        repository.session.commit()
+
+
+def delete_per_row(ids: List[uuid.UUID]):
+    repository = BaseDBRepository(BenchRow)
+
+    for row_id in ids:
+        repository.session.delete(repository.find_by(id=row_id).one())
+        repository.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-row vs bulk BaseDBRepository benchmark")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--per-row", type=int, default=2000, help="Rows used by the per-row methods")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    engine = BaseDBRepository._engine
+    buckets = max(1, args.rows // args.per_row)
+    data = rows(args.rows, buckets)
+    sample = data[:args.per_row]
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    results = {}
+
+    try:
+        results["create (per row)"] = timed(len(sample), lambda: create_per_row(sample))
+        reset()
+        results["create_many"] = timed(
+            len(data), lambda: BaseDBRepository(BenchRow).create_many([BenchRow(**row) for row in data], args.batch_size)
+        )
+        reset()
+        results["insert_many"] = timed(len(data), lambda: BaseDBRepository(BenchRow).insert_many(data, args.batch_size))
+        reset()
+        results["copy_many"] = timed(
+            len(data), lambda: BaseDBRepository(BenchRow).copy_many(data, ["id", "bucket", "status", "payload"], args.batch_size)
+        )
+
+        ids = [row["id"] for row in sample]
+        bucket_size = sum(1 for row in data if row["bucket"] == 1)
+        results["update (per row)"] = timed(len(ids), lambda: update_per_row(ids))
+        results["update_where"] = timed(bucket_size, lambda: BaseDBRepository(BenchRow).update_where({"status": "done"}, bucket=1))
+
+        results["find_all"] = timed(len(data), lambda: BaseDBRepository(BenchRow).find_all())
+        results["iter_by (projection)"] = timed(
+            len(data), lambda: sum(1 for _ in BaseDBRepository(BenchRow).iter_by(["id", "status"], args.batch_size))
+        )
+
+        results["delete (per row)"] = timed(len(ids), lambda: delete_per_row(ids))
+        bucket_size = sum(1 for row in data[args.per_row:] if row["bucket"] == 2)
+        results["delete_where"] = timed(bucket_size, lambda: BaseDBRepository(BenchRow).delete_where(bucket=2))
+    finally:
+        Base.metadata.drop_all(engine)
+
+    for name, result in results.items():
+        print(f"{name:>22}: {result['rows_per_s']:11.1f} rows/s | peak {result['peak_mib']:8.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
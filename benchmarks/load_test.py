@@ -0,0 +1,341 @@
+"""
+End-to-end load test of `POST /analyze-code/` through FastAPI, crewai and SQLAlchemy, backed by the fake LLM.
+
+Usage:
+    # in-process (ASGI transport), reports DB write time and memory from inside the app
+    LLM_MODEL=fake/analyzer python benchmarks/load_test.py --requests 500 --concurrency 32 --output base.json
+
+    # against uvicorn with 4 workers
+    LLM_MODEL=fake/analyzer python benchmarks/load_test.py --mode uvicorn --workers 4 --output base.json
+
+    # compare with a previous run; exits with status 1 on regression
+    python benchmarks/load_test.py --compare base.json --output head.json
+
+`DATABASE_URL` must point to a migrated database. The `FAKE_LLM_*` variables shape the model latency,
+token rate and failures. Every request sends a distinct snippet unless `--distinct` is lower than
+`--requests`, so the analysis cache only takes part when asked to.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+APP_DIR = os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "app"))
+sys.path.insert(0, APP_DIR)
+
+SNIPPET = '''
+class OrderService{index}:
+    def __init__(self, repository, notifier):
+        self.repository = repository
+        self.notifier = notifier
+
+    def place(self, customer_id, items):
+        total = 0
+        for item in items:
+            if item["quantity"] > 0:
+                total += item["price"] * item["quantity"]
+        order = self.repository.save(customer_id, items, total)
+        self.notifier.send(customer_id, "Pedido {index} criado")
+        return order
+'''
+
+COMPARED = {
+    "p50_ms": "lower",
+    "p95_ms": "lower",
+    "p99_ms": "lower",
+    "rps": "higher",
+    "db_write_ms_mean": "lower",
+    "db_connections_peak": "lower",
+    "memory_per_request_kb": "lower",
+}
+
+
+class DBWriteTimer:
+    """
+    Times INSERT/UPDATE statements through SQLAlchemy engine events.
+    """
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.samples: List[float] = []
+        self._lock = threading.Lock()
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("load_test_start", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = (time.perf_counter() - conn.info["load_test_start"].pop()) * 1000
+
+        if statement.lstrip()[:6].upper() in ("INSERT", "UPDATE"):
+            with self._lock:
+                self.samples.append(elapsed)
+
+
+class PoolSampler:
+    """
+    Samples how many connections of an engine's pool are checked out, from a background thread.
+    """
+
+    def __init__(self, engine, interval: float = 0.005):
+        self.pool = engine.pool
+        self.interval = interval
+        self.samples: List[int] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.samples.append(self.pool.checkedout())
+
+
+def percentile(samples: List[float], fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+
+    ordered = sorted(samples)
+
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def worker_rss_kb(pid: int) -> int:
+    """
+    Sums the resident memory of a process and its children (Linux only).
+    """
+    total = 0
+    pids = [pid]
+
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as children:
+            pids += [int(child) for child in children.read().split()]
+    except OSError:
+        pass
+
+    for current in pids:
+        try:
+            with open(f"/proc/{current}/status") as status:
+                total += next(int(line.split()[1]) for line in status if line.startswith("VmRSS:"))
+        except (OSError, StopIteration):
+            continue
+
+    return total
+
+
+async def drive(client: httpx.AsyncClient, total: int, args, offset: int = 0) -> Dict:
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    counter = iter(range(offset, offset + total))
+    concurrency = args.concurrency
+
+    async def run():
+        for index in counter:
+            payload = {"code": SNIPPET.format(index=index % args.distinct), "bypass_cache": args.bypass_cache}
+            start = time.perf_counter()
+
+            try:
+                response = await client.post("/analyze-code/", json=payload)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": total,
+        "elapsed_s": elapsed,
+        "rps": total / elapsed,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "mean_ms": statistics.fmean(latencies),
+        "statuses": statuses,
+    }
+
+
+async def run_in_process(args) -> Dict:
+    from main import app
+    from repositories.base_db import BaseDBRepository
+
+    timer = DBWriteTimer(BaseDBRepository._engine)
+    transport = httpx.ASGITransport(app=app)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+            await drive(client, args.warmup, args)
+            timer.samples.clear()
+
+            with PoolSampler(BaseDBRepository._engine) as connections:
+                result = await drive(client, args.requests, args, offset=args.warmup)
+
+            db_samples = list(timer.samples)
+
+            # tracemalloc slows allocation down, so memory is measured in a separate, untimed pass.
+            tracemalloc.start()
+            baseline, _ = tracemalloc.get_traced_memory()
+            await drive(client, args.concurrency * 4, args, offset=args.warmup + args.requests)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    result.update({
+        "db_writes": len(db_samples),
+        "db_write_ms_mean": statistics.fmean(db_samples) if db_samples else None,
+        "db_write_ms_p95": percentile(db_samples, 0.95),
+        # Connections of the primary pool checked out while the requests ran.
+        "db_connections_mean": statistics.fmean(connections.samples) if connections.samples else None,
+        "db_connections_peak": max(connections.samples, default=None),
+        # Peak traced allocations over the warm baseline, shared by the requests in flight at once.
+        "memory_per_request_kb": (peak - baseline) / 1024 / args.concurrency,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    })
+
+    return result
+
+
+async def run_uvicorn(args) -> Dict:
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1", "--port", str(args.port),
+            "--workers", str(args.workers), "--log-level", "warning",
+        ],
+        cwd=APP_DIR,
+        env=os.environ.copy(),
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+            for _ in range(120):
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+
+                await asyncio.sleep(0.5)
+            else:
+                raise RuntimeError("uvicorn did not become healthy")
+
+            await drive(client, args.warmup, args)
+            rss_before = worker_rss_kb(server.pid)
+            result = await drive(client, args.requests, args, offset=args.warmup)
+            rss_after = worker_rss_kb(server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    result.update({
+        "workers": args.workers,
+        # DB timings are only observable in-process; the server exposes them once metrics are scraped.
+        "db_writes": None,
+        "db_write_ms_mean": None,
+        "db_write_ms_p95": None,
+        "db_connections_mean": None,
+        "db_connections_peak": None,
+        "memory_per_request_kb": max(rss_after - rss_before, 0) / args.requests,
+        "max_rss_kb": rss_after,
+    })
+
+    return result
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> bool:
+    """
+    Prints the relative change of each tracked metric; returns False if any regressed past `threshold`.
+    """
+    ok = True
+    print(f"{'metric':<24}{'baseline':>14}{'current':>14}{'change':>10}")
+
+    for metric, better in COMPARED.items():
+        before, after = baseline["result"].get(metric), current["result"].get(metric)
+
+        if not before or after is None:
+            continue
+
+        change = (after - before) / before
+        regressed = change > threshold if better == "lower" else change < -threshold
+        ok = ok and not regressed
+        print(f"{metric:<24}{before:>14.2f}{after:>14.2f}{change:>+9.1%}{'  REGRESSION' if regressed else ''}")
+
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analysis endpoint load test")
+    parser.add_argument("--mode", choices=["in-process", "uvicorn"], default="in-process")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--distinct", type=int, default=0, help="Distinct snippets (defaults to one per request)")
+    parser.add_argument("--bypass-cache", action="store_true")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Tolerated relative regression")
+    args = parser.parse_args()
+    args.distinct = args.distinct or args.warmup + args.requests + args.concurrency * 4
+
+    runner = run_in_process if args.mode == "in-process" else run_uvicorn
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            key: value for key, value in vars(args).items() if key not in ("output", "compare")
+        } | {
+            "llm_model": os.environ.get("LLM_MODEL"),
+            "fake_llm": {key: value for key, value in os.environ.items() if key.startswith("FAKE_LLM_")},
+        },
+        "result": asyncio.run(runner(args)),
+    }
+
+    print(json.dumps(results["result"], indent=2))
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            if not compare(json.load(baseline), results, args.threshold):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Compares searching past suggestions with a sequential `ILIKE` scan and with the `tsvector` column and
+its GIN index, as used by `GET /analyze-code/search`.
+
+Usage:
+    python benchmarks/search.py --rows 200000 --queries 50
+
+A scratch table is created next to the application tables and dropped at the end.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "app")))
+
+from entities.analysis_history import SEARCH_CONFIG
+from repositories.base_db import BaseDBRepository
+
+metadata = sa.MetaData()
+documents = sa.Table(
+    "bench_search", metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("document", sa.String, nullable=False),
+    sa.Column("search_vector", postgresql.TSVECTOR, nullable=False),
+    sa.Index("ix_bench_search_vector", "search_vector", postgresql_using="gin"),
+)
+
+PATTERNS = ["Strategy", "Observer", "Factory", "Singleton", "Adapter", "Decorator", "Repository", "Builder"]
+ADVICE = [
+    "Extraia a validação de `{name}.{method}` para uma função dedicada.",
+    "Considere o padrão {pattern} para isolar as variações de `{name}`.",
+    "Use `Decimal` para valores monetários em `{name}.{method}`.",
+    "Evite consultas dentro do laço em `{name}.{method}`; carregue os dados em lote.",
+    "Injete as dependências de `{name}` em vez de instanciá-las no construtor.",
+]
+
+
+def document(index: int) -> str:
+    name = f"Service{index % 5000}"
+    lines = [
+        random.choice(ADVICE).format(name=name, method=f"handle_{index % 97}", pattern=random.choice(PATTERNS))
+        for _ in range(4)
+    ]
+
+    return "\n".join(lines) + f"\nclass {name}:\n    def handle_{index % 97}(self, payload):\n        return payload\n"
+
+
+def seed(engine, rows: int, batch_size: int):
+    for offset in range(0, rows, batch_size):
+        batch = [{"id": index, "document": document(index)} for index in range(offset, min(rows, offset + batch_size))]
+
+        with engine.begin() as connection:
+            connection.execute(
+                sa.text(
+                    "INSERT INTO bench_search (id, document, search_vector) "
+                    "VALUES (:id, :document, to_tsvector(CAST(:config AS regconfig), :document))"
+                ),
+                [dict(row, config=SEARCH_CONFIG) for row in batch],
+            )
+
+    with engine.begin() as connection:
+        connection.execute(sa.text("ANALYZE bench_search"))
+
+
+def measure(engine, statement: str, terms: List[str], limit: int) -> Dict:
+    timings = []
+
+    with engine.connect() as connection:
+        for term in terms:
+            start = time.perf_counter()
+            connection.execute(sa.text(statement), {"term": term, "config": SEARCH_CONFIG, "limit": limit}).all()
+            timings.append((time.perf_counter() - start) * 1000)
+
+    return {"p50_ms": statistics.median(timings), "max_ms": max(timings)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ILIKE vs tsvector/GIN search benchmark")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    engine = BaseDBRepository._engine
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    terms = [random.choice([f"Service{random.randrange(5000)}", random.choice(PATTERNS)]) for _ in range(args.queries)]
+
+    try:
+        seed(engine, args.rows, args.batch_size)
+        results = {
+            "ILIKE": measure(
+                engine,
+                "SELECT id FROM bench_search WHERE document ILIKE '%' || :term || '%' LIMIT :limit",
+                terms,
+                args.limit,
+            ),
+            "tsvector/GIN": measure(
+                engine,
+                "SELECT id, ts_rank_cd(search_vector, q) AS rank "
+                "FROM bench_search, websearch_to_tsquery(CAST(:config AS regconfig), :term) q "
+                "WHERE search_vector @@ q ORDER BY rank DESC LIMIT :limit",
+                terms,
+                args.limit,
+            ),
+        }
+    finally:
+        metadata.drop_all(engine)
+
+    for name, result in results.items():
+        print(f"{name:>13}: p50 {result['p50_ms']:8.2f} ms | max {result['max_ms']:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '000000000002'
+down_revision: Union[str, None] = '000000000001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('analysis_history', sa.Column('code_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_analysis_history_code_hash'), 'analysis_history', ['code_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_analysis_history_code_hash'), table_name='analysis_history')
+    op.drop_column('analysis_history', 'code_hash')
@@ -0,0 +1,30 @@
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_utils
+
+revision: str = '000000000003'
+down_revision: Union[str, None] = '000000000002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('analysis_fingerprint',
+    sa.Column('analysis_id', sqlalchemy_utils.types.uuid.UUIDType(binary=False), nullable=False),
+    sa.Column('signature', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['analysis_id'], ['analysis_history.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('analysis_id')
+    )
+    op.create_table('analysis_fingerprint_band',
+    sa.Column('band_key', sa.String(length=32), nullable=False),
+    sa.Column('analysis_id', sqlalchemy_utils.types.uuid.UUIDType(binary=False), nullable=False),
+    sa.ForeignKeyConstraint(['analysis_id'], ['analysis_fingerprint.analysis_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('band_key', 'analysis_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('analysis_fingerprint_band')
+    op.drop_table('analysis_fingerprint')
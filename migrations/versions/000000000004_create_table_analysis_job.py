@@ -0,0 +1,33 @@
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_utils
+
+revision: str = '000000000004'
+down_revision: Union[str, None] = '000000000003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('analysis_job',
+    sa.Column('id', sqlalchemy_utils.types.uuid.UUIDType(binary=False), nullable=False),
+    sa.Column('code_snippet', sa.String(), nullable=False),
+    sa.Column('bypass_cache', sa.Boolean(), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('analysis_id', sqlalchemy_utils.types.uuid.UUIDType(binary=False), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('started_at', sa.TIMESTAMP(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['analysis_id'], ['analysis_history.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('id')
+    )
+    op.create_index(op.f('ix_analysis_job_status'), 'analysis_job', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_analysis_job_status'), table_name='analysis_job')
+    op.drop_table('analysis_job')
@@ -0,0 +1,18 @@
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '000000000005'
+down_revision: Union[str, None] = '000000000004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('analysis_history', sa.Column('input_tokens', sa.Integer(), nullable=True))
+    op.add_column('analysis_history', sa.Column('output_tokens', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('analysis_history', 'output_tokens')
+    op.drop_column('analysis_history', 'input_tokens')
@@ -0,0 +1,27 @@
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_utils
+
+revision: str = '000000000006'
+down_revision: Union[str, None] = '000000000005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('analysis_region',
+    sa.Column('analysis_id', sqlalchemy_utils.types.uuid.UUIDType(binary=False), nullable=False),
+    sa.Column('start_line', sa.Integer(), nullable=False),
+    sa.Column('end_line', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('region_hash', sa.String(length=64), nullable=False),
+    sa.Column('findings', sa.String(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['analysis_id'], ['analysis_history.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('analysis_id', 'start_line')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('analysis_region')
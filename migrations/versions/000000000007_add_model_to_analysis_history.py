@@ -0,0 +1,16 @@
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '000000000007'
+down_revision: Union[str, None] = '000000000006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('analysis_history', sa.Column('model', sa.String(length=255), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('analysis_history', 'model')
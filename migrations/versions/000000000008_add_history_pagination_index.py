@@ -0,0 +1,28 @@
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = '000000000008'
+down_revision: Union[str, None] = '000000000007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Serves the keyset pagination, the time-range filters and the ordered export of the history.
+    # CONCURRENTLY keeps the table writable while the index builds, which requires running outside a transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_analysis_history_created_at_id',
+            'analysis_history',
+            ['created_at', 'id'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_analysis_history_created_at_id',
+            table_name='analysis_history',
+            postgresql_concurrently=True,
+        )
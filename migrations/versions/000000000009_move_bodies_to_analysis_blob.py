@@ -0,0 +1,151 @@
+import hashlib
+import zlib
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '000000000009'
+down_revision: Union[str, None] = '000000000008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+blob = sa.table(
+    'analysis_blob',
+    sa.column('hash', sa.String),
+    sa.column('codec', sa.String),
+    sa.column('size', sa.Integer),
+    sa.column('data', sa.LargeBinary),
+)
+
+
+def suggestions_column(connection) -> str:
+    # The first migration created the column as 'sugestions '; databases fixed by hand use 'suggestions'.
+    columns = {column['name'] for column in sa.inspect(connection).get_columns('analysis_history')}
+
+    return 'suggestions' if 'suggestions' in columns else 'sugestions '
+
+
+def blob_row(text: str) -> dict:
+    # The migration compresses with zlib so it does not depend on optional packages; the application
+    # reads both zlib and zstd blobs.
+    raw = text.encode('utf-8')
+
+    return {'hash': hashlib.sha256(raw).hexdigest(), 'codec': 'zlib', 'size': len(raw), 'data': zlib.compress(raw, 6)}
+
+
+def blob_text(codec: str, data: bytes) -> str:
+    if codec == 'zlib':
+        return zlib.decompress(data).decode('utf-8')
+
+    if codec == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data).decode('utf-8')
+
+    return bytes(data).decode('utf-8')
+
+
+def upgrade() -> None:
+    op.create_table('analysis_blob',
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('codec', sa.String(length=16), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('hash')
+    )
+    op.add_column('analysis_history', sa.Column('code_blob_hash', sa.String(length=64), nullable=True))
+    op.add_column('analysis_history', sa.Column('suggestions_blob_hash', sa.String(length=64), nullable=True))
+
+    connection = op.get_bind()
+    suggestions = suggestions_column(connection)
+    history = sa.table(
+        'analysis_history',
+        sa.column('id'),
+        sa.column('code_snippet', sa.String),
+        sa.column(suggestions, sa.String),
+        sa.column('code_blob_hash', sa.String),
+        sa.column('suggestions_blob_hash', sa.String),
+    )
+    rows = connection.execute(
+        sa.select(history.c.id, history.c.code_snippet, history.c[suggestions]),
+        execution_options={'yield_per': BATCH_SIZE},
+    )
+    link = (
+        sa.update(history)
+        .where(history.c.id == sa.bindparam('_id'))
+        .values(code_blob_hash=sa.bindparam('_code'), suggestions_blob_hash=sa.bindparam('_suggestions'))
+    )
+
+    for partition in rows.partitions():
+        blobs = {}
+        links = []
+
+        for analysis_id, code_snippet, suggestions_text in partition:
+            code = blob_row(code_snippet)
+            suggestion = blob_row(suggestions_text)
+            blobs[code['hash']] = code
+            blobs[suggestion['hash']] = suggestion
+            links.append({'_id': analysis_id, '_code': code['hash'], '_suggestions': suggestion['hash']})
+
+        connection.execute(
+            postgresql.insert(blob)
+            .values([blobs[blob_hash] for blob_hash in sorted(blobs)])
+            .on_conflict_do_nothing(index_elements=['hash'])
+        )
+        connection.execute(link, links)
+
+    op.alter_column('analysis_history', 'code_blob_hash', nullable=False)
+    op.alter_column('analysis_history', 'suggestions_blob_hash', nullable=False)
+    op.create_foreign_key('fk_analysis_history_code_blob', 'analysis_history', 'analysis_blob', ['code_blob_hash'], ['hash'])
+    op.create_foreign_key('fk_analysis_history_suggestions_blob', 'analysis_history', 'analysis_blob', ['suggestions_blob_hash'], ['hash'])
+    op.drop_column('analysis_history', 'code_snippet')
+    op.drop_column('analysis_history', suggestions)
+
+
+def downgrade() -> None:
+    op.add_column('analysis_history', sa.Column('code_snippet', sa.String(), nullable=True))
+    op.add_column('analysis_history', sa.Column('suggestions', sa.String(), nullable=True))
+
+    connection = op.get_bind()
+    code_blob = blob.alias('code_blob')
+    suggestions_blob = blob.alias('suggestions_blob')
+    history = sa.table(
+        'analysis_history',
+        sa.column('id'),
+        sa.column('code_snippet', sa.String),
+        sa.column('suggestions', sa.String),
+        sa.column('code_blob_hash', sa.String),
+        sa.column('suggestions_blob_hash', sa.String),
+    )
+    rows = connection.execute(
+        sa.select(history.c.id, code_blob.c.codec, code_blob.c.data, suggestions_blob.c.codec, suggestions_blob.c.data)
+        .join(code_blob, code_blob.c.hash == history.c.code_blob_hash)
+        .join(suggestions_blob, suggestions_blob.c.hash == history.c.suggestions_blob_hash),
+        execution_options={'yield_per': BATCH_SIZE},
+    )
+    restore = (
+        sa.update(history)
+        .where(history.c.id == sa.bindparam('_id'))
+        .values(code_snippet=sa.bindparam('_code'), suggestions=sa.bindparam('_suggestions'))
+    )
+
+    for partition in rows.partitions():
+        connection.execute(restore, [
+            {
+                '_id': analysis_id,
+                '_code': blob_text(code_codec, code_data),
+                '_suggestions': blob_text(suggestions_codec, suggestions_data),
+            }
+            for analysis_id, code_codec, code_data, suggestions_codec, suggestions_data in partition
+        ])
+
+    op.alter_column('analysis_history', 'code_snippet', nullable=False)
+    op.alter_column('analysis_history', 'suggestions', nullable=False)
+    op.drop_constraint('fk_analysis_history_suggestions_blob', 'analysis_history', type_='foreignkey')
+    op.drop_constraint('fk_analysis_history_code_blob', 'analysis_history', type_='foreignkey')
+    op.drop_column('analysis_history', 'suggestions_blob_hash')
+    op.drop_column('analysis_history', 'code_blob_hash')
+    op.drop_table('analysis_blob')
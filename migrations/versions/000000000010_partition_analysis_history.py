@@ -0,0 +1,93 @@
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '000000000010'
+down_revision: Union[str, None] = '000000000009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS_AHEAD = 3
+
+# A partitioned table can only enforce keys that include the partition column, so `analysis_id`
+# can no longer be referenced from the tables keyed by the analysis alone.
+REFERENCES = (
+    ('analysis_fingerprint', 'analysis_fingerprint_analysis_id_fkey', 'CASCADE'),
+    ('analysis_region', 'analysis_region_analysis_id_fkey', 'CASCADE'),
+    ('analysis_job', 'analysis_job_analysis_id_fkey', 'SET NULL'),
+)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_partition(month: date):
+    # Bounds are UTC midnights, matching the names used by the application's partition maintenance.
+    op.execute(
+        f"CREATE TABLE analysis_history_p{month:%Y%m} PARTITION OF analysis_history_partitioned "
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+    )
+
+
+def create_keys_and_indexes():
+    op.create_foreign_key('fk_analysis_history_code_blob', 'analysis_history', 'analysis_blob', ['code_blob_hash'], ['hash'])
+    op.create_foreign_key('fk_analysis_history_suggestions_blob', 'analysis_history', 'analysis_blob', ['suggestions_blob_hash'], ['hash'])
+    op.create_index('ix_analysis_history_code_hash', 'analysis_history', ['code_hash'], unique=False)
+    op.create_index('ix_analysis_history_created_at_id', 'analysis_history', ['created_at', 'id'], unique=False)
+
+
+def upgrade() -> None:
+    for table, constraint, _ in REFERENCES:
+        op.drop_constraint(constraint, table, type_='foreignkey')
+
+    op.execute(
+        "CREATE TABLE analysis_history_partitioned (LIKE analysis_history INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (created_at)"
+    )
+
+    connection = op.get_bind()
+    oldest, newest = connection.execute(
+        sa.text("SELECT min(created_at AT TIME ZONE 'UTC'), max(created_at AT TIME ZONE 'UTC') FROM analysis_history")
+    ).one()
+    today = datetime.now(timezone.utc).date()
+    first = (oldest.date() if oldest else today).replace(day=1)
+    last = add_months((max(newest.date(), today) if newest else today).replace(day=1), PARTITIONS_AHEAD)
+    month = first
+
+    while month <= last:
+        create_partition(month)
+        month = add_months(month, 1)
+
+    op.execute("INSERT INTO analysis_history_partitioned SELECT * FROM analysis_history")
+    op.drop_table('analysis_history')
+    op.rename_table('analysis_history_partitioned', 'analysis_history')
+    op.create_primary_key('analysis_history_pkey', 'analysis_history', ['id', 'created_at'])
+    create_keys_and_indexes()
+    # Retention drops whole partitions and then the blobs only they referenced; these keep that lookup cheap.
+    op.create_index('ix_analysis_history_code_blob_hash', 'analysis_history', ['code_blob_hash'], unique=False)
+    op.create_index('ix_analysis_history_suggestions_blob_hash', 'analysis_history', ['suggestions_blob_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.execute("CREATE TABLE analysis_history_plain (LIKE analysis_history INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO analysis_history_plain SELECT * FROM analysis_history")
+    # Partitions detached by retention but not yet archived are left for the operator to review.
+    op.drop_table('analysis_history')
+    op.rename_table('analysis_history_plain', 'analysis_history')
+    op.create_primary_key('analysis_history_pkey', 'analysis_history', ['id'])
+    create_keys_and_indexes()
+
+    # Rows of archived analyses are gone, so references to them are cleared before the keys return.
+    op.execute("DELETE FROM analysis_fingerprint f WHERE NOT EXISTS (SELECT 1 FROM analysis_history h WHERE h.id = f.analysis_id)")
+    op.execute("DELETE FROM analysis_region r WHERE NOT EXISTS (SELECT 1 FROM analysis_history h WHERE h.id = r.analysis_id)")
+    op.execute(
+        "UPDATE analysis_job j SET analysis_id = NULL "
+        "WHERE analysis_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM analysis_history h WHERE h.id = j.analysis_id)"
+    )
+
+    for table, constraint, ondelete in REFERENCES:
+        op.create_foreign_key(constraint, table, 'analysis_history', ['analysis_id'], ['id'], ondelete=ondelete)
@@ -0,0 +1,73 @@
+import os
+import zlib
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '000000000011'
+down_revision: Union[str, None] = '000000000010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+# Must match the application's settings, which build the same document for new rows.
+SEARCH_CONFIG = os.environ.get('SEARCH_TEXT_CONFIG', 'simple')
+SEARCH_MAX_CHARS = int(os.environ.get('SEARCH_MAX_CHARS', 100000))
+
+
+def blob_text(codec: str, data: bytes) -> str:
+    if codec == 'zlib':
+        return zlib.decompress(data).decode('utf-8')
+
+    if codec == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data).decode('utf-8')
+
+    return bytes(data).decode('utf-8')
+
+
+def upgrade() -> None:
+    op.add_column('analysis_history', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+
+    connection = op.get_bind()
+    blob = sa.table('analysis_blob', sa.column('hash'), sa.column('codec'), sa.column('data'))
+    code_blob = blob.alias('code_blob')
+    suggestions_blob = blob.alias('suggestions_blob')
+    history = sa.table(
+        'analysis_history',
+        sa.column('id'),
+        sa.column('created_at'),
+        sa.column('code_blob_hash'),
+        sa.column('suggestions_blob_hash'),
+        sa.column('search_vector'),
+    )
+    rows = connection.execute(
+        sa.select(history.c.id, history.c.created_at, code_blob.c.codec, code_blob.c.data, suggestions_blob.c.codec, suggestions_blob.c.data)
+        .join(code_blob, code_blob.c.hash == history.c.code_blob_hash)
+        .join(suggestions_blob, suggestions_blob.c.hash == history.c.suggestions_blob_hash),
+        execution_options={'yield_per': BATCH_SIZE},
+    )
+    # created_at is part of the key, so each update only touches its own partition.
+    index = (
+        sa.update(history)
+        .where(history.c.id == sa.bindparam('_id'), history.c.created_at == sa.bindparam('_created_at'))
+        .values(search_vector=sa.func.to_tsvector(sa.literal(SEARCH_CONFIG, postgresql.REGCONFIG), sa.bindparam('_document')))
+    )
+
+    for partition in rows.partitions():
+        connection.execute(index, [
+            {
+                '_id': analysis_id,
+                '_created_at': created_at,
+                '_document': '\n'.join((blob_text(suggestions_codec, suggestions_data), blob_text(code_codec, code_data)))[:SEARCH_MAX_CHARS],
+            }
+            for analysis_id, created_at, code_codec, code_data, suggestions_codec, suggestions_data in partition
+        ])
+
+    op.create_index('ix_analysis_history_search_vector', 'analysis_history', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_analysis_history_search_vector', table_name='analysis_history')
+    op.drop_column('analysis_history', 'search_vector')
@@ -0,0 +1,16 @@
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '000000000012'
+down_revision: Union[str, None] = '000000000011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('analysis_job', sa.Column('local_result', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('analysis_job', 'local_result')
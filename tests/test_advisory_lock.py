@@ -0,0 +1,38 @@
+import os
+
+import pytest
+from sqlalchemy import text
+
+pytestmark = pytest.mark.skipif(not os.environ.get("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL não definido")
+
+HELD_LOCKS = text("SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' AND pid = pg_backend_pid()")
+
+
+def test_postgres_single_flight_holds_the_lock_on_the_request_connection(monkeypatch):
+    from agents.router import ModelRoute
+    from repositories import AnalyzerRepository
+    from repositories.base_db import BaseDBRepository
+    from services.code_analizer import CodeAnalyzerService
+
+    pool = BaseDBRepository.database.engine.pool
+    seen = {}
+
+    with BaseDBRepository.database.scope():
+        repository = AnalyzerRepository()
+        service = CodeAnalyzerService(repository, None, None, None)
+        monkeypatch.setattr(service, "_single_flight_mode", "postgres")
+
+        def analyze_and_store(*args):
+            # Stands in for the model call: what is held while it runs.
+            seen["locks"] = repository.session.execute(HELD_LOCKS).scalar()
+            seen["connections"] = pool.checkedout()
+
+            return "analysis"
+
+        monkeypatch.setattr(service, "_analyze_and_store", analyze_and_store)
+        route = ModelRoute(name="default", model="fake/test")
+
+        assert service._analyze("x = 1\n", "hash", None, route, bypass_cache=True) == "analysis"
+        assert repository.session.execute(HELD_LOCKS).scalar() == 0
+
+    assert seen == {"locks": 1, "connections": 1}
@@ -0,0 +1,85 @@
+from analysis.chunking import CodeChunker
+
+MODULE = '''import os
+from typing import List
+
+LIMIT = 10
+
+
+@staticmethod
+def first(path):
+    return os.path.exists(path)
+
+
+def second(items: List[str]):
+
+    return len(items)
+
+
+class Third:
+    size = LIMIT
+
+    def grow(self):
+        self.size += 1
+
+    def shrink(self):
+        self.size -= 1
+'''
+
+
+def test_definitions_cover_each_top_level_definition_with_original_line_numbers():
+    chunks = CodeChunker.definitions(MODULE)
+
+    assert [(chunk.names, chunk.start_line, chunk.end_line) for chunk in chunks] == [
+        (["<module>"], 4, 4),
+        (["first"], 7, 9),
+        (["second"], 12, 14),
+        (["Third"], 17, 24),
+    ]
+    assert all(chunk.context == "import os\nfrom typing import List" for chunk in chunks)
+
+
+def test_source_is_numbered_from_the_original_file_without_blank_lines():
+    second = CodeChunker.definitions(MODULE)[2]
+
+    assert second.source == "12| def second(items: List[str]):\n14|     return len(items)"
+
+
+def test_split_packs_adjacent_definitions_up_to_max_lines():
+    chunks = CodeChunker.split(MODULE, max_lines=10)
+
+    assert [(chunk.names, chunk.start_line, chunk.end_line) for chunk in chunks] == [
+        (["<module>", "first"], 4, 9),
+        (["second"], 12, 14),
+        (["Third"], 17, 24),
+    ]
+    assert [len(chunk.names) for chunk in CodeChunker.split(MODULE)] == [4]
+
+
+def test_oversized_class_is_split_per_method_with_its_header_as_context():
+    chunks = CodeChunker.definitions(MODULE, max_lines=5)
+    grow, shrink = chunks[-2:]
+
+    assert [(chunk.names, chunk.start_line, chunk.end_line) for chunk in (grow, shrink)] == [
+        (["Third.grow"], 20, 21),
+        (["Third.shrink"], 23, 24),
+    ]
+    assert grow.context.endswith("class Third:\n    size = LIMIT")
+    assert grow.source == "20|     def grow(self):\n21|         self.size += 1"
+
+
+def test_digest_ignores_where_the_definition_is():
+    moved = "\n\n\n" + MODULE.replace("LIMIT = 10\n", "LIMIT = 10\nOTHER = 20\n")
+    before = {chunk.names[0]: chunk for chunk in CodeChunker.definitions(MODULE)}
+    after = {chunk.names[0]: chunk for chunk in CodeChunker.definitions(moved)}
+
+    assert after["second"].start_line == before["second"].start_line + 1
+    assert after["second"].digest == before["second"].digest
+    assert after["<module>"].digest != before["<module>"].digest
+
+
+def test_unparsable_code_is_a_single_module_chunk():
+    [chunk] = CodeChunker.split("def broken(:\n    pass\n")
+
+    assert (chunk.names, chunk.start_line, chunk.end_line) == (["<module>"], 1, 2)
+    assert chunk.source == "1| def broken(:\n2|     pass"
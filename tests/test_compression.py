@@ -0,0 +1,56 @@
+import pytest
+
+from utils import BlobCodec, compression
+
+BODY = ("def total(items):\n    return sum(item.price for item in items)  # preço, ação\n" * 200).encode("utf-8")
+
+
+@pytest.mark.parametrize("codec", ["zstd", "zlib", "none"])
+def test_bodies_round_trip_through_each_codec(monkeypatch, codec):
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+
+    monkeypatch.setattr(BlobCodec, "CODEC", codec)
+    used, data = BlobCodec.compress(BODY)
+
+    assert used == codec
+    assert BlobCodec.decompress(used, data) == BODY
+    assert BlobCodec.decompress(used, memoryview(data)) == BODY
+
+    if codec != "none":
+        assert len(data) < len(BODY) / 10
+
+
+def test_empty_body_round_trips():
+    assert BlobCodec.decompress(*BlobCodec.compress(b"")) == b""
+
+
+def test_zstd_falls_back_to_zlib_without_zstandard(monkeypatch):
+    monkeypatch.setattr(BlobCodec, "CODEC", "zstd")
+    monkeypatch.setattr(compression, "zstandard", None)
+    used, data = BlobCodec.compress(BODY)
+
+    assert used == "zlib"
+    assert BlobCodec.decompress(used, data) == BODY
+
+    with pytest.raises(ValueError, match="zstd"):
+        BlobCodec.decompress("zstd", data)
+
+
+def test_unknown_codec_is_refused():
+    with pytest.raises(ValueError, match="lz4"):
+        BlobCodec.decompress("lz4", BODY)
+
+
+def test_blob_is_addressed_by_the_uncompressed_body(monkeypatch):
+    from entities import AnalysisBlob
+
+    text = BODY.decode("utf-8")
+    monkeypatch.setattr(BlobCodec, "CODEC", "zlib")
+    zlib_blob = AnalysisBlob.of(text)
+    monkeypatch.setattr(BlobCodec, "CODEC", "none")
+    plain_blob = AnalysisBlob.of(text)
+
+    assert zlib_blob.hash == plain_blob.hash == BlobCodec.digest(BODY)
+    assert (zlib_blob.size, zlib_blob.codec, plain_blob.codec) == (len(BODY), "zlib", "none")
+    assert zlib_blob.text() == plain_blob.text() == text
@@ -0,0 +1,38 @@
+import uuid
+
+import pytest
+
+CODE = '''
+def total(items, discount, tax):
+    result = 0
+    for item in items:
+        if item.price > 0:
+            result += item.price * (1 - discount)
+    return result * (1 + tax)
+'''
+
+
+@pytest.mark.parametrize("mode", ["off", "local"])
+def test_no_connection_is_held_during_the_model_call(database, monkeypatch, mode):
+    from repositories import AnalyzerRepository, FingerprintRepository, RegionRepository
+    from repositories.base_db import BaseDBRepository
+    from services.code_analizer import CodeAnalyzerService
+
+    pool = BaseDBRepository.database.engine.pool
+    held = []
+
+    def analyze_and_store(code, code_hash, *args):
+        # Stands in for the model call and the store.
+        held.append(pool.checkedout())
+
+        return "analysis"
+
+    with BaseDBRepository.database.scope():
+        service = CodeAnalyzerService(AnalyzerRepository(), FingerprintRepository(), RegionRepository(), None)
+        monkeypatch.setattr(service, "_single_flight_mode", mode)
+        monkeypatch.setattr(service, "_analyze_and_store", analyze_and_store)
+
+        # A new snippet, so the lookups miss and run against the database.
+        assert service._code_analizer(f"{CODE}\nVERSION = '{uuid.uuid4()}'\n", False, None, "normal") == "analysis"
+
+    assert held == [0]
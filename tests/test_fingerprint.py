@@ -0,0 +1,118 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from analysis.fingerprint import CodeFingerprint
+from services.code_analizer import CodeAnalyzerService
+
+STORED = '''
+def total(items, discount, tax):
+    """Sums the order."""
+    result = 0
+    for item in items:
+        if item.price > 0:
+            result += item.price * (1 - discount)
+    return result * (1 + tax)
+'''
+
+# Same structure: only names, literals, comments and the docstring differ.
+RENAMED = '''
+def order_total(lines, rebate, vat):
+    # Soma o pedido.
+    acc = 10
+    for line in lines:
+        if line.price > 5:
+            acc += line.price * (2 - rebate)
+    return acc * (3 + vat)
+'''
+
+# One statement added: about 0.89 similar.
+EDITED = STORED.replace("    return result * (1 + tax)\n", "    log(result)\n    return result * (1 + tax)\n")
+
+UNRELATED = '''
+class Cache:
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+'''
+
+STORED_ID = uuid.uuid4()
+
+
+class FakeFingerprintRepository:
+    """
+    Holds the fingerprint of `STORED`, found through any band key it shares.
+    """
+
+    def __init__(self, context):
+        self.signature = CodeFingerprint.signature(STORED)
+        self.band_keys = set(CodeFingerprint.band_keys(self.signature, *context))
+
+    def find_candidates(self, band_keys):
+        return [(STORED_ID, CodeFingerprint.pack(self.signature))] if self.band_keys & set(band_keys) else []
+
+
+class FakeAnalyzerRepository:
+    def find_by(self, **filters):
+        analysis = SimpleNamespace(id=filters["id"], suggestions="Valide os preços.", model="fake/test")
+        return SimpleNamespace(one_or_none=lambda: analysis if filters["id"] == STORED_ID else None)
+
+
+def service_with(threshold, monkeypatch):
+    service = CodeAnalyzerService(FakeAnalyzerRepository(), None, None, None)
+    service.fingerprint_repository = FakeFingerprintRepository(service.context())
+    monkeypatch.setattr(service, "_near_duplicate_threshold", threshold)
+
+    return service
+
+
+def test_signature_ignores_names_literals_and_comments():
+    assert CodeFingerprint.similarity(CodeFingerprint.signature(STORED), CodeFingerprint.signature(RENAMED)) == 1.0
+
+
+def test_small_edit_shares_bands_and_unrelated_code_does_not():
+    stored = CodeFingerprint.signature(STORED)
+    edited = CodeFingerprint.signature(EDITED)
+    unrelated = CodeFingerprint.signature(UNRELATED)
+
+    assert 0.85 <= CodeFingerprint.similarity(stored, edited) < 0.9
+    assert CodeFingerprint.similarity(stored, unrelated) < 0.2
+    assert set(CodeFingerprint.band_keys(stored)) & set(CodeFingerprint.band_keys(edited))
+    assert not set(CodeFingerprint.band_keys(stored)) & set(CodeFingerprint.band_keys(unrelated))
+
+
+def test_band_keys_depend_on_the_context():
+    signature = CodeFingerprint.signature(STORED)
+
+    assert not set(CodeFingerprint.band_keys(signature, "fake/small")) & set(CodeFingerprint.band_keys(signature, "fake/large"))
+
+
+def test_signature_round_trips_through_pack():
+    signature = CodeFingerprint.signature(STORED)
+
+    assert CodeFingerprint.unpack(CodeFingerprint.pack(signature)) == signature
+
+
+@pytest.mark.parametrize(
+    "code, threshold, hit",
+    [
+        (RENAMED, 0.9, True),
+        (EDITED, 0.85, True),
+        (EDITED, 0.9, False),
+        (UNRELATED, 0.1, False),
+        (STORED, 1.01, False),
+    ],
+)
+def test_near_duplicate_lookup_honours_the_threshold(monkeypatch, code, threshold, hit):
+    result = service_with(threshold, monkeypatch)._lookup_near_duplicate(code)
+
+    if not hit:
+        assert result is None
+        return
+
+    assert result.id == str(STORED_ID)
+    assert (result.cache, result.cache_tier, result.near_duplicate) == ("HIT", "near-duplicate", True)
+    assert result.similarity >= threshold
@@ -0,0 +1,27 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.pool import AgentPool
+from agents.router import ModelRoute, ModelRouter
+from services.code_analizer import CodeAnalyzerService
+
+CALLS = 96
+
+
+def test_concurrent_primaries_do_not_queue_into_spurious_hedges():
+    pool = AgentPool(size=CALLS, model="fake/primary")
+    router = ModelRouter(pool, [], hedge_model="fake/hedge", hedge_min_samples=1)
+    route = ModelRoute(name="default", model="fake/primary", hedge_model="fake/hedge")
+    # Every call is well under the hedge delay, as long as it starts right away.
+    router.observe(route, 0.2)
+    service = CodeAnalyzerService(None, None, None, None)
+    service.router = router
+
+    def run(agent_pool):
+        time.sleep(0.05)
+        return agent_pool.model
+
+    with ThreadPoolExecutor(max_workers=CALLS) as callers:
+        results = list(callers.map(lambda _: service._call_model(route, run), range(CALLS)))
+
+    assert results == [("fake/primary", "fake/primary", False)] * CALLS
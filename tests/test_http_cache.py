@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from adapters.api_client import APIClient
+from adapters.http_cache import HTTPCache
+
+ETAG = '"reference-v1"'
+LAST_MODIFIED = "Mon, 05 Jan 2026 10:00:00 GMT"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Serves a JSON body with validators and the cache headers set by the test, answering conditional
+    requests with 304 (without the cache headers when `bare_304` is set) and counting what it served.
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    headers_to_send = {}
+    bare_304 = False
+    served = Counter()
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == ETAG or self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            self.reply(304, b"")
+            return
+
+        self.reply(200, json.dumps({"path": self.path}).encode())
+
+    def reply(self, status, body):
+        self.served[status] += 1
+        self.send_response(status)
+        self.send_header("ETag", ETAG)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+
+        for name, value in ({} if status == 304 and self.bare_304 else self.headers_to_send).items():
+            self.send_header(name, value)
+
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """
+    A local API answering with the given cache headers; yields a function setting them and returning the base URL.
+    """
+    monkeypatch.setattr(StubHandler, "served", Counter())
+    monkeypatch.setattr(StubHandler, "bare_304", False)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def serve(**headers):
+        monkeypatch.setattr(StubHandler, "headers_to_send", {name.replace("_", "-"): value for name, value in headers.items()})
+
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield serve
+
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(base_url, cache, times=2):
+    with APIClient(base_url, cache=cache) as client:
+        return [client.get("/reference") for _ in range(times)]
+
+
+def test_fresh_entry_is_served_without_asking_the_api(stub):
+    cache = HTTPCache(name="test")
+
+    first, second = fetch(stub(Cache_Control="max-age=60"), cache)
+
+    assert first == second == {"path": "/reference"}
+    assert StubHandler.served == Counter({200: 1})
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "revalidations": 0}
+
+
+def test_stale_entry_is_revalidated_with_304(stub):
+    cache = HTTPCache(name="test")
+
+    assert fetch(stub(Cache_Control="max-age=0"), cache, times=3)[-1] == {"path": "/reference"}
+    assert StubHandler.served == Counter({200: 1, 304: 2})
+    assert cache.stats()["revalidations"] == 2
+
+
+def test_304_without_cache_headers_keeps_the_stored_no_cache(stub, monkeypatch):
+    cache = HTTPCache(name="test", ttl=60)
+    monkeypatch.setattr(StubHandler, "bare_304", True)
+
+    assert fetch(stub(Cache_Control="no-cache"), cache, times=3)[-1] == {"path": "/reference"}
+    assert StubHandler.served == Counter({200: 1, 304: 2})
+    assert cache.stats()["hits"] == 0
+
+
+@pytest.mark.parametrize("headers", [{"Cache_Control": "no-store"}, {"Cache_Control": "max-age=60", "Vary": "*"}])
+def test_uncacheable_response_is_not_stored(stub, headers):
+    cache = HTTPCache(name="test")
+
+    fetch(stub(**headers), cache)
+
+    assert StubHandler.served == Counter({200: 2})
+    assert cache.stats() == {"entries": 0, "hits": 0, "misses": 2, "revalidations": 0}
+
+
+def test_age_is_subtracted_from_max_age(stub):
+    cache = HTTPCache(name="test")
+    base_url = stub(Cache_Control="max-age=60", Age="45")
+
+    fetch(base_url, cache, times=1)
+    entry = cache.get(HTTPCache.key(f"{base_url}/reference"))
+
+    assert 14 <= entry["fresh_until"] - time.time() <= 15
+    assert cache.freshness({"Cache-Control": "max-age=60", "Age": "90"}) == 0
+
+
+def test_disk_entries_survive_a_new_cache(stub, tmp_path):
+    base_url = stub(Cache_Control="max-age=60")
+    fetch(base_url, HTTPCache(name="test", directory=str(tmp_path)), times=1)
+    reloaded = HTTPCache(name="test", directory=str(tmp_path))
+
+    assert fetch(base_url, reloaded, times=1) == [{"path": "/reference"}]
+    assert StubHandler.served == Counter({200: 1})
+    assert reloaded.stats()["hits"] == 1
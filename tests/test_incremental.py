@@ -0,0 +1,85 @@
+import uuid
+
+from adapters.dtos import AnalysisDTO
+from services.code_analizer import CodeAnalyzerService
+
+FIRST = '''
+def parse(payload):
+    return payload.split(",")
+
+
+def render(items):
+    return "\\n".join(items)
+
+
+class Report:
+    def build(self, payload):
+        return render(parse(payload))
+'''
+
+# Only `render` changed.
+SECOND = FIRST.replace('return "\\n".join(items)', 'return "; ".join(sorted(items))')
+
+PREVIOUS_ID = uuid.uuid4()
+PREVIOUS_SUGGESTIONS = "Use a dedicated parser for the payload."
+
+
+class FakeAnalyzerRepository:
+    def find_suggestions(self, analysis_id):
+        return PREVIOUS_SUGGESTIONS if analysis_id == PREVIOUS_ID else None
+
+    def release(self):
+        pass
+
+
+class FakeFingerprintRepository:
+    def release(self):
+        pass
+
+
+class FakeRegionRepository:
+    def __init__(self, regions):
+        self.regions = regions
+
+    def find_by_hash(self, analysis_id):
+        return {region.region_hash: region for region in self.regions} if analysis_id == PREVIOUS_ID else {}
+
+    def release(self):
+        pass
+
+
+def service_with(regions):
+    return CodeAnalyzerService(FakeAnalyzerRepository(), FakeFingerprintRepository(), FakeRegionRepository(regions), None)
+
+
+def test_full_analysis_stores_its_definitions_as_covered_regions():
+    service = service_with([])
+    entry = service._history_entry(FIRST, "hash", AnalysisDTO(suggestions=PREVIOUS_SUGGESTIONS))
+
+    [(_, _, regions)] = service._pending([entry], [[]])
+
+    assert {region.name for region in regions} == {"parse", "render", "Report"}
+    assert all(region.findings == "" and region.analysis_id == entry.id for region in regions)
+
+
+def test_resubmission_of_a_full_analysis_only_reviews_the_changed_definition():
+    service = service_with(service_with([])._covered_regions(FIRST))
+
+    result, regions = service._kickoff_incremental(SECOND, None, PREVIOUS_ID)
+
+    assert result.analyzed_regions == ["render"]
+    assert sorted(result.reused_regions) == ["Report", "parse"]
+    assert {region.name for region in regions} == {"parse", "render", "Report"}
+    assert all(region.findings == "" for region in regions if region.name != "render")
+
+
+def test_incremental_and_full_requests_do_not_share_a_flight():
+    from agents.router import ModelRoute
+
+    small = ModelRoute(name="small", model="fake/small")
+    large = ModelRoute(name="large", model="fake/large")
+    full = CodeAnalyzerService._flight_key("hash", small, None)
+
+    assert full == CodeAnalyzerService._flight_key("hash", small, None)
+    assert full != CodeAnalyzerService._flight_key("hash", small, PREVIOUS_ID)
+    assert full != CodeAnalyzerService._flight_key("hash", large, None)
@@ -0,0 +1,132 @@
+import time
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from services import jobs
+
+TRIVIAL_SNIPPET = "x = 1\n"
+
+
+class FakeJobRepository:
+    """
+    Stands in for `JobRepository`, recording how jobs end.
+    """
+
+    finished = []
+    failed = []
+    retried = []
+    attempts = 1
+
+    def __init__(self):
+        self.session = self
+
+    def find_by(self, **filters):
+        self.job = jobs.AnalysisJob(
+            id=filters["id"], code_snippet=TRIVIAL_SNIPPET, bypass_cache=False, attempts=self.attempts
+        )
+        return self
+
+    def one(self):
+        return self.job
+
+    def finish(self, job_id, analysis_id=None, local_result=None):
+        self.finished.append((job_id, analysis_id, local_result))
+
+    def fail(self, job_id, error):
+        self.failed.append((job_id, error))
+
+    def retry(self, job_id, error, delay):
+        self.retried.append((job_id, error, delay))
+
+    def rollback(self):
+        pass
+
+
+def test_trivial_snippet_job_keeps_the_local_report(monkeypatch):
+    monkeypatch.setattr(jobs, "JobRepository", FakeJobRepository)
+    monkeypatch.setattr(FakeJobRepository, "finished", [])
+    monkeypatch.setattr(FakeJobRepository, "failed", [])
+    job_id = uuid.uuid4()
+
+    jobs.AnalysisJobService.pool._execute(job_id)
+
+    assert FakeJobRepository.failed == []
+    [(finished_id, analysis_id, local_result)] = FakeJobRepository.finished
+    assert finished_id == job_id
+    assert analysis_id is None
+    assert local_result
+
+
+@pytest.mark.parametrize(
+    "error, attempts, delay",
+    [
+        (jobs.LLMUnavailableError("Modelo indisponível", retry_after=3), 1, 10),
+        (HTTPException(status_code=503, detail="Modelo indisponível", headers={"Retry-After": "45"}), 2, 45),
+        (jobs.LLMUnavailableError("Modelo indisponível", retry_after=0), 3, None),
+        (HTTPException(status_code=500, detail="Erro na análise de código"), 1, None),
+    ],
+)
+def test_transient_failures_are_retried_until_the_attempts_run_out(monkeypatch, error, attempts, delay):
+    def code_analizer(self, code, bypass_cache=False):
+        raise error
+
+    monkeypatch.setattr(jobs, "JobRepository", FakeJobRepository)
+    monkeypatch.setattr(jobs.CodeAnalyzerService, "code_analizer", code_analizer)
+    monkeypatch.setattr(FakeJobRepository, "failed", [])
+    monkeypatch.setattr(FakeJobRepository, "retried", [])
+    monkeypatch.setattr(FakeJobRepository, "attempts", attempts)
+    pool = jobs.JobWorkerPool(workers=1, poll_interval=1, lease=60, max_attempts=3, retry_backoff=10, retry_backoff_max=300)
+    job_id = uuid.uuid4()
+
+    pool._execute(job_id)
+
+    if delay is None:
+        assert FakeJobRepository.retried == []
+        assert [failed_id for failed_id, _ in FakeJobRepository.failed] == [job_id]
+    else:
+        assert FakeJobRepository.failed == []
+        assert FakeJobRepository.retried == [(job_id, "Modelo indisponível", delay)]
+
+
+def test_retried_job_is_not_claimed_before_its_delay(database):
+    from entities import AnalysisJob
+    from repositories import JobRepository
+
+    job_id = uuid.uuid4()
+
+    with JobRepository() as repository:
+        repository.create(AnalysisJob(id=job_id, code_snippet=TRIVIAL_SNIPPET, bypass_cache=False, attempts=1))
+        repository.retry(job_id, "Modelo indisponível", 60)
+        assert job_id not in repository.claim_pending(100)
+
+        repository.retry(job_id, "Modelo indisponível", 0)
+        assert job_id in repository.claim_pending(100)
+
+        job = repository.find_by(id=job_id).one()
+        assert (job.status, job.attempts, job.error) == (AnalysisJob.RUNNING, 2, "Modelo indisponível")
+        repository.finish(job_id, local_result="relatório")
+
+
+def test_trivial_snippet_through_jobs_endpoint(database):
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as client:
+        created = client.post("/analyze-code/jobs", json={"code": TRIVIAL_SNIPPET})
+        assert created.status_code == 202
+        job_id = created.json()["data"]["id"]
+        deadline = time.monotonic() + 30
+
+        while True:
+            job = client.get(f"/analyze-code/jobs/{job_id}").json()["data"]
+
+            if job["status"] in ("done", "failed") or time.monotonic() > deadline:
+                break
+
+            time.sleep(0.2)
+
+    assert job["status"] == "done", job["error"]
+    assert job["analysis_id"] is None
+    assert job["result"]
@@ -0,0 +1,146 @@
+import litellm
+import pytest
+
+from entities.llm_governor import LLMGovernor, LLMUnavailableError
+
+
+@pytest.fixture
+def governor():
+    """
+    A governor of its own, outside the process-wide registry, that never sleeps between retries.
+    """
+    governor = LLMGovernor("fake/governed")
+    governor.limit = 4
+    governor.min_limit = 1
+    governor.max_limit = 8
+    governor.latency_target = 30
+    governor.decrease_cooldown = 60
+    governor.queue_timeout = 0
+    governor.max_attempts = 1
+    governor.backoff_base = 0
+    governor.failure_threshold = 2
+    governor.reset_timeout = 30
+
+    return governor
+
+
+def unavailable():
+    raise litellm.ServiceUnavailableError("indisponível", "openai", "fake/governed")
+
+
+def test_fast_successes_grow_the_limit_additively(governor):
+    for _ in range(4):
+        assert governor.call(lambda: "ok") == "ok"
+
+    assert 4.9 < governor.limit < 5
+    assert governor.in_flight == 0
+
+    governor.limit = governor.max_limit
+    governor.call(lambda: "ok")
+    assert governor.limit == governor.max_limit
+
+
+def test_slow_call_halves_the_limit_once_per_cooldown(governor):
+    governor.latency_target = 0
+
+    governor.call(lambda: "lento")
+    governor.call(lambda: "lento")
+    assert governor.limit == 2
+
+    governor._last_decrease -= governor.decrease_cooldown
+    governor.limit = 1.5
+    governor.call(lambda: "lento")
+    assert governor.limit == governor.min_limit
+
+
+def test_rate_limit_halves_the_limit_and_is_retried(governor):
+    governor.max_attempts = 2
+    calls = []
+
+    def limited_once():
+        calls.append(1)
+
+        if len(calls) == 1:
+            raise litellm.RateLimitError("limite", "openai", "fake/governed")
+
+        return "ok"
+
+    assert governor.call(limited_once) == "ok"
+    assert len(calls) == 2
+    # Halved by the 429, then grown by the successful retry.
+    assert governor.limit == 2.5
+    assert (governor.state, governor.failures) == (LLMGovernor.CLOSED, 0)
+
+
+def test_other_errors_are_raised_without_penalty(governor):
+    def bad_request():
+        raise ValueError("prompt inválido")
+
+    with pytest.raises(ValueError):
+        governor.call(bad_request)
+
+    assert (governor.limit, governor.failures, governor.in_flight) == (4, 0, 0)
+
+
+def test_circuit_opens_after_consecutive_failures_and_fails_fast(governor):
+    for _ in range(2):
+        with pytest.raises(LLMUnavailableError):
+            governor.call(unavailable)
+
+    assert governor.state == LLMGovernor.OPEN
+    assert governor.stats()["state"] == "open"
+
+    calls = []
+
+    with pytest.raises(LLMUnavailableError) as rejected:
+        governor.call(lambda: calls.append(1))
+
+    assert calls == []
+    assert 29 < rejected.value.retry_after <= 30
+
+
+def test_half_open_circuit_lets_one_probe_through_and_closes_on_success(governor):
+    for _ in range(2):
+        with pytest.raises(LLMUnavailableError):
+            governor.call(unavailable)
+
+    governor.opened_at -= governor.reset_timeout
+
+    def probe():
+        assert governor.state == LLMGovernor.HALF_OPEN
+
+        # A second call while the probe is in flight is turned away.
+        with pytest.raises(LLMUnavailableError):
+            governor.call(lambda: "concorrente")
+
+        return "ok"
+
+    assert governor.call(probe) == "ok"
+    assert (governor.state, governor.failures) == (LLMGovernor.CLOSED, 0)
+
+
+def test_failed_probe_opens_the_circuit_again(governor):
+    for _ in range(2):
+        with pytest.raises(LLMUnavailableError):
+            governor.call(unavailable)
+
+    governor.opened_at -= governor.reset_timeout
+
+    with pytest.raises(LLMUnavailableError):
+        governor.call(unavailable)
+
+    assert governor.state == LLMGovernor.OPEN
+    assert governor._remaining_open() > 29
+
+
+def test_calls_beyond_the_limit_are_throttled(governor):
+    governor.limit = 1
+
+    def nested():
+        with pytest.raises(LLMUnavailableError, match="Muitas análises"):
+            governor.call(lambda: "excedente")
+
+        return "ok"
+
+    assert governor.call(nested) == "ok"
+    assert governor.in_flight == 0
@@ -0,0 +1,25 @@
+from analysis import StaticAnalyzer
+
+CODE = '''
+def f(a, b, c, d, e, g, h):
+    return a
+
+
+class K:
+    def m(self, a, b, c, d, e, g):
+        return a
+
+
+def other(a, b, c, d, e, g):
+    return a
+'''
+
+
+def test_summary_keeps_the_findings_of_the_selected_names():
+    report = StaticAnalyzer.analyze(CODE)
+
+    summary = StaticAnalyzer.summary(report, ["f", "K"])
+
+    assert "warning: long-parameter-list: f (line 1) takes 7 parameters" in summary
+    assert "warning: long-parameter-list: K.m (line 6)" in summary
+    assert "other" not in summary
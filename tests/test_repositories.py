@@ -0,0 +1,29 @@
+import uuid
+
+import pytest
+
+
+def test_update_where_refuses_attributes_that_are_not_columns():
+    from repositories import AnalyzerRepository
+
+    repository = AnalyzerRepository()
+
+    with pytest.raises(ValueError, match="suggestions"):
+        repository.update_where({"suggestions": "nova"}, id=uuid.uuid4())
+
+
+def test_copy_many_keeps_none_apart_from_empty_and_backslash_n(database):
+    from entities import AnalysisJob
+    from repositories.base_db import BaseDBRepository
+
+    errors = {uuid.uuid4(): value for value in (None, "", "\\N", 'aspas "e", vírgula\nquebra')}
+    rows = [
+        {"id": job_id, "code_snippet": "x = 1\n", "bypass_cache": False, "status": AnalysisJob.DONE, "attempts": 0, "error": error}
+        for job_id, error in errors.items()
+    ]
+
+    with BaseDBRepository(AnalysisJob) as repository:
+        assert repository.copy_many(rows, ["id", "code_snippet", "bypass_cache", "status", "attempts", "error"]) == len(rows)
+        stored = dict(repository.session.query(AnalysisJob.id, AnalysisJob.error).filter(AnalysisJob.id.in_(list(errors))))
+
+    assert stored == errors
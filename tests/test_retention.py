@@ -0,0 +1,77 @@
+import threading
+import uuid
+from datetime import date, datetime, timezone
+
+from sqlalchemy import select
+
+
+def test_purge_keeps_a_blob_a_concurrent_writer_reuses(database):
+    from entities import AnalysisBlob, AnalysisHistory
+    from repositories import AnalyzerRepository
+    from repositories.analysis import insert_blobs
+    from repositories.partition import PartitionRepository
+
+    code = f"shared = '{uuid.uuid4()}'\n"
+    month = date(2001, 1, 1)
+
+    with PartitionRepository() as partitions:
+        name = partitions.partition_name(month)
+        partitions.create_partition(month)
+
+        with AnalyzerRepository() as old:
+            old.create(AnalysisHistory(
+                code_snippet=code, suggestions="antiga", created_at=datetime(2001, 1, 15, tzinfo=timezone.utc)
+            ))
+
+        partitions.detach(name)
+
+    with AnalyzerRepository() as writer:
+        entry = AnalysisHistory(code_snippet=code, suggestions="nova")
+        # The writer has stored the blob, which already existed, but not yet the analysis using it.
+        writer.session.execute(insert_blobs([entry]))
+        errors = []
+
+        def purge():
+            try:
+                with PartitionRepository() as partitions:
+                    partitions.purge(name)
+            except Exception as e:
+                errors.append(e)
+
+        purging = threading.Thread(target=purge)
+        purging.start()
+        purging.join(0.5)
+        assert purging.is_alive()
+
+        writer.session.add(entry)
+        writer.session.commit()
+        purging.join(10)
+
+        assert not purging.is_alive() and errors == []
+        assert writer.session.scalar(select(AnalysisBlob.hash).filter_by(hash=entry.code_blob_hash)) is not None
+
+
+def test_purge_drops_the_blobs_only_its_partition_used(database):
+    from entities import AnalysisBlob, AnalysisHistory
+    from repositories import AnalyzerRepository
+    from repositories.partition import PartitionRepository
+
+    month = date(2001, 2, 1)
+    entry = AnalysisHistory(
+        code_snippet=f"orphan = '{uuid.uuid4()}'\n", suggestions="antiga", created_at=datetime(2001, 2, 15, tzinfo=timezone.utc)
+    )
+
+    blob_hash = entry.code_blob_hash
+
+    with PartitionRepository() as partitions:
+        name = partitions.partition_name(month)
+        partitions.create_partition(month)
+
+        with AnalyzerRepository() as old:
+            old.create(entry)
+
+        partitions.detach(name)
+
+        assert partitions.purge(name) == 1
+        assert partitions.session.scalar(select(AnalysisBlob.hash).filter_by(hash=blob_hash)) is None
+        assert name not in partitions.detached()
@@ -0,0 +1,107 @@
+from utils import WriteBehindQueue
+
+
+class FlakyFlush:
+    """
+    Fails the first `outages` calls, then every batch containing a poisoned item.
+    """
+
+    def __init__(self, outages, poisoned):
+        self.outages = outages
+        self.poisoned = poisoned
+        self.written = []
+
+    def __call__(self, batch):
+        if self.outages:
+            self.outages -= 1
+            raise RuntimeError("conexão perdida")
+
+        if self.poisoned & set(batch):
+            raise ValueError("item inválido")
+
+        self.written.extend(batch)
+
+
+def queue(flush, retries=2):
+    writer = WriteBehindQueue("test", max_size=100, batch_size=10, flush_interval=0.01, put_timeout=0,
+                              retries=retries, retry_backoff=0)
+    writer._flush = flush
+
+    return writer
+
+
+def test_short_outage_is_retried_without_losing_the_batch():
+    flush = FlakyFlush(outages=2, poisoned=set())
+    writer = queue(flush)
+
+    writer._write(list(range(10)))
+
+    assert flush.written == list(range(10))
+    assert writer.stats()["flushed"] == 10
+    assert writer.stats()["failed"] == 0
+    assert writer.stats()["retried"] == 20
+
+
+def test_bad_item_is_isolated_from_the_rest_of_the_batch():
+    flush = FlakyFlush(outages=0, poisoned={3})
+    writer = queue(flush)
+
+    writer._write(list(range(10)))
+
+    assert sorted(flush.written) == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+    assert writer.stats()["flushed"] == 9
+    assert writer.stats()["failed"] == 1
+
+
+class FakeRepository:
+    def __init__(self):
+        self.created = []
+
+    def create_many(self, entries):
+        self.created.extend(entries)
+
+    def create_many_with_bands(self, fingerprints):
+        self.created.extend(fingerprints)
+
+
+def test_queued_analysis_gets_no_id_until_it_is_written(monkeypatch):
+    from adapters.dtos import AnalysisDTO
+    from services.code_analizer import CodeAnalyzerService
+
+    batches = []
+    writer = queue(batches.append)
+    writer.start(batches.append)
+    service = CodeAnalyzerService(None, None, None, None)
+    monkeypatch.setattr(service, "write_behind", True)
+    monkeypatch.setattr(service, "writer", writer)
+    monkeypatch.setattr(service, "_single_flight_mode", "local")
+
+    analysis_id = service._store("def f(a):\n    return a\n", "queued-hash", AnalysisDTO(suggestions="ok", model="fake/test"))
+    writer.stop(timeout=5)
+
+    assert analysis_id is None
+    assert CodeAnalyzerService._cache.get("queued-hash") is None
+
+    [batch] = batches
+    CodeAnalyzerService._write(batch, FakeRepository(), FakeRepository(), FakeRepository())
+
+    assert CodeAnalyzerService._cache.get("queued-hash")[0] == str(batch[0][0].id)
+
+
+def test_postgres_single_flight_writes_on_the_request_path(monkeypatch):
+    from adapters.dtos import AnalysisDTO
+    from services.code_analizer import CodeAnalyzerService
+
+    analyses = FakeRepository()
+    writer = queue(lambda batch: None)
+    writer.start(lambda batch: None)
+    service = CodeAnalyzerService(analyses, FakeRepository(), FakeRepository(), None)
+    monkeypatch.setattr(service, "write_behind", True)
+    monkeypatch.setattr(service, "writer", writer)
+    monkeypatch.setattr(service, "_single_flight_mode", "postgres")
+
+    analysis_id = service._store("def g(b):\n    return b\n", "locked-hash", AnalysisDTO(suggestions="ok", model="fake/test"))
+    writer.stop(timeout=5)
+
+    assert analysis_id == str(analyses.created[0].id)
+    assert writer.stats()["queued"] == 0